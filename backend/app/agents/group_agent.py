@@ -1,16 +1,21 @@
 import json
-import math
+import time
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
+import numpy as np
 from crewai import Agent, Task, Crew, Process
 from crewai.llm import LLM
 from ..core.config import settings
 
+from app.agents.group_planner import CREW_PATH, DIRECT_PATH, group_planner
 from app.agents.tools.group_intent_extractor_tool import GroupIntentExtractorTool
 from app.agents.tools.foursquare_tool_group import FoursquareGroupTool
 from app.agents.tools.safety_tools import SafetyAssessmentTool
-from app.agents.tools.location_resolver import resolve_location, compute_fair_coordinates
+from app.agents.tools.location_resolver import resolve_location, compute_fair_coordinates, member_weight
+from app.agents.tools.venue_ranking import cost_matrix, price_target, rank_venues
+from app.core.executor import get_agent_executor
+from app.core.geo import haversine_km, haversine_matrix
 
 
 class GroupCoordinationAgent:
@@ -99,20 +104,38 @@ class GroupCoordinationAgent:
 
     def _calculate_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
         """Calculate distance between two coordinates using Haversine formula (in km)"""
-        R = 6371  # Earth's radius in kilometers
-        
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lng = math.radians(lng2 - lng1)
-        
-        a = (math.sin(delta_lat / 2) ** 2 + 
-             math.cos(lat1_rad) * math.cos(lat2_rad) * 
-             math.sin(delta_lng / 2) ** 2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        
-        return R * c
+        return haversine_km(lat1, lng1, lat2, lng2)
+
+    def _distance_matrix(self, member_locations: List[Dict[str, Any]], venues: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Member×venue distances (km) in one batched haversine, plus the
+        per-venue fairness stats derived from it: mean, max and variance of
+        what each member has to travel.
+        """
+        matrix = haversine_matrix(
+            [(m["lat"], m["lng"]) for m in member_locations],
+            [(v["geocodes"]["main"]["latitude"], v["geocodes"]["main"]["longitude"]) for v in venues]
+        )
+        return {
+            "matrix": matrix,
+            "mean": matrix.mean(axis=0),
+            "max": matrix.max(axis=0),
+            "variance": matrix.var(axis=0)
+        }
     
+    def _rank_venues(self, members: List[Dict], venues: List[Dict[str, Any]], distances: Dict[str, np.ndarray], top_k: int = 10) -> Dict[str, Any]:
+        """
+        Minimax-fair multi-objective ranking: max member travel, travel
+        variance, rating, safety score and fit with the group's budget.
+        Returns the top-k venues and the Pareto front.
+        """
+        budgets = [
+            m["constraints"]["budget"] for m in members
+            if isinstance(m.get("constraints"), dict) and m["constraints"].get("budget")
+        ]
+        costs = cost_matrix(distances["max"], distances["variance"], venues, price_target(budgets))
+        return rank_venues(venues, costs, k=top_k)
+
     def _calculate_venue_safety_score(self, venue: Dict[str, Any], meeting_time: Optional[str] = None) -> float:
         """Calculate safety score for individual venue"""
         base_score = 7.0
@@ -156,9 +179,20 @@ class GroupCoordinationAgent:
         
         return min(10.0, max(1.0, base_score))
 
-    async def coordinate_group_meetup(self, members: List[Dict[str, str]], meeting_time: Optional[str] = None, meeting_purpose: Optional[str] = None) -> Dict[str, Any]:
+    async def coordinate_group_meetup(self, members: List[Dict[str, str]], meeting_time: Optional[str] = None, meeting_purpose: Optional[str] = None, emit: Optional[Callable[[str, Any], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """
+        Coordinate a meetup. With `emit(event, data)`, partial results are sent
+        as they become available: the fair point, then (direct path only) each
+        batch of scored venues, the ranking, safety and per-member views.
+        Cancelling the calling task cancels the venue searches in flight.
+        """
+        # Structured requests skip the LLM crew entirely
+        plan = group_planner.plan(members, meeting_purpose)
+        started = time.perf_counter()
+
         # Handle location resolution for different data formats
         coords = []
+        weights = []
         member_locations = []
         
         for m in members:
@@ -168,179 +202,218 @@ class GroupCoordinationAgent:
                 lng = float(m["location"].get("lng", 77.5946))
             else:
                 # Fallback: resolve location string
-                lat, lng = resolve_location(m.get("location", "Bangalore"))
+                lat, lng = await get_agent_executor().run(resolve_location, m.get("location", "Bangalore"))
                 if not lat or not lng:
                     lat, lng = 12.9716, 77.5946
             coords.append((lat, lng))
+            weights.append(member_weight(m))
             member_locations.append({"lat": lat, "lng": lng, "name": m.get("name", "Member")})
         
-        fair_lat, fair_lng = compute_fair_coordinates(coords)
+        fair_lat, fair_lng = compute_fair_coordinates(coords, weights)
         fair_coords = {"lat": fair_lat, "lng": fair_lng}
+        if emit:
+            await emit("fair_point", {"fair_coords": fair_coords, "member_locations": member_locations, "plan": plan.to_dict()})
+
+        fell_back = False
+        if plan.path == DIRECT_PATH:
+            # Use Foursquare tool directly for group mode (simpler and more reliable)
+            try:
+                result = await self._direct_group_mode(members, coords, member_locations, fair_coords, meeting_time, meeting_purpose, emit)
+            except Exception as e:
+                print(f"Error using solo backend: {e}")
+                # Fallback to original group mode if solo integration fails
+                plan = plan.fall_back(f"direct path failed: {e}")
+                fell_back = True
+
+        if plan.path == CREW_PATH:
+            result = await self._fallback_group_mode(members, fair_coords, meeting_time, meeting_purpose)
+
+        result["execution"] = group_planner.record(plan, (time.perf_counter() - started) * 1000, fell_back)
+        return result
+
+    async def _direct_group_mode(self, members: List[Dict], coords: List[tuple], member_locations: List[Dict], fair_coords: Dict, meeting_time: Optional[str], meeting_purpose: Optional[str], emit: Optional[Callable[[str, Any], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Pure-code pipeline: Foursquare candidates, distance matrix, safety scoring and ranking"""
+        fair_lat, fair_lng = fair_coords["lat"], fair_coords["lng"]
+
+        # Create query for Foursquare search based on group preferences
+        group_query = self._build_group_query(members, meeting_purpose)
+
+        print(f"🔍 Using direct Foursquare search for: {group_query}")
+        print(f"🔍 Fair coordinates: {fair_lat}, {fair_lng}")
+
+        # Score each anchor's venues as its search returns
+        processed_venues = []
+        found = 0
+        failed = 0
+        async for batch in self.venue_tool.asearch_venue_batches((fair_lat, fair_lng), coords, group_query):
+            if batch["error"] or batch["timed_out"]:
+                failed += 1
+                continue
+            found += len(batch["venues"])
+            scored = self._score_venues(batch["venues"], member_locations, meeting_time)
+            processed_venues.extend(scored)
+            if emit and scored:
+                await emit("venues", {"anchor": batch["anchor_coords"], "venues": scored})
+
+        print(f"🔍 Final venues count: {found} ({failed} anchor searches failed or timed out)")
+
+        if not found:
+            if not failed:
+                raise ValueError("No venues found around fair coords")
 
-        # Use Foursquare tool directly for group mode (simpler and more reliable)
-        try:
-            # Create query for Foursquare search based on group preferences
-            group_query = self._build_group_query(members, meeting_purpose)
-            
-            print(f"🔍 Using direct Foursquare search for: {group_query}")
-            print(f"🔍 Fair coordinates: {fair_lat}, {fair_lng}")
-            
-            # Check if API key is available
-            import os
-            api_key = os.getenv('FSQ_API_KEY')
-            print(f"🔑 API Key available: {'Yes' if api_key else 'No'}")
-            if api_key:
-                print(f"🔑 API Key starts with: {api_key[:10]}...")
-            
-            # Use the Foursquare tool directly
-            intent_dict = {"search_query": group_query}
-            
-            print(f"🔍 Calling venue_tool.search_venues with:")
-            print(f"   lat={fair_lat}, lng={fair_lng}")
-            print(f"   intent={intent_dict}")
-            print(f"   meeting_time={meeting_time}")
-            
-            foursquare_result = self.venue_tool.search_venues(
-                lat=fair_lat,
-                lng=fair_lng,
-                intent=intent_dict,
-                meeting_time=meeting_time
-            )
-            
-            print(f"🔍 Foursquare result type: {type(foursquare_result)}")
-            print(f"🔍 Foursquare result: {foursquare_result}")
-            
-            # Parse Foursquare response - search_venues returns list directly
-            venues = []
-            if isinstance(foursquare_result, list):
-                venues = foursquare_result
-                print(f"🔍 Got {len(venues)} venues from list")
-            else:
-                print(f"🔍 Unexpected result type: {type(foursquare_result)}")
-            
-            print(f"🔍 Final venues count: {len(venues)}")
-            
             # TEMPORARY: If no venues found, create mock data for testing
-            if not venues:
-                print("🔍 No venues found, creating mock data for testing...")
-                venues = [
-                    {
-                        "fsq_id": "mock_1",
-                        "name": "Cafe Coffee Day",
-                        "categories": [{"id": 13035, "name": "Coffee Shop"}],
-                        "location": {
-                            "formatted_address": "100 Feet Road, Indiranagar, Bangalore",
-                            "address": "100 Feet Road"
-                        },
-                        "geocodes": {
-                            "main": {
-                                "latitude": 12.9784,
-                                "longitude": 77.6408
-                            }
-                        },
-                        "distance": 250,
-                        "rating": 7.2,
-                        "price": 2,
-                        "popularity": 0.85
+            print("🔍 No venues found, creating mock data for testing...")
+            venues = [
+                {
+                    "fsq_id": "mock_1",
+                    "name": "Cafe Coffee Day",
+                    "categories": [{"id": 13035, "name": "Coffee Shop"}],
+                    "location": {
+                        "formatted_address": "100 Feet Road, Indiranagar, Bangalore",
+                        "address": "100 Feet Road"
                     },
-                    {
-                        "fsq_id": "mock_2", 
-                        "name": "Third Wave Coffee Roasters",
-                        "categories": [{"id": 13035, "name": "Coffee Shop"}],
-                        "location": {
-                            "formatted_address": "Koramangala, Bangalore",
-                            "address": "Koramangala"
-                        },
-                        "geocodes": {
-                            "main": {
-                                "latitude": 12.9352,
-                                "longitude": 77.6245
-                            }
-                        },
-                        "distance": 150,
-                        "rating": 8.7,
-                        "price": 2,
-                        "popularity": 0.95
+                    "geocodes": {
+                        "main": {
+                            "latitude": 12.9784,
+                            "longitude": 77.6408
+                        }
                     },
-                    {
-                        "fsq_id": "mock_3",
-                        "name": "Starbucks Coffee",
-                        "categories": [{"id": 13035, "name": "Coffee Shop"}],
-                        "location": {
-                            "formatted_address": "HSR Layout, Bangalore", 
-                            "address": "HSR Layout"
-                        },
-                        "geocodes": {
-                            "main": {
-                                "latitude": 12.9082,
-                                "longitude": 77.6476
-                            }
-                        },
-                        "distance": 400,
-                        "rating": 8.1,
-                        "price": 3,
-                        "popularity": 0.92
-                    }
-                ]
-                print(f"🔍 Created {len(venues)} mock venues")
-            
-            # Process each venue with distance calculations and safety scores
-            processed_venues = []
-            
-            for venue in venues:
-                venue_lat = venue.get("geocodes", {}).get("main", {}).get("latitude")
-                venue_lng = venue.get("geocodes", {}).get("main", {}).get("longitude")
-                
-                if venue_lat and venue_lng:
-                    # Calculate distance from each member to this venue
-                    member_distances = []
-                    for member_loc in member_locations:
-                        distance = self._calculate_distance(
-                            member_loc["lat"], member_loc["lng"],
-                            venue_lat, venue_lng
-                        )
-                        member_distances.append({
-                            "member_name": member_loc["name"],
-                            "distance_km": round(distance, 2)
-                        })
-                    
-                    # Calculate venue-specific safety score
-                    venue_safety_score = self._calculate_venue_safety_score(venue, meeting_time)
-                    
-                    # Add computed data to venue
-                    processed_venue = venue.copy()
-                    processed_venue["member_distances"] = member_distances
-                    processed_venue["safety_score"] = venue_safety_score
-                    processed_venue["average_distance"] = round(
-                        sum(d["distance_km"] for d in member_distances) / len(member_distances), 2
-                    )
-                    
-                    processed_venues.append(processed_venue)
-            
-            # Calculate overall safety score based on area and venues
-            overall_safety_score = self._calculate_safety_score(processed_venues, fair_coords, meeting_time)
-            
-            return {
-                "status": "success",
-                "members": members,
-                "member_locations": member_locations,
-                "fair_coords": fair_coords,
-                "meeting_time": meeting_time,
-                "meeting_purpose": meeting_purpose,
-                "venues": processed_venues,
-                "safety": {
-                    "score": overall_safety_score,
-                    "assessment": self._get_safety_assessment(overall_safety_score),
-                    "coordinates": fair_coords
+                    "distance": 250,
+                    "rating": 7.2,
+                    "price": 2,
+                    "popularity": 0.85
                 },
-                "query_used": group_query,
-                "total_venues": len(processed_venues)
-            }
-            
-        except Exception as e:
-            print(f"Error using solo backend: {e}")
-            # Fallback to original group mode if solo integration fails
-            return await self._fallback_group_mode(members, fair_coords, meeting_time, meeting_purpose)
+                {
+                    "fsq_id": "mock_2", 
+                    "name": "Third Wave Coffee Roasters",
+                    "categories": [{"id": 13035, "name": "Coffee Shop"}],
+                    "location": {
+                        "formatted_address": "Koramangala, Bangalore",
+                        "address": "Koramangala"
+                    },
+                    "geocodes": {
+                        "main": {
+                            "latitude": 12.9352,
+                            "longitude": 77.6245
+                        }
+                    },
+                    "distance": 150,
+                    "rating": 8.7,
+                    "price": 2,
+                    "popularity": 0.95
+                },
+                {
+                    "fsq_id": "mock_3",
+                    "name": "Starbucks Coffee",
+                    "categories": [{"id": 13035, "name": "Coffee Shop"}],
+                    "location": {
+                        "formatted_address": "HSR Layout, Bangalore", 
+                        "address": "HSR Layout"
+                    },
+                    "geocodes": {
+                        "main": {
+                            "latitude": 12.9082,
+                            "longitude": 77.6476
+                        }
+                    },
+                    "distance": 400,
+                    "rating": 8.1,
+                    "price": 3,
+                    "popularity": 0.92
+                }
+            ]
+            print(f"🔍 Created {len(venues)} mock venues")
+            processed_venues = self._score_venues(venues, member_locations, meeting_time)
+            if emit and processed_venues:
+                await emit("venues", {"anchor": None, "venues": processed_venues})
+
+        if processed_venues:
+            # Rank on travel fairness, rating, safety and price fit together
+            distances = self._distance_matrix(member_locations, processed_venues)
+            ranking = self._rank_venues(members, processed_venues, distances)
+            processed_venues = ranking["ranked"]
+            pareto_front = ranking["pareto_front"]
+        else:
+            pareto_front = []
+        pareto_ids = [v.get("fsq_place_id") or v.get("fsq_id") or v.get("name") for v in pareto_front]
+        if emit:
+            await emit("ranking", {"venues": processed_venues, "pareto_front": pareto_ids})
+
+        # Calculate overall safety score based on area and venues
+        overall_safety_score = self._calculate_safety_score(processed_venues, fair_coords, meeting_time)
+        safety = {
+            "score": overall_safety_score,
+            "assessment": self._get_safety_assessment(overall_safety_score),
+            "coordinates": fair_coords
+        }
+        if emit:
+            await emit("safety", safety)
+
+        personalization = self._member_views(member_locations, processed_venues)
+        if emit:
+            await emit("personalization", personalization)
+
+        return {
+            "status": "success",
+            "members": members,
+            "member_locations": member_locations,
+            "fair_coords": fair_coords,
+            "meeting_time": meeting_time,
+            "meeting_purpose": meeting_purpose,
+            "venues": processed_venues,
+            "pareto_front": pareto_ids,
+            "safety": safety,
+            "personalization": personalization,
+            "query_used": group_query,
+            "total_venues": len(processed_venues)
+        }
+
+    def _score_venues(self, venues: List[Dict[str, Any]], member_locations: List[Dict[str, Any]], meeting_time: Optional[str]) -> List[Dict[str, Any]]:
+        """Member distances, fairness stats and safety score for every venue with coordinates"""
+        located_venues = [
+            v for v in venues
+            if v.get("geocodes", {}).get("main", {}).get("latitude")
+            and v.get("geocodes", {}).get("main", {}).get("longitude")
+        ]
+        if not located_venues or not member_locations:
+            return []
+
+        # Distance from every member to every venue in one call
+        distances = self._distance_matrix(member_locations, located_venues)
+
+        processed_venues = []
+        for j, venue in enumerate(located_venues):
+            member_distances = [
+                {"member_name": member_loc["name"], "distance_km": round(float(distances["matrix"][i, j]), 2)}
+                for i, member_loc in enumerate(member_locations)
+            ]
+
+            # Add computed data to venue
+            processed_venue = venue.copy()
+            processed_venue["member_distances"] = member_distances
+            processed_venue["safety_score"] = self._calculate_venue_safety_score(venue, meeting_time)
+            processed_venue["average_distance"] = round(float(distances["mean"][j]), 2)
+            processed_venue["max_distance"] = round(float(distances["max"][j]), 2)
+            processed_venue["distance_variance"] = round(float(distances["variance"][j]), 3)
+
+            processed_venues.append(processed_venue)
+        return processed_venues
+
+    def _member_views(self, member_locations: List[Dict[str, Any]], ranked_venues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Per member: the trip to the group's top pick and their own closest ranked option"""
+        views = []
+        for i, member in enumerate(member_locations):
+            trips = [(v["member_distances"][i]["distance_km"], v) for v in ranked_venues if len(v.get("member_distances", [])) > i]
+            if not trips:
+                views.append({"member_name": member["name"], "top_pick_distance_km": None, "closest_option": None})
+                continue
+            closest_km, closest = min(trips, key=lambda trip: trip[0])
+            views.append({
+                "member_name": member["name"],
+                "top_pick_distance_km": trips[0][0],
+                "closest_option": {"name": closest.get("name"), "distance_km": closest_km}
+            })
+        return views
 
     def _build_group_query(self, members: List[Dict[str, str]], meeting_purpose: Optional[str]) -> str:
         """Build a natural language query for solo mode based on group preferences"""
@@ -443,7 +516,8 @@ class GroupCoordinationAgent:
             process=Process.sequential
         )
 
-        result = crew.kickoff()
+        # The crew makes blocking LLM and HTTP calls; keep them off the event loop
+        result = await get_agent_executor().run(crew.kickoff)
 
         return {
             "status": "success",
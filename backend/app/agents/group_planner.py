@@ -0,0 +1,132 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+from app.agents.tools.gazetteer import get_gazetteer
+from app.core.config import settings
+from app.core.metrics import register_metrics
+
+DIRECT_PATH = "direct"
+CREW_PATH = "crew"
+
+# Member fields whose content is prose by nature; anything in them needs an LLM
+FREE_TEXT_FIELDS = {"notes", "note", "description", "comments", "requests", "special_requests", "other"}
+
+# Longer than this, a string value is a sentence rather than a keyword
+MAX_KEYWORD_WORDS = 4
+
+
+class ExecutionPlan:
+    """Which pipeline a group request runs on, and why"""
+
+    def __init__(self, path: str, reasons: List[str]):
+        self.path = path
+        self.reasons = reasons
+
+    def fall_back(self, reason: str) -> "ExecutionPlan":
+        return ExecutionPlan(CREW_PATH, self.reasons + [reason])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"path": self.path, "reasons": self.reasons}
+
+
+def _free_text(value: Any) -> Optional[str]:
+    """The first string in `value` that reads as prose, if any"""
+    if isinstance(value, str):
+        return value if len(value.split()) > MAX_KEYWORD_WORDS else None
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            found = _free_text(item)
+            if found:
+                return found
+    if isinstance(value, dict):
+        for item in value.values():
+            found = _free_text(item)
+            if found:
+                return found
+    return None
+
+
+class GroupExecutionPlanner:
+    """
+    Deterministic router for group requests.
+
+    Requests whose members, purpose and preferences are all structured
+    (coordinates or known localities, keyword purposes, enumerated
+    preferences) run on the pure-code pipeline: resolve, fair point,
+    Foursquare, distance and safety scoring. Only requests carrying free text
+    that has to be interpreted go to the CrewAI crew. Every decision records
+    its reasons, and the planner keeps counts of both paths plus direct-path
+    latency against the SLO.
+    """
+
+    def __init__(self, slo_ms: float):
+        self.slo_ms = slo_ms
+        self._lock = threading.Lock()
+        self.counts = {DIRECT_PATH: 0, CREW_PATH: 0}
+        self.fallbacks = 0
+        self.slo_violations = 0
+
+    def plan(self, members: List[Dict[str, Any]], meeting_purpose: Optional[str]) -> ExecutionPlan:
+        crew_reasons = []
+        notes = []
+
+        if meeting_purpose and len(meeting_purpose.split()) > MAX_KEYWORD_WORDS:
+            crew_reasons.append("meeting purpose is free text")
+
+        gazetteer = get_gazetteer()
+        for member in members:
+            name = member.get("name", "member")
+            location = member.get("location")
+            if isinstance(location, dict):
+                if location.get("lat") is None or location.get("lng") is None:
+                    notes.append(f"{name}: location without coordinates, using default")
+            elif isinstance(location, str) and not gazetteer.lookup(location):
+                try:
+                    [float(part) for part in location.split(",")]
+                except ValueError:
+                    notes.append(f"{name}: location needs geocoding")
+
+            for section in ("preferences", "constraints"):
+                fields = member.get(section) or {}
+                if not isinstance(fields, dict):
+                    continue
+                for key, value in fields.items():
+                    if key in FREE_TEXT_FIELDS and value:
+                        crew_reasons.append(f"{name}: free-text {section}.{key}")
+                    elif _free_text(value):
+                        crew_reasons.append(f"{name}: {section}.{key} is free text")
+
+        if crew_reasons:
+            return ExecutionPlan(CREW_PATH, crew_reasons + notes)
+        return ExecutionPlan(DIRECT_PATH, ["all member data is structured"] + notes)
+
+    def record(self, plan: ExecutionPlan, elapsed_ms: float, fell_back: bool = False) -> Dict[str, Any]:
+        """Count the outcome and return the report attached to the response"""
+        slo_met = elapsed_ms <= self.slo_ms
+        with self._lock:
+            self.counts[plan.path] += 1
+            if fell_back:
+                self.fallbacks += 1
+            if plan.path == DIRECT_PATH and not slo_met:
+                self.slo_violations += 1
+        return {
+            **plan.to_dict(),
+            "elapsed_ms": round(elapsed_ms, 1),
+            "slo_ms": self.slo_ms,
+            "slo_met": slo_met if plan.path == DIRECT_PATH else None
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        total = sum(self.counts.values())
+        return {
+            "direct": self.counts[DIRECT_PATH],
+            "crew": self.counts[CREW_PATH],
+            "direct_fallbacks_to_crew": self.fallbacks,
+            "llm_free_share": round(self.counts[DIRECT_PATH] / total, 3) if total else 0.0,
+            "slo_ms": self.slo_ms,
+            "slo_violations": self.slo_violations
+        }
+
+
+group_planner = GroupExecutionPlanner(slo_ms=settings.GROUP_DIRECT_SLO_MS)
+register_metrics("group_planner", group_planner.stats)
@@ -1,7 +1,8 @@
 import json
 import os
+import re
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from crewai import Agent, Task, Crew, Process
 from crewai.tools import BaseTool
@@ -10,10 +11,53 @@ from .tools.foursquare_tool import create_foursquare_tool
 from .tools.location_resolver import create_location_resolver_tool
 from .tools.extractor_tool import create_intent_extractor_tool
 from .tools.context_analyzer_tool import create_context_analyzer_tool
+from .tools.gazetteer import get_gazetteer
+from .tools.intent_parser import get_intent_parser
+from .task_graph import TaskGraph
+from ..core.http_client import shared_http_client
+from ..core.llm_cache import get_llm_cache
 from crewai.llm import LLM
 from ..core.config import settings
 
 
+# Raw-query keywords → search term for the speculative search, checked in order
+SPECULATIVE_QUERIES = [
+    (("coffee", "cafe", "café"), "cafe"),
+    (("library", "study", "studying"), "library"),
+    (("pub", "bar", "drinks", "beer", "brewery"), "bar"),
+    (("restaurant", "dinner", "lunch", "food", "eat", "biryani"), "restaurant"),
+    (("park", "walk", "jog"), "park"),
+    (("mall", "shopping"), "mall"),
+    (("gym", "workout"), "gym"),
+]
+
+
+def guess_search_query(user_query: str) -> Optional[str]:
+    """Search term implied by the raw query's keywords, before any LLM has run"""
+    words = set(re.findall(r"[\w']+", user_query.lower()))
+    for keywords, search_query in SPECULATIVE_QUERIES:
+        if words.intersection(keywords):
+            return search_query
+    return None
+
+
+def parse_agent_json(output: str) -> Dict[str, Any]:
+    """Best-effort JSON object from an agent's text output ({} if there is none)"""
+    match = re.search(r"\{.*\}", output or "", re.DOTALL)
+    if not match:
+        return {}
+    try:
+        parsed = json.loads(match.group(0))
+        return parsed if isinstance(parsed, dict) else {}
+    except json.JSONDecodeError:
+        return {}
+
+
+def mentioned_location(intent: Dict[str, Any]) -> Optional[str]:
+    location = intent.get("location")
+    return location.get("mentioned_location") if isinstance(location, dict) else None
+
+
 class SoloModeAgent:
     """
     Main orchestrator for solo mode place recommendations using CrewAI agents.
@@ -51,33 +95,6 @@ class SoloModeAgent:
             llm = llm
         )
         
-        # Location Resolution Agent  
-        self.location_agent = Agent(
-            role="Location Resolution Expert",
-            goal="Convert location references to precise coordinates and resolve geographic queries",
-            backstory="""You are a geographic expert who can resolve any location reference to 
-            precise coordinates. You understand local geography, neighborhoods, and can handle 
-            ambiguous location references by finding the most relevant match.""",
-            verbose=True,
-            allow_delegation=False,
-            llm = llm
-        )
-        
-        # Place Search Agent
-        self.search_agent = Agent(
-            role="Place Discovery Specialist", 
-            goal="Find relevant places using Foursquare API based on user requirements",
-            backstory="""You are an expert at finding places using the Foursquare API. You know 
-            how to craft optimal search queries, apply appropriate filters, and retrieve detailed 
-            information about venues. You understand how to balance different search parameters 
-            to get the best results. CRITICAL: When generating JSON, always quote numeric IDs 
-            as strings to ensure valid JSON format.""",
-            verbose=True,
-            allow_delegation=False, 
-            llm = llm,
-            tools=[self.foursquare_tool]
-        )
-        
         # Recommendation Agent
         self.recommendation_agent = Agent(
             role="Personalized Recommendation Expert",
@@ -91,115 +108,145 @@ class SoloModeAgent:
             llm = llm
         )
     
-    def create_tasks(self, user_query: str, user_location: str = None) -> list:
-        """Create tasks for the crew to execute"""
-        
+    def _run_single_task(self, agent: Agent, task: Task) -> str:
+        """Run one agent/task pair as its own crew (one LLM stage of the task graph)"""
+        crew = Crew(agents=[agent], tasks=[task], verbose=True, process=Process.sequential)
+        return str(crew.kickoff())
+
+    def _resolve_query_location(self, user_query: str, user_location: str = None) -> Dict[str, Any]:
+        """Location stage: explicit coordinates, else a locality named in the query, else the default"""
+        if user_location:
+            return {"coordinates": user_location, "source": "user"}
+        place = get_gazetteer().find_in_text(user_query)
+        if place and place["type"] != "city":
+            lat, lng = place["centroid"]
+            return {"coordinates": f"{lat},{lng}", "source": "gazetteer", "name": place["name"]}
+        return {"coordinates": self.default_location, "source": "default"}
+
+    def _search(self, query: str, coordinates: str, with_details: bool = True) -> str:
+        return self.foursquare_tool._run(action="search", query=query, ll=coordinates, with_details=with_details)
+
+    def _location_agrees(self, intent: Dict[str, Any], location: Dict[str, Any]) -> bool:
+        """Whether the location stage already points at the place the intent mentions"""
+        mentioned = mentioned_location(intent)
+        if not mentioned or location["source"] == "user":
+            return True
+        place = get_gazetteer().lookup(mentioned)
+        return place is not None and place["name"] == location.get("name")
+
+    def extract_intent_llm(self, user_query: str, user_location: str = None) -> Dict[str, Any]:
+        """Intent from the intent agent, through the LLM response cache"""
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        location = user_location or self.default_location
-        
-        # Task 1: Extract Intent
-        intent_task = Task(
-            description=f"""
-            Analyze the user query and extract structured intent information:
-            User Query: "{user_query}"
-            Current Time: {current_time}
-            Default Location: {location}
-            
-            Use the Intent Extractor tool to understand:
-            - What type of places the user wants
-            - Location preferences 
-            - Group context and size
-            - Time constraints
-            - Budget and atmosphere preferences
-            - Any specific requirements or constraints
-            
-            Return the extracted information as structured JSON.
-            """,
-            agent=self.intent_agent,
-            expected_output="JSON object containing structured user intent information"
-        )
-        
-        # Task 2: Resolve Location
-        location_task = Task(
-            description="""
-            Based on the extracted intent, resolve the target location to precise coordinates:
-            - If user mentioned a specific location, resolve it to coordinates
-            - If user wants nearby places, use the default location
-            - Provide location context and details
-            
-            Use the Location Resolver tool to get accurate coordinates.
-            """,
-            agent=self.location_agent,
-            expected_output="Resolved coordinates and location context information",
-            context=[intent_task]
-        )
-        
-        # Task 3: Search Places
-        search_task = Task(
-            description="""
-            Search for places using Foursquare API based on the extracted intent and resolved location:
-            - Use the search query from intent analysis
-            - Apply location coordinates from location resolution
-            - Set appropriate filters based on user preferences
-            - Retrieve place details for top results
-            
-            IMPORTANT: Use the Foursquare Places Search tool to find relevant places.
-            Return ONLY the exact JSON response from the tool with no modifications.
-            
-            CRITICAL: If you generate any JSON yourself, ensure ALL numeric IDs are quoted as strings.
-            For example: "id": "4bf58dd8d48988d175941735" (NOT "id": 4bf58dd8d48988d175941735).
-            Any unquoted numeric values will cause JSON parsing errors.
-            """,
-            agent=self.search_agent,
-            expected_output="JSON array of places from Foursquare tool with properly formatted data",
-            context=[intent_task, location_task]
-        )
-        
-        # Task 4: Generate Recommendations
-        recommendation_task = Task(
-            description="""
-            Analyze the found places against user context and generate intelligent recommendations:
-            - Rank places based on relevance to user intent
-            - Provide detailed explanations for each recommendation
-            - Give timing advice and contextual tips
-            - Consider group composition and special requirements
-            - Explain why each place is suitable for the user's specific needs
-            
-            Use the Context Analyzer tool to provide personalized recommendations.
-            """,
-            agent=self.recommendation_agent,
-            expected_output="Personalized recommendations with explanations and contextual advice",
-            context=[intent_task, location_task, search_task]
-        )
-        
-        return [intent_task, location_task, search_task, recommendation_task]
-    
-    def process_query(self, user_query: str, user_location: str = None) -> Dict[str, Any]:
+
+        def extract():
+            parsed = parse_agent_json(self._run_single_task(self.intent_agent, Task(
+                description=f"""
+                Analyze the user query and extract structured intent information:
+                User Query: "{user_query}"
+                Current Time: {current_time}
+                Default Location: {user_location or self.default_location}
+
+                Return a JSON object with primary_intent, search_query (an optimized
+                Foursquare search term), location.mentioned_location, group_context,
+                time_context, preferences and constraints.
+                """,
+                agent=self.intent_agent,
+                expected_output="JSON object containing structured user intent information"
+            )))
+            return json.dumps(parsed) if parsed else None
+
+        # Keyed on the query alone: the timestamp in the prompt would make every call a miss.
+        # Near-identical queries can differ in locality ("HSR layout" / "BTM layout"); the signature keeps them apart
+        cached = get_llm_cache().cached("solo_intent", user_query, extract,
+                                        signature=get_intent_parser().signature(user_query))
+        return json.loads(cached) if cached else {}
+
+    def build_task_graph(self, user_query: str, user_location: str = None) -> TaskGraph:
         """
-        Process a user query and return personalized place recommendations.
-        
-        Args:
-            user_query: Natural language query from user
-            user_location: Optional user location coordinates (lat,lng)
-            
-        Returns:
-            Dict containing recommendations and analysis
+        Solo pipeline as a DAG instead of a sequential crew:
+
+            intent (rules, else LLM) ──────────────┐
+            location ──> speculative_search ──> search ──> recommendation (LLM)
+
+        Queries the rule-based parser reads with enough confidence skip the
+        intent LLM. For the rest, location and a category search guessed from
+        the raw query run while the intent LLM is still thinking. Once the
+        intent is known the guess is kept if the intent asks for the same
+        search term at the same place, otherwise it is cancelled and `search`
+        runs with the intent's query. The guess is searched without details;
+        they are only fetched for a guess that is kept.
+        """
+        guess = guess_search_query(user_query)
+
+        def intent():
+            parsed = get_intent_parser().parse(user_query, threshold=settings.INTENT_PARSER_CONFIDENCE)
+            if parsed["confidence"] >= settings.INTENT_PARSER_CONFIDENCE:
+                return parsed["intent"]
+            return self.extract_intent_llm(user_query, user_location)
+
+        def location():
+            return self._resolve_query_location(user_query, user_location)
+
+        def speculative_search(location):
+            return self._search(guess, location["coordinates"], with_details=False)
+
+        def keep_speculative(results):
+            intent = results["intent"]
+            search_query = " ".join((intent.get("search_query") or guess).lower().split())
+            return search_query == guess and self._location_agrees(intent, results["location"])
+
+        def search(intent, location, speculative_search):
+            if speculative_search is not None:
+                # Same query and place as the kept guess: the search is a cache hit, only details are fetched
+                return self._search(guess, location["coordinates"])
+            coordinates = location["coordinates"]
+            if not self._location_agrees(intent, location):
+                coordinates = self.location_resolver_tool.extract_coordinates(mentioned_location(intent), self.default_location)
+            return self._search(intent.get("search_query") or guess or user_query, coordinates)
+
+        def recommendation(intent, location, search):
+            return self._run_single_task(self.recommendation_agent, Task(
+                description=f"""
+                Analyze the found places against user context and generate intelligent recommendations:
+                User Query: "{user_query}"
+                Intent: {json.dumps(intent)}
+                Location: {json.dumps(location)}
+                Places found (Foursquare JSON): {search}
+
+                - Rank places based on relevance to user intent
+                - Provide detailed explanations for each recommendation
+                - Give timing advice and contextual tips
+                - Consider group composition and special requirements
+                - Explain why each place is suitable for the user's specific needs
+                """,
+                agent=self.recommendation_agent,
+                expected_output="Personalized recommendations with explanations and contextual advice"
+            ))
+
+        graph = TaskGraph()
+        graph.add("intent", intent)
+        graph.add("location", location)
+        if guess:
+            graph.add("speculative_search", speculative_search, deps=["location"],
+                      confirm_after=["intent", "location"], keep=keep_speculative)
+        else:
+            graph.add("speculative_search", lambda: None)
+        graph.add("search", search, deps=["intent", "location", "speculative_search"])
+        graph.add("recommendation", recommendation, deps=["intent", "location", "search"])
+        return graph
+
+    async def aprocess_query(self, user_query: str, user_location: str = None, on_result=None) -> Dict[str, Any]:
+        """
+        Process a user query through the solo task graph.
+
+        `on_result(stage, result)` is called as each stage finishes.
         """
         try:
-            # Create tasks
-            tasks = self.create_tasks(user_query, user_location)
-            
-            # Create and run crew
-            crew = Crew(
-                agents=[self.intent_agent, self.location_agent, self.search_agent, self.recommendation_agent],
-                tasks=tasks,
-                verbose=True,
-                process=Process.sequential
-            )
-            
-            # Execute the crew
-            result = crew.kickoff()
-            
+            graph = self.build_task_graph(user_query, user_location)
+            results = await graph.run(on_result=on_result)
+            result = results["recommendation"]
+            execution = {"stage_ms": graph.timings, "discarded": graph.discarded}
+
             # Parse the final result
             try:
                 if isinstance(result, str):
@@ -207,7 +254,6 @@ class SoloModeAgent:
                         parsed_result = json.loads(result)
                     except json.JSONDecodeError:
                         # Fix common JSON formatting issues before parsing
-                        import re
                         # Fix unquoted numeric IDs in category objects (global replacement)
                         fixed_result = re.sub(r'"id":\s*([0-9a-fA-F]+)', r'"id": "\1"', result)
                         parsed_result = json.loads(fixed_result)
@@ -218,7 +264,8 @@ class SoloModeAgent:
                     "status": "success",
                     "query": user_query,
                     "timestamp": datetime.now().isoformat(),
-                    "recommendations": parsed_result
+                    "recommendations": parsed_result,
+                    "execution": execution
                 }
                 
             except json.JSONDecodeError:
@@ -227,7 +274,8 @@ class SoloModeAgent:
                     "status": "success",
                     "query": user_query,
                     "timestamp": datetime.now().isoformat(),
-                    "response": str(result)
+                    "response": str(result),
+                    "execution": execution
                 }
                 
         except Exception as e:
@@ -237,6 +285,19 @@ class SoloModeAgent:
                 "error": str(e),
                 "timestamp": datetime.now().isoformat()
             }
+
+    def process_query(self, user_query: str, user_location: str = None) -> Dict[str, Any]:
+        """
+        Process a user query and return personalized place recommendations.
+        
+        Args:
+            user_query: Natural language query from user
+            user_location: Optional user location coordinates (lat,lng)
+            
+        Returns:
+            Dict containing recommendations and analysis
+        """
+        return shared_http_client.run_sync(self.aprocess_query(user_query, user_location))
     
     def get_place_details(self, fsq_place_id: str, fields: list = None) -> Dict[str, Any]:
         """Get detailed information about a specific place"""
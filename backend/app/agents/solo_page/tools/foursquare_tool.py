@@ -635,13 +635,17 @@
 # def create_foursquare_tool():
 #     return FoursquareTool()
 
-import requests
 import json
-import time
 from typing import Dict, List, Optional
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field, PrivateAttr
 
+from app.agents.tools.foursquare_client import FoursquareClient, get_foursquare_client
+
+
+# Fields fetched per result when searching with details
+DETAIL_FIELDS = ["hours", "photos", "contact", "social_media", "features", "tips"]
+
 
 class FoursquareSearchParams(BaseModel):
     query: str = Field(description="Search query (e.g., 'restaurant', 'coffee', 'library')")
@@ -659,51 +663,20 @@ class FoursquareTool(BaseTool):
     1. Search for places by query and location
     2. Get detailed information about specific places
     3. Filter by categories, price, distance, etc.
+    4. Fetch details (hours, photos, contact, ...) for the top results in one step with with_details=True
     
     Use this tool when you need to find restaurants, cafes, libraries, entertainment venues, etc.
     """
 
     # Private attributes (not part of Pydantic validation)
-    _api_key: str = PrivateAttr()
-    _headers: dict = PrivateAttr()
-    _base_url: str = PrivateAttr(default="https://places-api.foursquare.com")
+    _client: FoursquareClient = PrivateAttr()
 
     def __init__(self):
         super().__init__()
-        import os
-        from dotenv import load_dotenv
-        load_dotenv()
-
-        # Load key (use env var if available, fallback otherwise)
-        self._api_key = os.getenv(
-            "FSQ_API_KEY")
-
-
-        self._headers = {
-            "accept": "application/json",
-            "X-Places-Api-Version": "2025-06-17",
-            "authorization": f"Bearer {self._api_key}"
-        }
-
-    def _make_request(self, url: str, params: Dict) -> Dict:
-        """Make API request with basic rate-limit handling"""
-        try:
-            response = requests.get(url, headers=self._headers, params=params)
-            if response.status_code == 429:  # Too Many Requests
-                time.sleep(1)
-                response = requests.get(url, headers=self._headers, params=params)
-
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {"error": f"API request failed with status {response.status_code}"}
-        except Exception as e:
-            return {"error": f"Request failed: {str(e)}"}
-
-    def search_places(self, search_params: FoursquareSearchParams) -> Dict:
-        """Search for places using Foursquare API"""
-        url = f"{self._base_url}/places/search"
+        # Shared client: pooled keep-alive connections across all tool instances
+        self._client = get_foursquare_client()
 
+    def _build_search_params(self, search_params: FoursquareSearchParams) -> Dict:
         params = {
             "query": search_params.query,
             "ll": search_params.ll,
@@ -717,17 +690,41 @@ class FoursquareTool(BaseTool):
         if search_params.price:
             params["price"] = search_params.price
 
-        return self._make_request(url, params)
+        return params
+
+    def search_places(self, search_params: FoursquareSearchParams) -> Dict:
+        """Search for places using Foursquare API"""
+        return self._client.search(self._build_search_params(search_params))
+
+    async def asearch_places(self, search_params: FoursquareSearchParams) -> Dict:
+        """Async variant of search_places"""
+        return await self._client.asearch(self._build_search_params(search_params))
+
+    def search_places_with_details(self, search_params: FoursquareSearchParams, fields: List[str] = None) -> Dict:
+        """Search, then fetch details for every result in parallel (partial on deadline)"""
+        if fields is None:
+            fields = DETAIL_FIELDS
+        return self._client.search_with_details(self._build_search_params(search_params), fields)
+
+    async def asearch_places_with_details(self, search_params: FoursquareSearchParams, fields: List[str] = None) -> Dict:
+        """Async variant of search_places_with_details"""
+        if fields is None:
+            fields = DETAIL_FIELDS
+        return await self._client.asearch_with_details(self._build_search_params(search_params), fields)
 
     def get_place_details(self, fsq_place_id: str, fields: List[str] = None) -> Dict:
         """Get detailed information about a specific place"""
         if fields is None:
             fields = ["name", "location", "contact", "hours", "rating", "price", "social_media", "photos"]
 
-        url = f"{self._base_url}/places/{fsq_place_id}"
-        params = {"fields": ",".join(fields)}
+        return self._client.place_details(fsq_place_id, fields)
+
+    async def aget_place_details(self, fsq_place_id: str, fields: List[str] = None) -> Dict:
+        """Async variant of get_place_details"""
+        if fields is None:
+            fields = ["name", "location", "contact", "hours", "rating", "price", "social_media", "photos"]
 
-        return self._make_request(url, params)
+        return await self._client.aplace_details(fsq_place_id, fields)
 
     def _run(self, **kwargs) -> str:
         """Main execution method for the tool"""
@@ -744,7 +741,10 @@ class FoursquareTool(BaseTool):
                 price=kwargs.get("price")
             )
 
-            result = self.search_places(search_params)
+            if kwargs.get("with_details"):
+                result = self.search_places_with_details(search_params, kwargs.get("detail_fields"))
+            else:
+                result = self.search_places(search_params)
             if "error" in result:
                 return f"Search failed: {result['error']}"
 
@@ -789,6 +789,10 @@ class FoursquareTool(BaseTool):
                         "timezone": place.get("timezone", ""),
                         "website": place.get("website", "")
                     }
+                    # Detail fields merged in by the two-stage search
+                    for field in DETAIL_FIELDS:
+                        if field in place:
+                            formatted_place[field] = place[field]
                     formatted_results.append(formatted_place)
 
                 return json.dumps(formatted_results, indent=2, ensure_ascii=False)
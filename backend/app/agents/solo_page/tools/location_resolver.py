@@ -383,14 +383,16 @@
 # def create_location_resolver_tool():
 #     return LocationResolverTool()
 
-import requests
 import json
 from typing import Dict, Optional
 from crewai.tools import BaseTool
 from geopy.geocoders import Nominatim
-import time
 from pydantic import PrivateAttr
 
+from app.agents.tools.foursquare_client import FoursquareClient, get_foursquare_client
+from app.agents.tools.gazetteer import get_gazetteer
+from app.agents.tools.geocode_cache import GeocodeCache, get_geocode_cache
+
 
 class LocationResolverTool(BaseTool):
     name: str = "Location Resolver"
@@ -405,38 +407,22 @@ class LocationResolverTool(BaseTool):
     """
 
     # Private attributes
-    _api_key: str = PrivateAttr()
-    _headers: dict = PrivateAttr()
+    _client: FoursquareClient = PrivateAttr()
     _geolocator: Nominatim = PrivateAttr()
+    _cache: GeocodeCache = PrivateAttr()
 
     def __init__(self):
         super().__init__()
-        import os
-        self._api_key = os.getenv("FSQ_API_KEY")
-        self._headers = {
-            "accept": "application/json",
-            "X-Places-Api-Version": "2025-06-17",
-            "authorization": f"Bearer {self._api_key}"
-        }
+        self._client = get_foursquare_client()
         self._geolocator = Nominatim(user_agent="coordinate_app")
+        self._cache = get_geocode_cache()
 
     def resolve_with_foursquare(self, location_query: str) -> Dict:
         """Use Foursquare geotagging API to resolve location"""
-        url = "https://places-api.foursquare.com/geotagging/candidates"
-        params = {"query": location_query, "types": "neighborhood,locality,region"}
-
-        try:
-            response = requests.get(url, headers=self._headers, params=params)
-            if response.status_code == 429:
-                time.sleep(1)
-                response = requests.get(url, headers=self._headers, params=params)
-
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {"error": f"Foursquare geotagging failed with status {response.status_code}"}
-        except Exception as e:
-            return {"error": f"Foursquare request failed: {str(e)}"}
+        result = self._client.geotag(location_query, types="neighborhood,locality,region")
+        if "error" in result and "status_code" in result:
+            return {"error": f"Foursquare geotagging failed with status {result['status_code']}"}
+        return result
 
     def resolve_with_nominatim(self, location_query: str) -> Optional[Dict]:
         """Fallback to Nominatim geocoding"""
@@ -458,6 +444,17 @@ class LocationResolverTool(BaseTool):
         if not location_text or location_text.strip() == "":
             return default_location
 
+        # Known localities resolve offline
+        place = get_gazetteer().lookup(location_text)
+        if place:
+            lat, lng = place["centroid"]
+            return f"{lat},{lng}"
+
+        cached = self._cache.get(location_text)
+        if cached is not None:
+            lat, lng = cached
+            return default_location if lat is None else f"{lat},{lng}"
+
         # Try Foursquare first
         fsq_result = self.resolve_with_foursquare(location_text)
         if "error" not in fsq_result and "candidates" in fsq_result and fsq_result["candidates"]:
@@ -465,27 +462,39 @@ class LocationResolverTool(BaseTool):
             lat = candidate.get("latitude")
             lng = candidate.get("longitude")
             if lat and lng:
+                self._cache.set(location_text, lat, lng, source="foursquare")
                 return f"{lat},{lng}"
 
         # Fallback to Nominatim
         nom_result = self.resolve_with_nominatim(location_text)
         if nom_result and "error" not in nom_result:
+            self._cache.set(location_text, nom_result["latitude"], nom_result["longitude"], source="nominatim")
             return f"{nom_result['latitude']},{nom_result['longitude']}"
 
+        # Only cache "not found" when no lookup errored; a timeout says nothing about the place
+        if "error" not in fsq_result and not nom_result:
+            self._cache.set_negative(location_text)
+
         # Return default if all fails
         return default_location
 
     def get_location_context(self, coordinates: str) -> Dict:
         """Get context about a location from coordinates"""
         try:
-            lat, lng = coordinates.split(",")
+            lat, lng = map(float, coordinates.split(","))
+            cached = self._cache.get_reverse(lat, lng)
+            if cached is not None:
+                return {**cached, "coordinates": coordinates}
+
             location = self._geolocator.reverse(f"{lat},{lng}")
             if location:
-                return {
+                context = {
                     "formatted_address": location.address,
                     "coordinates": coordinates,
                     "components": location.raw.get("address", {})
                 }
+                self._cache.set_reverse(lat, lng, context)
+                return context
         except Exception:
             pass
 
@@ -0,0 +1,157 @@
+import asyncio
+import inspect
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+from app.core.executor import get_agent_executor
+
+
+class TaskNode:
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        deps: Sequence[str] = (),
+        confirm_after: Sequence[str] = (),
+        keep: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.confirm_after = tuple(confirm_after)
+        self.keep = keep
+
+    @property
+    def speculative(self) -> bool:
+        return self.keep is not None
+
+
+class TaskGraph:
+    """
+    Runs a DAG of stages concurrently: each stage starts as soon as the
+    stages it depends on have produced results, and is called with those
+    results as keyword arguments. Plain functions run on the shared agent
+    executor, coroutine functions on the event loop.
+
+    A speculative stage starts early on partial information and is confirmed
+    by `keep(results)` once its `confirm_after` stages are done. If `keep`
+    says no, the stage is cancelled (or its finished result thrown away) and
+    dependents receive None in its place. Dependents never see a speculative
+    result before it is confirmed. A stage running in a thread cannot be
+    interrupted; its result is just discarded.
+
+    `on_result(name, result)` is called as each stage completes, so results
+    can be streamed to a client before the whole graph finishes.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, TaskNode] = {}
+        self.timings: Dict[str, float] = {}
+        self.discarded: List[str] = []
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        deps: Iterable[str] = (),
+        confirm_after: Iterable[str] = (),
+        keep: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> "TaskGraph":
+        if name in self.nodes:
+            raise ValueError(f"Duplicate task {name!r}")
+        self.nodes[name] = TaskNode(name, fn, tuple(deps), tuple(confirm_after), keep)
+        return self
+
+    async def _call(self, node: TaskNode, results: Dict[str, Any]) -> Any:
+        kwargs = {dep: results[dep] for dep in node.deps}
+        started = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(node.fn):
+                return await node.fn(**kwargs)
+            return await get_agent_executor().run(node.fn, **kwargs)
+        finally:
+            self.timings[node.name] = round((time.perf_counter() - started) * 1000, 1)
+
+    async def run(
+        self,
+        inputs: Optional[Dict[str, Any]] = None,
+        on_result: Optional[Callable[[str, Any], Optional[Awaitable[None]]]] = None
+    ) -> Dict[str, Any]:
+        """Run every stage; returns {stage name: result} (plus `inputs`)"""
+        results: Dict[str, Any] = dict(inputs or {})
+        tasks: Dict[asyncio.Task, str] = {}
+        started = set()
+        settled = set(results)   # stages whose result is final
+        confirmed = set()        # speculative stages that passed `keep`
+        self.timings = {}
+        self.discarded = []
+
+        def ready(node: TaskNode) -> bool:
+            for dep in node.deps:
+                if dep not in settled:
+                    return False
+                if dep in self.nodes and self.nodes[dep].speculative and dep not in confirmed and dep not in self.discarded:
+                    return False
+            return True
+
+        def cancel(name: str):
+            for task, task_name in tasks.items():
+                if task_name == name and not task.done():
+                    task.cancel()
+
+        async def emit(name: str):
+            if on_result is not None:
+                maybe_awaitable = on_result(name, results[name])
+                if inspect.isawaitable(maybe_awaitable):
+                    await maybe_awaitable
+
+        try:
+            while True:
+                # Confirm or discard speculative stages whose checkpoints are done
+                for node in self.nodes.values():
+                    if (node.speculative and node.name not in confirmed and node.name not in self.discarded
+                            and all(dep in settled for dep in node.confirm_after)):
+                        if node.keep(results):
+                            confirmed.add(node.name)
+                            if node.name in settled:
+                                await emit(node.name)
+                        else:
+                            cancel(node.name)
+                            self.discarded.append(node.name)
+                            results[node.name] = None
+                            settled.add(node.name)
+
+                for node in self.nodes.values():
+                    if node.name not in started and node.name not in settled and ready(node):
+                        started.add(node.name)
+                        tasks[asyncio.ensure_future(self._call(node, results))] = node.name
+
+                running = [t for t in tasks if not t.done()]
+                if not running:
+                    missing = [name for name in self.nodes if name not in settled]
+                    if missing:
+                        raise RuntimeError(f"Task graph cannot make progress; unresolved: {missing}")
+                    return results
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks[task]
+                    if task.cancelled() or name in self.discarded:
+                        continue
+                    if task.exception() is not None:
+                        if not self.nodes[name].speculative:
+                            raise task.exception()
+                        # A failed guess is just a guess not taken
+                        self.discarded.append(name)
+                        results[name] = None
+                        settled.add(name)
+                        continue
+                    results[name] = task.result()
+                    settled.add(name)
+                    # Speculative results are only streamed once confirmed
+                    if not self.nodes[name].speculative or name in confirmed:
+                        await emit(name)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
@@ -0,0 +1,169 @@
+import asyncio
+import math
+from itertools import combinations
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from app.agents.tools.foursquare_client import FoursquareClient, get_foursquare_client
+from app.core.config import settings
+from app.core.geo import EARTH_RADIUS_KM, haversine_km, haversine_matrix
+from app.core.http_client import shared_http_client
+
+# Anchors closer than this to an already chosen anchor add little but cost a search
+MIN_ANCHOR_SPACING_KM = 0.75
+
+
+def _offset(lat: float, lng: float, north_km: float, east_km: float) -> Tuple[float, float]:
+    dlat = math.degrees(north_km / EARTH_RADIUS_KM)
+    dlng = math.degrees(east_km / (EARTH_RADIUS_KM * math.cos(math.radians(lat))))
+    return lat + dlat, lng + dlng
+
+
+def generate_anchors(
+    fair_point: Tuple[float, float],
+    member_coords: Sequence[Tuple[float, float]],
+    hex_km: float,
+    max_anchors: int
+) -> List[Tuple[float, float]]:
+    """
+    Search anchors in priority order: the fair point, pairwise midpoints of
+    members (nearest to the fair point first), then a hex ring of `hex_km`
+    around the fair point. Anchors within MIN_ANCHOR_SPACING_KM of an earlier
+    one are skipped; at most `max_anchors` are returned.
+    """
+    midpoints = [((a[0] + b[0]) / 2, (a[1] + b[1]) / 2) for a, b in combinations(member_coords, 2)]
+    midpoints.sort(key=lambda p: (haversine_km(*fair_point, *p), p))
+    hex_ring = [
+        _offset(*fair_point, hex_km * math.cos(math.radians(angle)), hex_km * math.sin(math.radians(angle)))
+        for angle in range(0, 360, 60)
+    ]
+
+    anchors: List[Tuple[float, float]] = []
+    for candidate in [fair_point, *midpoints, *hex_ring]:
+        if len(anchors) >= max_anchors:
+            break
+        if anchors and haversine_matrix([candidate], anchors).min() < MIN_ANCHOR_SPACING_KM:
+            continue
+        anchors.append(candidate)
+    return anchors
+
+
+async def agenerate_candidates(
+    params: Dict[str, Any],
+    anchors: Sequence[Tuple[float, float]],
+    budget: Optional[float] = None,
+    client: Optional[FoursquareClient] = None
+) -> Dict[str, Any]:
+    """
+    Run one search per anchor concurrently and merge the results into a
+    single pool deduplicated by fsq_place_id (first anchor to find a venue
+    wins; anchors are in priority order).
+
+    Searches still running after `budget` seconds are cancelled and left out.
+    The number of searches is bounded by the anchors given, which is how the
+    caller caps API credit spend.
+    """
+    client = client or get_foursquare_client()
+    budget = settings.FSQ_GROUP_SEARCH_BUDGET if budget is None else budget
+
+    tasks = [
+        asyncio.ensure_future(client.asearch({**params, "ll": f"{lat},{lng}"}))
+        for lat, lng in anchors
+    ]
+    if not tasks:
+        return {"venues": [], "errors": [], "anchors_searched": 0, "timed_out": 0}
+
+    _, pending = await asyncio.wait(tasks, timeout=budget)
+    for task in pending:
+        task.cancel()
+
+    venues: Dict[str, Dict] = {}
+    errors = []
+    for index, task in enumerate(tasks):
+        if task in pending:
+            continue
+        if task.exception() is not None:
+            errors.append({"error": str(task.exception())})
+            continue
+        result = task.result()
+        if "error" in result:
+            errors.append(result)
+            continue
+        for venue in result.get("results", []):
+            venue_id = venue.get("fsq_place_id") or venue.get("fsq_id")
+            if venue_id and venue_id not in venues:
+                venues[venue_id] = {**venue, "anchor": index}
+
+    return {
+        "venues": list(venues.values()),
+        "errors": errors,
+        "anchors_searched": len(tasks),
+        "timed_out": len(pending)
+    }
+
+
+async def aiter_candidate_batches(
+    params: Dict[str, Any],
+    anchors: Sequence[Tuple[float, float]],
+    budget: Optional[float] = None,
+    client: Optional[FoursquareClient] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of agenerate_candidates: yields one batch per anchor as
+    soon as its search finishes ({"anchor", "venues", "error", "timed_out"}),
+    with venues already seen in earlier batches left out.
+
+    Searches still running at the budget are cancelled and reported as timed
+    out. Closing the generator early (or cancelling the task iterating it)
+    cancels every search still in flight.
+    """
+    client = client or get_foursquare_client()
+    budget = settings.FSQ_GROUP_SEARCH_BUDGET if budget is None else budget
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + budget
+
+    tasks = {
+        asyncio.ensure_future(client.asearch({**params, "ll": f"{lat},{lng}"})): index
+        for index, (lat, lng) in enumerate(anchors)
+    }
+    seen = set()
+    pending = set(tasks)
+    try:
+        while pending:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=tasks.get):
+                batch = {"anchor": tasks[task], "venues": [], "error": None, "timed_out": False}
+                if task.exception() is not None:
+                    batch["error"] = {"error": str(task.exception())}
+                elif "error" in task.result():
+                    batch["error"] = task.result()
+                else:
+                    for venue in task.result().get("results", []):
+                        venue_id = venue.get("fsq_place_id") or venue.get("fsq_id")
+                        if venue_id and venue_id not in seen:
+                            seen.add(venue_id)
+                            batch["venues"].append({**venue, "anchor": tasks[task]})
+                yield batch
+        for task in sorted(pending, key=tasks.get):
+            yield {"anchor": tasks[task], "venues": [], "error": None, "timed_out": True}
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def generate_candidates(
+    params: Dict[str, Any],
+    fair_point: Tuple[float, float],
+    member_coords: Sequence[Tuple[float, float]],
+    budget: Optional[float] = None,
+    max_searches: Optional[int] = None
+) -> Dict[str, Any]:
+    """Blocking entry point: build anchors around the fair point and search them all"""
+    max_searches = settings.FSQ_GROUP_MAX_SEARCHES if max_searches is None else max_searches
+    anchors = generate_anchors(fair_point, member_coords, settings.FSQ_GROUP_HEX_KM, max_searches)
+    result = shared_http_client.run_sync(agenerate_candidates(params, anchors, budget))
+    result["anchors"] = [{"lat": lat, "lng": lng} for lat, lng in anchors]
+    return result
@@ -0,0 +1,304 @@
+import asyncio
+from typing import Dict, Hashable, List, Optional
+
+import httpx
+
+from app.agents.tools.place_details_store import PlaceDetailsStore
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.geo import geohash_encode, parse_ll
+from app.core.http_client import shared_http_client
+from app.core.metrics import register_metrics
+from app.core.rate_limit import CircuitBreaker, RateLimiter, backoff_delay, parse_retry_after
+from app.core.singleflight import SingleFlight
+
+
+class FoursquareClient:
+    """
+    Thin Foursquare Places API client shared by every Foursquare caller
+    (FoursquareTool, FoursquareGroupTool, LocationResolverTool).
+
+    All requests go through the shared pooled HTTP client, so repeated
+    searches and detail lookups reuse warm keep-alive / HTTP/2 connections
+    instead of paying a new TCP+TLS handshake each time.
+
+    Place searches are cached (TTL + LRU) on a key whose `ll` is snapped to
+    a geohash cell, so nearby requests for the same query reuse one response
+    and don't spend Foursquare credits. Place details go through a
+    PlaceDetailsStore that only fetches fields it doesn't already hold.
+    Cached results are shared: treat them as read-only.
+
+    Detail lookups for several places fan out concurrently under a global
+    in-flight limit and a per-request deadline (`aplace_details_many`).
+
+    Every upstream call first takes a token from the process-wide rate
+    limiter. A 429 pauses the whole bucket for a jittered Retry-After before
+    retrying, and exhausted credits open a circuit breaker so further calls
+    fail fast instead of burning through retries.
+
+    Identical searches, detail lookups and geotagging calls that are in flight
+    at the same time share one upstream request (single-flight).
+
+    The `_`-prefixed coroutines run on the shared client loop. Every `a*`
+    coroutine hops there and can be awaited from any event loop; the plain
+    methods are the blocking facade used by CrewAI tool entry points.
+    Errors are returned as {"error": ...} dicts, matching the tools' contract.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        self.api_key = api_key or settings.FSQ_API_KEY
+        self.base_url = base_url or settings.FSQ_BASE_URL
+        self.headers = {
+            "accept": "application/json",
+            "X-Places-Api-Version": settings.FSQ_API_VERSION,
+            "authorization": f"Bearer {self.api_key}"
+        }
+        self.search_cache = TTLCache(
+            maxsize=settings.FSQ_SEARCH_CACHE_SIZE,
+            ttl=settings.FSQ_SEARCH_CACHE_TTL
+        )
+        self.details_store = PlaceDetailsStore(
+            fetch=self._fetch_place_details,
+            maxsize=settings.FSQ_DETAILS_CACHE_SIZE
+        )
+        # Created lazily on the client loop (asyncio primitives bind to a loop)
+        self._details_semaphore: Optional[asyncio.Semaphore] = None
+        self.rate_limiter = RateLimiter(
+            rate=settings.FSQ_RATE_LIMIT_RPS,
+            burst=settings.FSQ_RATE_LIMIT_BURST,
+            per_caller_rate=settings.FSQ_RATE_LIMIT_PER_CALLER_RPS,
+            per_caller_burst=settings.FSQ_RATE_LIMIT_PER_CALLER_BURST,
+            queue_timeout=settings.FSQ_RATE_LIMIT_QUEUE_TIMEOUT
+        )
+        self.credits_breaker = CircuitBreaker(cooldown=settings.FSQ_CREDITS_COOLDOWN)
+        self.inflight = SingleFlight()
+
+    async def _request(self, path: str, params: Dict) -> Dict:
+        """Make API request on the client loop through the shared rate limiter"""
+        if not self.credits_breaker.allow():
+            return {
+                "error": "API request failed with status 429",
+                "status_code": 429,
+                "message": self.credits_breaker.reason,
+                "circuit_open": True
+            }
+
+        # Only the half-open probe's outcome decides the breaker; it must never leave it half open
+        probe = self.credits_breaker.state == "half_open"
+        try:
+            return await self._request_with_retries(path, params)
+        finally:
+            if probe:
+                self.credits_breaker.release_probe()
+
+    async def _request_with_retries(self, path: str, params: Dict) -> Dict:
+        url = f"{self.base_url}{path}"
+        for attempt in range(settings.FSQ_MAX_RETRIES + 1):
+            if not await self.rate_limiter.acquire():
+                return {
+                    "error": "Rate limit queue timeout",
+                    "status_code": 429,
+                    "message": "Too many queued Foursquare requests"
+                }
+
+            try:
+                response = await shared_http_client.client.get(url, headers=self.headers, params=params)
+            except httpx.HTTPError as e:
+                self.credits_breaker.record_failure()
+                return {"error": f"Request failed: {str(e)}"}
+
+            if response.status_code == 200:
+                try:
+                    data = response.json()
+                except ValueError as e:
+                    self.credits_breaker.record_failure()
+                    return {
+                        "error": "Invalid response from Foursquare",
+                        "status_code": response.status_code,
+                        "message": str(e)
+                    }
+                self.credits_breaker.record_success()
+                return data
+
+            error = self._error_from_response(response)
+            if response.status_code != 429:
+                self.credits_breaker.record_failure()
+                return error
+
+            if "credits" in error["message"].lower():
+                self.credits_breaker.open(error["message"])
+                return error
+
+            if attempt < settings.FSQ_MAX_RETRIES:
+                # Too Many Requests: hold every caller back, then queue for a retry
+                delay = backoff_delay(attempt, parse_retry_after(response.headers.get("Retry-After")))
+                self.rate_limiter.bucket.pause(delay)
+                self.rate_limiter.retries += 1
+
+        return error
+
+    def _error_from_response(self, response: httpx.Response) -> Dict:
+        message = ""
+        try:
+            message = response.json().get("message", "")
+        except Exception:
+            pass
+        return {
+            "error": f"API request failed with status {response.status_code}",
+            "status_code": response.status_code,
+            "message": message
+        }
+
+    async def _fetch_details_many(self, fsq_place_ids: List[str], fields: List[str], deadline: float) -> Dict[str, Dict]:
+        """Fan out detail lookups; return whatever finished before the deadline"""
+        if self._details_semaphore is None:
+            self._details_semaphore = asyncio.Semaphore(settings.FSQ_DETAILS_MAX_IN_FLIGHT)
+        semaphore = self._details_semaphore
+
+        async def fetch_one(fsq_place_id: str):
+            async with semaphore:
+                return fsq_place_id, await self.details_store.get(fsq_place_id, fields)
+
+        tasks = [asyncio.ensure_future(fetch_one(pid)) for pid in dict.fromkeys(fsq_place_ids)]
+        if not tasks:
+            return {}
+
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+
+        details = {}
+        for task in done:
+            if task.exception() is not None:
+                continue
+            fsq_place_id, result = task.result()
+            if "error" not in result:
+                details[fsq_place_id] = result
+        return details
+
+    def _search_cache_key(self, params: Dict) -> Hashable:
+        """Cache key for a search: all params, with `ll` quantized to a geohash cell"""
+        key_params = dict(params)
+        ll = key_params.get("ll")
+        if ll:
+            try:
+                lat, lng = parse_ll(ll)
+                key_params["ll"] = geohash_encode(lat, lng, settings.FSQ_SEARCH_CACHE_GEOHASH_PRECISION)
+            except ValueError:
+                pass
+        if isinstance(key_params.get("query"), str):
+            key_params["query"] = " ".join(key_params["query"].lower().split())
+        return tuple(sorted((k, str(v)) for k, v in key_params.items() if v is not None))
+
+    async def _search(self, params: Dict) -> Dict:
+        key = self._search_cache_key(params)
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = await self.inflight.do(("search", key), lambda: self._request("/places/search", params))
+        if "error" not in result:
+            self.search_cache.set(key, result)
+        return result
+
+    async def _fetch_place_details(self, fsq_place_id: str, fields: List[str]) -> Dict:
+        return await self.inflight.do(
+            ("details", fsq_place_id, tuple(fields)),
+            lambda: self._request(f"/places/{fsq_place_id}", {"fields": ",".join(fields)})
+        )
+
+    async def _search_with_details(self, params: Dict, fields: List[str], top_n: Optional[int], deadline: float) -> Dict:
+        result = await self._search(params)
+        if "error" in result:
+            return result
+
+        places = result.get("results", [])
+        top = places[:top_n] if top_n else places
+        ids = [p.get("fsq_place_id") for p in top if p.get("fsq_place_id")]
+        details = await self._fetch_details_many(ids, fields, deadline)
+
+        enriched = [{**place, **details.get(place.get("fsq_place_id"), {})} for place in places]
+        return {**result, "results": enriched, "partial_details": len(details) < len(ids)}
+
+    async def _geotag(self, query: str, types: str) -> Dict:
+        normalized = " ".join(query.lower().split())
+        return await self.inflight.do(
+            ("geotag", normalized, types),
+            lambda: self._request("/geotagging/candidates", {"query": query, "types": types})
+        )
+
+    # --- async API ---
+
+    async def arequest(self, path: str, params: Dict) -> Dict:
+        return await shared_http_client.run_async(self._request(path, params))
+
+    async def asearch(self, params: Dict) -> Dict:
+        """Search places (`/places/search`), served from the search cache when possible"""
+        return await shared_http_client.run_async(self._search(params))
+
+    async def aplace_details(self, fsq_place_id: str, fields: List[str]) -> Dict:
+        """Get details for one place (`/places/{fsq_place_id}`), via the details store"""
+        return await shared_http_client.run_async(self.details_store.get(fsq_place_id, fields))
+
+    async def aplace_details_many(self, fsq_place_ids: List[str], fields: List[str], deadline: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        Get details for several places concurrently.
+
+        Returns {fsq_place_id: details} for the lookups that succeeded within
+        `deadline` seconds; slower or failed lookups are simply left out.
+        """
+        deadline = settings.FSQ_DETAILS_DEADLINE if deadline is None else deadline
+        return await shared_http_client.run_async(self._fetch_details_many(fsq_place_ids, fields, deadline))
+
+    async def asearch_with_details(self, params: Dict, fields: List[str], top_n: Optional[int] = None, deadline: Optional[float] = None) -> Dict:
+        """
+        Two-stage search: `/places/search`, then details for the top results in parallel.
+
+        Each of the top `top_n` results is merged with its details. The response
+        carries `partial_details: True` when some lookups missed the deadline.
+        """
+        deadline = settings.FSQ_DETAILS_DEADLINE if deadline is None else deadline
+        return await shared_http_client.run_async(self._search_with_details(params, fields, top_n, deadline))
+
+    async def ageotag(self, query: str, types: str = "neighborhood,locality,region") -> Dict:
+        """Resolve a location string to candidates (`/geotagging/candidates`)"""
+        return await shared_http_client.run_async(self._geotag(query, types))
+
+    # --- sync facade ---
+
+    def request(self, path: str, params: Dict) -> Dict:
+        return shared_http_client.run_sync(self._request(path, params))
+
+    def search(self, params: Dict) -> Dict:
+        return shared_http_client.run_sync(self.asearch(params))
+
+    def place_details(self, fsq_place_id: str, fields: List[str]) -> Dict:
+        return shared_http_client.run_sync(self.aplace_details(fsq_place_id, fields))
+
+    def place_details_many(self, fsq_place_ids: List[str], fields: List[str], deadline: Optional[float] = None) -> Dict[str, Dict]:
+        return shared_http_client.run_sync(self.aplace_details_many(fsq_place_ids, fields, deadline))
+
+    def search_with_details(self, params: Dict, fields: List[str], top_n: Optional[int] = None, deadline: Optional[float] = None) -> Dict:
+        return shared_http_client.run_sync(self.asearch_with_details(params, fields, top_n, deadline))
+
+    def geotag(self, query: str, types: str = "neighborhood,locality,region") -> Dict:
+        return shared_http_client.run_sync(self.ageotag(query, types))
+
+
+_foursquare_client: Optional[FoursquareClient] = None
+
+
+def get_foursquare_client() -> FoursquareClient:
+    """Get or create the process-wide Foursquare client"""
+    global _foursquare_client
+    if _foursquare_client is None:
+        _foursquare_client = FoursquareClient()
+        register_metrics("foursquare_search_cache", _foursquare_client.search_cache.stats)
+        register_metrics("foursquare_place_details", _foursquare_client.details_store.stats)
+        register_metrics("foursquare_rate_limit", lambda: {
+            **_foursquare_client.rate_limiter.stats(),
+            "credits_circuit": _foursquare_client.credits_breaker.state,
+            "credits_circuit_rejected": _foursquare_client.credits_breaker.rejected
+        })
+        register_metrics("foursquare_singleflight", _foursquare_client.inflight.stats)
+    return _foursquare_client
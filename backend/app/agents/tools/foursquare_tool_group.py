@@ -1,13 +1,14 @@
 import os
-import requests
 import json
-import statistics
 from crewai.tools import BaseTool
-from app.agents.tools.foursquare_tool import create_foursquare_tool, FoursquareSearchParams
+from app.agents.tools.candidate_generator import aiter_candidate_batches, generate_anchors, generate_candidates
+from app.agents.tools.location_resolver import compute_fair_coordinates, member_weight
+from app.core.config import settings
+from app.core.geo import haversine_km
 
 class FoursquareGroupTool(BaseTool):
     name: str = "FoursquareGroupTool"
-    description: str = "Find venues fairly for group members around median coords using Foursquare Places API"
+    description: str = "Find venues fairly for group members by searching around their geometric median, pairwise midpoints and nearby anchors using Foursquare Places API"
 
     def _run(self, members_data: str, intent_json: str = None, meeting_time: str = None) -> str:
         try:
@@ -21,118 +22,93 @@ class FoursquareGroupTool(BaseTool):
             intent = {}
 
         # --- compute fair coords ---
-        lats, lngs = [], []
+        coords, weights = [], []
         for m in members:
             if "location" in m and "," in str(m["location"]):
                 try:
                     lat, lng = map(float, m["location"].split(","))
-                    lats.append(lat)
-                    lngs.append(lng)
+                    coords.append((lat, lng))
+                    weights.append(member_weight(m))
                 except:
                     pass
-        if lats and lngs:
-            fair_lat = statistics.median(lats)
-            fair_lng = statistics.median(lngs)
+        if coords:
+            fair_lat, fair_lng = compute_fair_coordinates(coords, weights)
         else:
             fair_lat, fair_lng = 12.9716, 77.5946  # default Bangalore
 
         # --- use search_query if provided ---
         query = intent.get("search_query") or "restaurant, cafe"
 
-        url = "https://places-api.foursquare.com/places/search"
-        headers = {
-            "Authorization": f"Bearer {os.getenv('FSQ_API_KEY')}",
-            "accept": "application/json",
-            "X-Places-Api-Version": "2025-06-17"
-        }
-        params = {
-            "ll": f"{fair_lat},{fair_lng}",
+        return json.dumps(self._search_around((fair_lat, fair_lng), coords, query))
+
+    @staticmethod
+    def _search_params(query: str) -> dict:
+        return {
             "query": query,
-            "radius": 5000,
-            "limit": 5,
-            "fields": "fsq_id,name,categories,location,geocodes,distance,hours,rating,price,timezone"
+            "radius": settings.FSQ_GROUP_ANCHOR_RADIUS,
+            "limit": settings.FSQ_GROUP_ANCHOR_LIMIT,
+            "fields": "fsq_place_id,fsq_id,name,categories,location,geocodes,distance,hours,rating,price,timezone"
         }
 
+    async def asearch_venue_batches(self, fair_point: tuple, member_coords: list, query: str):
+        """Same anchors as _search_around, but yields each anchor's new venues as its search finishes"""
+        anchors = generate_anchors(fair_point, member_coords, settings.FSQ_GROUP_HEX_KM, settings.FSQ_GROUP_MAX_SEARCHES)
+        batches = aiter_candidate_batches(self._search_params(query), anchors)
         try:
-            print(f"🔑 API Key: {os.getenv('FSQ_API_KEY')[:10]}..." if os.getenv('FSQ_API_KEY') else "❌ No API Key")
-            print(f"🌐 Request URL: {url}")
-            print(f"📍 Query: {query}")
-            print(f"📋 Headers: {headers}")
-            
-            r = requests.get(url, headers=headers, params=params, timeout=10)
-            print(f"🚦 Response Status: {r.status_code}")
-            print(f"📄 Response: {r.text[:200]}...")
-            
+            async for batch in batches:
+                lat, lng = anchors[batch["anchor"]]
+                yield {**batch, "anchor_coords": {"lat": lat, "lng": lng}}
+        finally:
+            await batches.aclose()
+
+    def _search_around(self, fair_point: tuple, member_coords: list, query: str) -> dict:
+        """Search several anchors around the fair point and pool the venues"""
+        params = self._search_params(query)
+
+        print(f"🔑 API Key: {os.getenv('FSQ_API_KEY')[:10]}..." if os.getenv('FSQ_API_KEY') else "❌ No API Key")
+        print(f"📍 Query: {query}")
+
+        pool = generate_candidates(params, fair_point, member_coords)
+        fair_lat, fair_lng = fair_point
+        print(f"[Group FSQ] {len(pool['venues'])} venues from {pool['anchors_searched']} anchors "
+              f"({len(pool['errors'])} failed, {pool['timed_out']} timed out)")
+
+        if not pool["venues"]:
             # Check for API credit issues
-            if r.status_code == 429:
-                response_data = r.json() if r.text else {}
-                error_msg = response_data.get("message", "Rate limit exceeded")
-                if "credits" in error_msg.lower():
-                    return json.dumps({
-                        "status": "error",
-                        "error": "API_CREDITS_EXHAUSTED",
-                        "message": "Foursquare API credits exhausted. Please add credits or get a new API key.",
-                        "details": error_msg,
-                        "fair_coords": {"lat": fair_lat, "lng": fair_lng},
-                        "venues": []
-                    })
-            
-            r.raise_for_status()
-            venues = r.json().get("results", [])
-            if not venues:
-                raise ValueError("No venues found at fair coords")
-        except requests.exceptions.RequestException as e:
-            print(f"[Group FSQ] API request failed: {e}, falling back near first member")
-
-            # fallback: retry search near first member's coords
-            fallback_lat, fallback_lng = fair_lat, fair_lng
-            if members:
-                try:
-                    loc = members[0].get("location", "")
-                    if loc and "," in loc:
-                        fallback_lat, fallback_lng = map(float, loc.split(","))
-                except:
-                    pass
+            credits = [e for e in pool["errors"] if e.get("status_code") == 429 and "credits" in e.get("message", "").lower()]
+            if credits:
+                return {
+                    "status": "error",
+                    "error": "API_CREDITS_EXHAUSTED",
+                    "message": "Foursquare API credits exhausted. Please add credits or get a new API key.",
+                    "details": credits[0].get("message"),
+                    "fair_coords": {"lat": fair_lat, "lng": fair_lng},
+                    "venues": []
+                }
+            if not pool["errors"] and not pool["timed_out"]:
+                raise ValueError("No venues found around fair coords")
 
-            fsq_tool = create_foursquare_tool()
-            search_params = FoursquareSearchParams(
-                query=query,
-                ll=f"{fallback_lat},{fallback_lng}",
-                radius=3000,
-                limit=3
-            )
-            result = fsq_tool.search_places(search_params)
-            venues = result.get("results", []) if isinstance(result, dict) else []
-
-        return json.dumps({
+        return {
             "status": "success",
             "fair_coords": {"lat": fair_lat, "lng": fair_lng},
-            "venues": venues
-        })
+            "anchors": pool["anchors"],
+            "venues": pool["venues"]
+        }
 
-    def search_venues(self, lat: float, lng: float, intent: dict, meeting_time: str = None) -> list[dict]:
-        members = [{"location": f"{lat},{lng}"}]
-        raw = self._run(json.dumps(members), json.dumps(intent), meeting_time)
-        try:
-            data = json.loads(raw)
-            return data.get("venues", [])
-        except Exception:
-            return []
+    def search_venues(self, lat: float, lng: float, intent: dict, meeting_time: str = None, member_coords: list = None) -> list[dict]:
+        if member_coords is None:
+            members = [{"location": f"{lat},{lng}"}]
+            raw = self._run(json.dumps(members), json.dumps(intent), meeting_time)
+            try:
+                data = json.loads(raw)
+                return data.get("venues", [])
+            except Exception:
+                return []
+
+        # Fair point already computed by the caller; search around it and the members
+        query = intent.get("search_query") or "restaurant, cafe"
+        return self._search_around((lat, lng), member_coords, query).get("venues", [])
 
     def calculate_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
         """Calculate distance between two points in kilometers"""
-        import math
-        
-        # Convert latitude and longitude from degrees to radians
-        lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
-        
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlng = lng2 - lng1
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        # Radius of earth in kilometers
-        r = 6371
-        
-        return c * r
+        return haversine_km(lat1, lng1, lat2, lng2)
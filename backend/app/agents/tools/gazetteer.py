@@ -0,0 +1,191 @@
+import bisect
+import json
+import logging
+import threading
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.agents.tools.geocode_cache import normalize_location_query
+from app.core.config import settings
+from app.core.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Words that only qualify a query ("Jayanagar, Bangalore, India") and are dropped
+# before matching, unless nothing else is left
+_CONTEXT_WORDS = {"bangalore", "bengaluru", "blr", "karnataka", "india", "city", "near", "in", "at", "around",
+                  "area", "the"}
+# Street words dropped last, after names that contain them ("MG Road") had their chance
+_STREET_WORDS = {"road", "rd", "main", "street", "cross"}
+
+# Minimum similarity for a fuzzy match to count as a resolution
+FUZZY_RESOLVE_THRESHOLD = 0.85
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Gazetteer:
+    """
+    In-memory index of known localities (name, aliases, centroid, bounding box).
+
+    - exact: normalized name/alias → place
+    - prefix: sorted list of every name/alias and each of their word suffixes
+      ("hsr layout", "layout"), searched with bisect for autocomplete
+    - fuzzy: trigram postings to shortlist candidates for misspellings
+      ("kormangla"), ranked by SequenceMatcher similarity
+
+    Lookups are pure in-memory work, so common areas resolve without any
+    network call.
+    """
+
+    def __init__(self, places: List[Dict[str, Any]], city: str = ""):
+        self.city = city
+        self.places = places
+        self._exact: Dict[str, int] = {}
+        self._prefix: List[Tuple[str, int, str]] = []   # (indexed text, place index, full key)
+        self._trigrams: Dict[str, Set[str]] = {}        # trigram → keys containing it
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+        for i, place in enumerate(places):
+            for key in {normalize_location_query(n) for n in [place["name"], *place.get("aliases", [])]}:
+                if not key:
+                    continue
+                self._exact.setdefault(key, i)
+                words = key.split()
+                for start in range(len(words)):
+                    self._prefix.append((" ".join(words[start:]), i, key))
+                for gram in _trigrams(key):
+                    self._trigrams.setdefault(gram, set()).add(key)
+        self._prefix.sort()
+
+    @classmethod
+    def from_file(cls, path: str) -> "Gazetteer":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["places"], city=data.get("city", ""))
+
+    @staticmethod
+    def _strip_context(key: str, drop: Set[str] = _CONTEXT_WORDS) -> str:
+        words = [w for w in key.split() if w not in drop]
+        return " ".join(words) if words else key
+
+    def _fuzzy(self, key: str, limit: int, threshold: float) -> List[Tuple[int, float]]:
+        grams = _trigrams(key)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for candidate in self._trigrams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        # Only score candidates sharing a reasonable fraction of trigrams
+        shortlist = [c for c, n in shared.items() if n >= len(grams) * 0.3]
+        best: Dict[int, float] = {}
+        for candidate in shortlist:
+            score = SequenceMatcher(None, key, candidate).ratio()
+            index = self._exact[candidate]
+            if score >= threshold and score > best.get(index, 0.0):
+                best[index] = score
+        return sorted(best.items(), key=lambda item: -item[1])[:limit]
+
+    def lookup(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve location text to a known place, or None.
+
+        The whole query has to name the place: as is, without context words
+        ("Jayanagar, Bangalore"), without street words too ("Koramangala main
+        road"), or fuzzily. Anything else left over, such as another city
+        ("Indiranagar, Chennai") or a landmark ("Forum Mall, Koramangala"),
+        means the query is about something this index doesn't hold.
+        """
+        key = normalize_location_query(text)
+        if not key:
+            return None
+
+        stripped = self._strip_context(key)
+        bare = self._strip_context(stripped, _STREET_WORDS)
+        for candidate in (key, stripped, bare):
+            if candidate in self._exact:
+                self.hits += 1
+                return self.places[self._exact[candidate]]
+
+        matches = self._fuzzy(bare, limit=1, threshold=FUZZY_RESOLVE_THRESHOLD)
+        if matches:
+            self.fuzzy_hits += 1
+            return self.places[matches[0][0]]
+
+        self.misses += 1
+        return None
+
+    def find_in_text(self, text: str) -> Optional[Dict[str, Any]]:
+        """Longest run of words in free text naming a known place ("cafe near hsr layout"), or None"""
+        words = normalize_location_query(text).split()
+        for size in range(min(len(words), 4), 0, -1):
+            for start in range(len(words) - size + 1):
+                window = " ".join(words[start:start + size])
+                if window in self._exact and window not in _CONTEXT_WORDS:
+                    return self.places[self._exact[window]]
+        return None
+
+    def suggest(self, text: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Autocomplete: places whose name or alias starts with `text` (or has a
+        word that does), best first, topped up with fuzzy matches.
+        """
+        key = normalize_location_query(text)
+        if not key:
+            return []
+
+        scored: Dict[int, float] = {}
+        lo = bisect.bisect_left(self._prefix, (key,))
+        for indexed, index, full_key in self._prefix[lo:]:
+            if not indexed.startswith(key):
+                break
+            # Whole-name prefix beats a later word; shorter (closer) names first
+            score = (2.0 if indexed == full_key else 1.0) + len(key) / len(full_key)
+            scored[index] = max(scored.get(index, 0.0), score)
+
+        if len(scored) < limit:
+            for index, similarity in self._fuzzy(key, limit, threshold=0.6):
+                scored.setdefault(index, similarity)
+
+        ranked = sorted(scored.items(), key=lambda item: (-item[1], self.places[item[0]]["name"]))
+        return [self.places[index] for index, _ in ranked[:limit]]
+
+    def containing(self, lat: float, lng: float) -> List[Dict[str, Any]]:
+        """Places whose bounding box contains the point, smallest first"""
+        found = [
+            p for p in self.places
+            if p["bbox"][0] <= lat <= p["bbox"][2] and p["bbox"][1] <= lng <= p["bbox"][3]
+        ]
+        return sorted(found, key=lambda p: (p["bbox"][2] - p["bbox"][0]) * (p["bbox"][3] - p["bbox"][1]))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "places": len(self.places),
+            "indexed_names": len(self._exact),
+            "hits": self.hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses
+        }
+
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """Process-wide gazetteer loaded from GAZETTEER_PATH (empty if the file can't be read)"""
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            try:
+                _gazetteer = Gazetteer.from_file(settings.GAZETTEER_PATH)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Gazetteer not loaded from {settings.GAZETTEER_PATH}: {e}")
+                _gazetteer = Gazetteer([])
+            register_metrics("gazetteer", _gazetteer.stats)
+        return _gazetteer
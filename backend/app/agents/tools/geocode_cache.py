@@ -0,0 +1,244 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.geo import geohash_encode
+from app.core.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Spellings that refer to the same place, folded together before lookup
+_ALIASES = {
+    "bengaluru": "bangalore",
+    "blr": "bangalore",
+}
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS forward_geocode (
+    query TEXT PRIMARY KEY,
+    lat REAL,
+    lng REAL,
+    source TEXT,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reverse_geocode (
+    cell TEXT PRIMARY KEY,
+    context TEXT,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_forward_accessed ON forward_geocode (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_reverse_accessed ON reverse_geocode (accessed_at);
+"""
+
+
+def normalize_location_query(text: str) -> str:
+    """Canonical form of a location string: "Jayanagar,  Bengaluru" → "jayanagar bangalore" """
+    words = _PUNCTUATION.sub(" ", (text or "").lower()).split()
+    return " ".join(_ALIASES.get(w, w) for w in words)
+
+
+class GeocodeCache:
+    """
+    Persistent forward and reverse geocode cache in a local SQLite file.
+
+    Forward entries map a normalized location query to coordinates; a failed
+    lookup is stored as a negative entry (NULL coordinates) with a shorter TTL
+    so an unknown place isn't re-queried on every request. Reverse entries map
+    a geohash cell to the location context JSON.
+
+    Each table is capped at `max_entries`; once over the cap the least
+    recently used rows are deleted.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 50000,
+        ttl: float = 30 * 24 * 60 * 60,
+        negative_ttl: float = 24 * 60 * 60,
+        reverse_precision: int = 7
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.reverse_precision = reverse_precision
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    # --- forward: query → coordinates ---
+
+    def get(self, query: str) -> Optional[Tuple[Optional[float], Optional[float]]]:
+        """
+        Cached coordinates for `query`.
+
+        Returns None on a miss, (lat, lng) on a hit and (None, None) when the
+        query is known not to resolve.
+        """
+        key = normalize_location_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lat, lng, expires_at FROM forward_geocode WHERE query = ?", (key,)
+            ).fetchone()
+            if row is None or row[2] <= now:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE forward_geocode SET accessed_at = ? WHERE query = ?", (now, key))
+
+        if row[0] is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return row[0], row[1]
+
+    def set(self, query: str, lat: float, lng: float, source: str = ""):
+        self._put_forward([(normalize_location_query(query), lat, lng, source)], self.ttl)
+
+    def set_negative(self, query: str):
+        """Remember that `query` could not be resolved"""
+        self._put_forward([(normalize_location_query(query), None, None, "negative")], self.negative_ttl)
+
+    def _put_forward(self, rows: Iterable[tuple], ttl: float, replace: bool = True):
+        now = time.time()
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self._lock:
+            self._conn.executemany(
+                f"{verb} INTO forward_geocode (query, lat, lng, source, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(*row, now + ttl, now) for row in rows]
+            )
+            self._evict("forward_geocode")
+
+    # --- reverse: coordinates → context ---
+
+    def _cell(self, lat: float, lng: float) -> str:
+        return geohash_encode(lat, lng, self.reverse_precision)
+
+    def get_reverse(self, lat: float, lng: float) -> Optional[Dict[str, Any]]:
+        cell = self._cell(lat, lng)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT context, expires_at FROM reverse_geocode WHERE cell = ?", (cell,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE reverse_geocode SET accessed_at = ? WHERE cell = ?", (now, cell))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set_reverse(self, lat: float, lng: float, context: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reverse_geocode (cell, context, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (self._cell(lat, lng), json.dumps(context), now + self.ttl, now)
+            )
+            self._evict("reverse_geocode")
+
+    # --- maintenance ---
+
+    def _evict(self, table: str):
+        """Delete expired rows, then least recently used rows over the cap. Caller holds the lock."""
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        expired = self._conn.execute(f"DELETE FROM {table} WHERE expires_at <= ?", (time.time(),)).rowcount
+        overflow = count - expired - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} ORDER BY accessed_at LIMIT ?)",
+                (overflow,)
+            )
+        self.evictions += expired + max(overflow, 0)
+
+    def warm_up(self, entries: Dict[str, Any]) -> int:
+        """
+        Preload known locations: {"Koramangala": [12.9352, 77.6245], ...}.
+
+        Values may be [lat, lng], "lat,lng" or {"lat": .., "lng": ..}. Existing
+        entries are left untouched. Returns the number of entries read.
+        """
+        rows = []
+        for query, value in entries.items():
+            try:
+                if isinstance(value, dict):
+                    lat, lng = value["lat"], value["lng"]
+                elif isinstance(value, str):
+                    lat, lng = value.split(",")
+                else:
+                    lat, lng = value
+                rows.append((normalize_location_query(query), float(lat), float(lng), "warm_up"))
+            except (KeyError, TypeError, ValueError):
+                logger.warning(f"Skipping invalid geocode warm-up entry for {query!r}")
+        self._put_forward(rows, self.ttl, replace=False)
+        return len(rows)
+
+    def warm_up_from_file(self, path: str) -> int:
+        with open(path, "r", encoding="utf-8") as f:
+            return self.warm_up(json.load(f))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM forward_geocode")
+            self._conn.execute("DELETE FROM reverse_geocode")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            forward = self._conn.execute("SELECT COUNT(*) FROM forward_geocode").fetchone()[0]
+            reverse = self._conn.execute("SELECT COUNT(*) FROM reverse_geocode").fetchone()[0]
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "forward_entries": forward,
+            "reverse_entries": reverse,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.negative_hits) / lookups, 3) if lookups else 0.0
+        }
+
+
+_geocode_cache: Optional[GeocodeCache] = None
+_geocode_cache_lock = threading.Lock()
+
+
+def get_geocode_cache() -> GeocodeCache:
+    """Process-wide geocode cache, warmed up from GEOCODE_CACHE_WARMUP_FILE on first use"""
+    global _geocode_cache
+    with _geocode_cache_lock:
+        if _geocode_cache is None:
+            _geocode_cache = GeocodeCache(
+                settings.GEOCODE_CACHE_PATH,
+                max_entries=settings.GEOCODE_CACHE_MAX_ENTRIES,
+                ttl=settings.GEOCODE_CACHE_TTL,
+                negative_ttl=settings.GEOCODE_CACHE_NEGATIVE_TTL
+            )
+            if settings.GEOCODE_CACHE_WARMUP_FILE:
+                try:
+                    _geocode_cache.warm_up_from_file(settings.GEOCODE_CACHE_WARMUP_FILE)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Geocode cache warm-up failed: {e}")
+            register_metrics("geocode_cache", _geocode_cache.stats)
+        return _geocode_cache
@@ -3,6 +3,9 @@ import json
 from crewai.tools import BaseTool
 from crewai.llm import LLM
 
+from app.agents.tools.intent_parser import get_intent_parser
+from app.core.llm_cache import get_llm_cache
+
 
 class GroupIntentExtractorTool(BaseTool):
     name: str = "GroupIntentExtractorTool"
@@ -49,8 +52,7 @@ class GroupIntentExtractorTool(BaseTool):
         }}
         """
 
-        # Try to use LLM for intent extraction
-        try:
+        def extract():
             response = llm.predict(prompt)
             # Clean response and validate JSON
             response = response.strip()
@@ -59,9 +61,17 @@ class GroupIntentExtractorTool(BaseTool):
             if response.endswith("```"):
                 response = response[:-3]
             response = response.strip()
-            
+
             json.loads(response)  # validate JSON
-            return response.strip()
+            return response
+
+        # Near-identical member JSON can still differ in the one field that matters; the signature must agree
+        cache_key = json.dumps({"members": members, "fair_coords": fair_coords, "meeting_time": meeting_time}, sort_keys=True)
+
+        # Try to use LLM for intent extraction
+        try:
+            return get_llm_cache().cached("group_intent", cache_key, extract,
+                                          signature=get_intent_parser().signature(cache_key))
         except Exception:
             return json.dumps({
                 "primary_intent": "casual dining and hangout",
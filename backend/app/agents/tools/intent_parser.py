@@ -0,0 +1,439 @@
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.agents.tools.gazetteer import Gazetteer, get_gazetteer
+from app.core.metrics import register_metrics
+
+# field → value → phrases. A phrase may appear under several fields ("drinks"
+# is both a venue and a purpose); every payload attached to it is applied.
+LEXICON: Dict[str, Dict[str, List[str]]] = {
+    "venue": {
+        "cafe": ["cafe", "café", "coffee", "coffee shop", "coffee place"],
+        "restaurant": ["restaurant", "eatery", "diner", "dhaba", "fine dining"],
+        "bar": ["bar", "pub", "brewery", "microbrewery", "drinks", "beer", "cocktails", "lounge"],
+        "library": ["library", "reading room"],
+        "park": ["park", "garden", "lake"],
+        "mall": ["mall", "shopping mall"],
+        "gym": ["gym", "fitness centre", "fitness center"],
+        "bakery": ["bakery", "cake shop"],
+        "dessert": ["dessert", "ice cream", "gelato"],
+        "cinema": ["cinema", "movie", "movie theatre", "multiplex"],
+        "nightclub": ["nightclub", "club", "dance floor"],
+        "coworking": ["coworking", "co working", "coworking space"],
+    },
+    "purpose": {
+        "dining": ["lunch", "dinner", "breakfast", "brunch", "food", "eat", "meal", "dine"],
+        "coffee": ["chai", "tea"],
+        "work": ["work", "working", "laptop", "meeting", "office work", "wfh", "remote work"],
+        "study": ["study", "studying", "read", "reading", "exam prep"],
+        "nightlife": ["party", "drinks", "night out", "celebrate", "celebration", "clubbing"],
+        "shopping": ["shopping", "shop"],
+        "fitness": ["workout", "exercise", "gym"],
+        "entertainment": ["movie", "movies", "entertainment", "games", "bowling"],
+        "outdoor": ["walk", "jog", "jogging", "picnic", "stroll"],
+        "dessert": ["dessert", "ice cream", "sweets"],
+    },
+    "cuisine": {
+        "south indian": ["south indian", "dosa", "idli", "filter coffee"],
+        "north indian": ["north indian", "punjabi", "butter chicken"],
+        "biryani": ["biryani"],
+        "chinese": ["chinese", "momos", "noodles"],
+        "italian": ["italian", "pasta"],
+        "pizza": ["pizza"],
+        "continental": ["continental"],
+        "japanese": ["japanese", "sushi", "ramen"],
+        "vegetarian": ["vegetarian", "veg", "pure veg"],
+        "vegan": ["vegan"],
+        "seafood": ["seafood", "fish"],
+        "burgers": ["burger", "burgers"],
+    },
+    "group_type": {
+        "family": ["family", "kids", "children", "parents", "with my family"],
+        "couple": ["date", "date night", "romantic dinner", "partner", "girlfriend", "boyfriend", "wife", "husband", "anniversary"],
+        "friends": ["friends", "gang", "buddies", "group"],
+        "business": ["client", "clients", "business", "colleagues", "team", "team lunch"],
+        "solo": ["alone", "solo", "by myself", "myself"],
+    },
+    "atmosphere": {
+        "quiet": ["quiet", "peaceful", "calm", "silent", "less crowded", "not crowded"],
+        "lively": ["lively", "buzzing", "vibrant", "happening"],
+        "romantic": ["romantic", "candlelight", "candle light"],
+        "casual": ["casual", "chill", "relaxed", "laid back", "chilled"],
+        "cozy": ["cozy", "cosy"],
+        "professional": ["professional", "formal"],
+    },
+    "budget": {
+        "budget": ["cheap", "budget", "inexpensive", "economical", "low cost", "pocket friendly"],
+        "affordable": ["affordable", "reasonable", "reasonably priced", "value for money"],
+        "moderate": ["moderate", "mid range", "midrange", "decent", "moderately priced"],
+        "expensive": ["expensive", "premium", "upscale", "fancy", "high end", "luxury", "luxurious", "fine dining"],
+    },
+    "time_preference": {
+        "morning": ["morning", "breakfast", "early morning"],
+        "afternoon": ["afternoon", "lunch"],
+        "evening": ["evening", "this evening", "sunset"],
+        "night": ["night", "tonight", "late night", "midnight", "dinner"],
+    },
+    "urgency": {
+        "now": ["now", "right now", "asap", "immediately"],
+        "today": ["today", "tonight", "this evening"],
+        "this_week": ["tomorrow", "weekend", "this weekend", "saturday", "sunday"],
+    },
+    "transport": {
+        "walking": ["walking distance", "walkable", "on foot"],
+        "metro": ["metro", "near metro", "metro station"],
+        "driving": ["car", "driving", "drive"],
+        "two_wheeler": ["bike", "scooty", "scooter"],
+        "taxi": ["uber", "ola", "cab", "taxi", "auto"],
+    },
+    "feature": {
+        "wifi": ["wifi", "wi fi", "internet"],
+        "parking": ["parking"],
+        "outdoor seating": ["outdoor", "outdoor seating", "rooftop", "open air", "terrace"],
+        "power outlets": ["charging", "power outlet", "power outlets", "plug points"],
+        "pet friendly": ["pet friendly", "dog friendly"],
+        "kid friendly": ["kid friendly", "kids friendly", "play area"],
+        "live music": ["live music", "live band"],
+        "late night": ["open late", "24 hours", "24x7"],
+    },
+    "nearby": {
+        "true": ["near me", "nearby", "close by", "around me", "around here", "close to me"],
+    },
+}
+
+# Phrasing the parser can't model: negations and comparisons change meaning
+# ("non veg" is not "veg"), so queries containing them always go to the LLM
+CUES_FOR_LLM = ["not", "no", "non", "nonveg", "avoid", "without", "except", "excluding", "other than", "apart from",
+                "skip", "dont", "don t", "isn t", "never", "but", "instead", "rather", "under", "below", "above",
+                "less than", "more than", "between"]
+
+# Fields whose meaning an unknown neighbouring word can flip ("halal biryani", "jain pizza")
+MODIFIABLE_FIELDS = ("cuisine", "feature")
+
+# Words that carry no intent; they neither count for nor against coverage
+FILLER_WORDS = {
+    "a", "an", "the", "i", "me", "my", "we", "us", "our", "im", "i m", "want", "wanna", "need", "looking",
+    "look", "find", "show", "suggest", "recommend", "recommendations", "some", "any", "good", "best", "nice",
+    "great", "top", "place", "places", "spot", "spots", "somewhere", "where", "can", "could", "to", "for",
+    "with", "in", "at", "on", "of", "and", "or", "near", "around", "from", "by", "go", "going", "get", "grab",
+    "have", "hang", "out", "hangout", "please", "is", "are", "there", "that", "which", "area", "something",
+    "options", "option", "let", "lets", "s", "open", "like", "would", "will", "do", "some", "time",
+}
+
+# Which venue to search for when only a purpose was stated
+PURPOSE_VENUES = {
+    "dining": "restaurant", "coffee": "cafe", "work": "cafe", "study": "library", "nightlife": "bar",
+    "shopping": "mall", "fitness": "gym", "entertainment": "cinema", "outdoor": "park", "dessert": "dessert",
+}
+
+VENUE_PURPOSES = {
+    "cafe": "coffee", "restaurant": "dining", "bar": "nightlife", "library": "study", "park": "outdoor",
+    "mall": "shopping", "gym": "fitness", "bakery": "dessert", "dessert": "dessert", "cinema": "entertainment",
+    "nightclub": "nightlife", "coworking": "work",
+}
+
+# Venues a group type should steer away from
+GROUP_AVOID = {"family": ["bars", "nightclubs"], "business": ["nightclubs"]}
+
+# Spelled-out numbers, so "4 friends" and "four friends" read alike
+NUMBER_WORDS = {"one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6", "seven": "7",
+                "eight": "8", "nine": "9", "ten": "10", "eleven": "11", "twelve": "12", "dozen": "12"}
+
+# Fields that hold one value; a second distinct value is a conflict
+SINGLE_VALUED = ("venue", "purpose", "group_type", "budget", "time_preference", "urgency", "location")
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(re.sub(r"[^\w]+", " ", (text or "").lower()).split())
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over characters: all patterns are matched in one
+    pass over the text, whatever their number. Matches are reported only on
+    word boundaries so "bar" does not fire inside "barbeque".
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Any]]] = [[]]   # (pattern length, payload)
+
+        for pattern, payload in patterns:
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(pattern), payload))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                if node:
+                    fail = self._fail[node]
+                    while fail and ch not in self._goto[fail]:
+                        fail = self._fail[fail]
+                    self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def finditer(self, text: str) -> List[Tuple[int, int, Any]]:
+        """(start, end, payload) for every whole-word occurrence"""
+        found = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            if not self._out[node]:
+                continue
+            end = i + 1
+            if end < len(text) and text[end] != " ":
+                continue
+            for length, payload in self._out[node]:
+                start = end - length
+                if start == 0 or text[start - 1] == " ":
+                    found.append((start, end, payload))
+        return found
+
+
+class IntentParser:
+    """
+    Rule-based intent parser compiled from LEXICON, the gazetteer's localities
+    and the LLM-routing cues into a single Aho-Corasick automaton.
+
+    `parse` returns an intent in the same shape the intent LLM produces plus a
+    confidence in [0, 1]. Confidence is the share of meaningful words the
+    lexicon explained, and drops when nothing says what kind of place is
+    wanted, when a single-valued field gets two different values, when an
+    unknown word sits right next to a cuisine or feature (it may qualify it),
+    or when the query has negations or comparisons the rules can't represent.
+    """
+
+    def __init__(self, gazetteer: Optional[Gazetteer] = None):
+        patterns: List[Tuple[str, Any]] = []
+        for field, values in LEXICON.items():
+            for value, phrases in values.items():
+                for phrase in phrases:
+                    phrase = normalize_query(phrase)
+                    patterns.append((phrase, (field, value)))
+                    if " " not in phrase and not phrase.endswith("s"):
+                        patterns.append((phrase + "s", (field, value)))
+        for cue in CUES_FOR_LLM:
+            patterns.append((normalize_query(cue), ("llm_cue", cue)))
+        for place in (gazetteer.places if gazetteer else []):
+            field = "city" if place.get("type") == "city" else "location"
+            for name in [place["name"], *place.get("aliases", [])]:
+                patterns.append((normalize_query(name), (field, place["name"])))
+
+        self._automaton = AhoCorasick(patterns)
+        self._lock = threading.Lock()
+        self.parsed = 0
+        self.confident = 0
+        self.total_ms = 0.0
+
+    def match(self, query: str) -> Tuple[str, List[Tuple[int, int, Tuple[str, str]]]]:
+        text = normalize_query(query)
+        return text, self._automaton.finditer(text)
+
+    def signature(self, text: str) -> str:
+        """
+        The details of a text that decide its answer, canonicalised: every
+        locality, cuisine or diet, venue, feature and negation the lexicon
+        recognises ("HSR" and "HSR Layout" alike), and every number. Texts
+        with the same signature differ only in wording the lexicon doesn't
+        know, so they may share a cached LLM answer.
+        """
+        normalized, matches = self.match(text)
+        terms = {f"{field}:{value}" for _, _, (field, value) in matches}
+        terms.update(f"number:{NUMBER_WORDS.get(word, word)}" for word in normalized.split()
+                     if word.isdigit() or word in NUMBER_WORDS)
+        return "|".join(sorted(terms))
+
+    def parse(self, query: str, threshold: Optional[float] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        text, matches = self.match(query)
+
+        fields: Dict[str, List[str]] = {}
+        covered = set()
+        modifiable = []
+        phrases = [(start, end) for start, end, (field, _) in matches if field != "llm_cue"]
+        places = [(start, end) for start, end, (field, _) in matches if field in ("location", "city")]
+        for start, end, (field, value) in matches:
+            if field == "llm_cue" and any(s <= start and end <= e for s, e in phrases):
+                continue  # part of a known phrase ("not crowded")
+            if field not in ("location", "city") and any(s <= start and end <= e for s, e in places):
+                continue  # part of a place name ("Cubbon Park", "Wilson Garden")
+            if value not in fields.setdefault(field, []):
+                fields[field].append(value)
+            covered.update(range(start, end))
+            if field in MODIFIABLE_FIELDS:
+                modifiable.append((start, end, value))
+
+        words, explained, position = [], 0, 0
+        unexplained_at = {}  # start/end offset of each unexplained word -> word
+        for word in text.split():
+            start = text.index(word, position)
+            position = start + len(word)
+            if word in FILLER_WORDS or word.isdigit() and len(word) < 3:
+                continue
+            words.append(word)
+            if all(i in covered for i in range(start, position)):
+                explained += 1
+            else:
+                unexplained_at[start] = unexplained_at[position] = word
+        coverage = explained / len(words) if words else 0.0
+        modified = sorted({value for start, end, value in modifiable
+                           if start - 1 in unexplained_at or end + 1 in unexplained_at})
+
+        reasons = []
+        confidence = coverage
+        if not (fields.get("venue") or fields.get("purpose") or fields.get("cuisine")):
+            confidence = min(confidence, 0.3)
+            reasons.append("no venue, purpose or cuisine")
+        conflicts = [field for field in SINGLE_VALUED if len(fields.get(field, [])) > 1]
+        if conflicts:
+            confidence -= 0.25 * len(conflicts)
+            reasons.append("conflicting " + ", ".join(conflicts))
+        if modified:
+            confidence = min(confidence, 0.5)
+            reasons.append("unexplained word next to " + ", ".join(modified))
+        if fields.get("llm_cue"):
+            confidence = min(confidence, 0.2)
+            reasons.append("needs interpretation: " + ", ".join(fields["llm_cue"]))
+        if coverage < 1.0:
+            reasons.append(f"{len(words) - explained} unexplained word(s)")
+        confidence = round(max(0.0, min(1.0, confidence)), 3)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.parsed += 1
+            self.total_ms += elapsed_ms
+            if threshold is not None and confidence >= threshold:
+                self.confident += 1
+
+        return {
+            "intent": self._build_intent(query, fields),
+            "fields": fields,
+            "confidence": confidence,
+            "reasons": reasons,
+            "elapsed_ms": round(elapsed_ms, 3)
+        }
+
+    @staticmethod
+    def _build_intent(query: str, fields: Dict[str, List[str]]) -> Dict[str, Any]:
+        def first(field: str) -> Optional[str]:
+            values = fields.get(field)
+            return values[0] if values else None
+
+        cuisines = fields.get("cuisine", [])
+        venue = first("venue")
+        purpose = first("purpose") or VENUE_PURPOSES.get(venue) or ("dining" if cuisines else None)
+        venue = venue or PURPOSE_VENUES.get(purpose)
+        search_query = f"{cuisines[0]} restaurant" if cuisines and venue == "restaurant" else venue
+        group_type = first("group_type")
+        features = fields.get("feature", [])
+
+        return {
+            "primary_intent": purpose,
+            "search_query": search_query,
+            "location": {
+                "mentioned_location": first("location"),
+                "is_nearby_search": "nearby" in fields or "location" not in fields
+            },
+            "group_context": {
+                "group_type": group_type or "general",
+                "group_size": None,
+                "special_requirements": [f for f in features if f in ("kid friendly", "pet friendly")]
+            },
+            "time_context": {
+                "time_preference": first("time_preference") or "flexible",
+                "urgency": first("urgency") or "flexible",
+                "specific_timing": None
+            },
+            "preferences": {
+                "budget": first("budget") or "flexible",
+                "atmosphere": first("atmosphere"),
+                "cuisine": cuisines,
+                "transport": first("transport"),
+                "specific_features": features
+            },
+            "constraints": {
+                "must_have": features,
+                "must_avoid": GROUP_AVOID.get(group_type, []),
+                "accessibility": []
+            },
+            "explanation": f"Parsed by keyword rules from: {query}",
+            "source": "rules"
+        }
+
+    def preference_indicators(self, fields: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Parsed fields in the category layout PreferenceLearningSystem learns from"""
+        venue_types = list(fields.get("venue", []))
+        for purpose in fields.get("purpose", []):
+            venue = PURPOSE_VENUES.get(purpose)
+            if venue and venue not in venue_types:
+                venue_types.append(venue)
+        indicators = {
+            "venue_types": venue_types,
+            "atmosphere": fields.get("atmosphere", []),
+            "budget": fields.get("budget", []),
+            "time_preferences": fields.get("time_preference", []),
+            "cuisine": fields.get("cuisine", []),
+            "amenities": fields.get("feature", []),
+        }
+        return {category: values for category, values in indicators.items() if values}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "automaton_states": len(self._automaton),
+            "parsed": self.parsed,
+            "confident": self.confident,
+            "llm_skip_ratio": round(self.confident / self.parsed, 3) if self.parsed else 0.0,
+            "avg_ms": round(self.total_ms / self.parsed, 3) if self.parsed else 0.0
+        }
+
+
+def intent_fields(intent: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """Flat view of the fields the rules and the LLM both produce, for comparing the two"""
+    def get(*path):
+        value: Any = intent
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        return value if isinstance(value, str) else None
+
+    return {
+        "search_query": get("search_query"),
+        "location": get("location", "mentioned_location"),
+        "group_type": get("group_context", "group_type"),
+        "budget": get("preferences", "budget"),
+        "atmosphere": get("preferences", "atmosphere"),
+        "time_preference": get("time_context", "time_preference"),
+    }
+
+
+_intent_parser: Optional[IntentParser] = None
+_intent_parser_lock = threading.Lock()
+
+
+def get_intent_parser() -> IntentParser:
+    """Process-wide parser, compiled once with the gazetteer's localities"""
+    global _intent_parser
+    with _intent_parser_lock:
+        if _intent_parser is None:
+            _intent_parser = IntentParser(get_gazetteer())
+            register_metrics("intent_parser", _intent_parser.stats)
+        return _intent_parser
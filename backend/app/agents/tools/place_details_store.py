@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Seconds each Foursquare detail field stays fresh. Volatile fields such as
+# opening hours expire quickly; structural fields such as location rarely change.
+DEFAULT_FIELD_TTLS = {
+    "hours": 15 * 60,
+    "popularity": 60 * 60,
+    "rating": 6 * 60 * 60,
+    "stats": 6 * 60 * 60,
+    "tips": 6 * 60 * 60,
+    "photos": 24 * 60 * 60,
+    "price": 24 * 60 * 60,
+    "contact": 24 * 60 * 60,
+    "social_media": 24 * 60 * 60,
+    "website": 24 * 60 * 60,
+    "features": 24 * 60 * 60,
+    "name": 7 * 24 * 60 * 60,
+    "location": 7 * 24 * 60 * 60,
+    "categories": 7 * 24 * 60 * 60,
+}
+DEFAULT_TTL = 24 * 60 * 60
+
+# Marker for a field the API was asked for but did not return
+_ABSENT = object()
+
+
+class PlaceDetailsStore:
+    """
+    Per-place store of Foursquare detail fields with field-level merging.
+
+    For each fsq_place_id it remembers which fields it already holds and when
+    each one expires. A lookup only fetches the missing or expired fields from
+    the API and merges them into the stored record, so asking for
+    ["name", "hours"] after ["name", "location"] costs a request for "hours"
+    alone, and a repeat lookup costs nothing.
+
+    Places are evicted least-recently-used once `maxsize` is reached.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, List[str]], Awaitable[Dict]],
+        maxsize: int = 2048,
+        field_ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = DEFAULT_TTL
+    ):
+        self._fetch = fetch
+        self.maxsize = maxsize
+        self.field_ttls = {**DEFAULT_FIELD_TTLS, **(field_ttls or {})}
+        self.default_ttl = default_ttl
+        self._places: "OrderedDict[str, Dict[str, tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.fields_served = 0
+        self.fields_fetched = 0
+        self.evictions = 0
+
+    def _missing_fields(self, fsq_place_id: str, fields: List[str]) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            record = self._places.get(fsq_place_id, {})
+            return [f for f in fields if f not in record or record[f][1] <= now]
+
+    def _merge(self, fsq_place_id: str, requested: List[str], details: Dict[str, Any]):
+        now = time.monotonic()
+        with self._lock:
+            record = self._places.setdefault(fsq_place_id, {})
+            self._places.move_to_end(fsq_place_id)
+            for field in set(requested) | set(details):
+                ttl = self.field_ttls.get(field, self.default_ttl)
+                record[field] = (details.get(field, _ABSENT), now + ttl)
+            while len(self._places) > self.maxsize:
+                self._places.popitem(last=False)
+                self.evictions += 1
+
+    def _snapshot(self, fsq_place_id: str, fields: List[str]) -> Dict[str, Any]:
+        with self._lock:
+            record = self._places.get(fsq_place_id, {})
+            if fsq_place_id in self._places:
+                self._places.move_to_end(fsq_place_id)
+            return {
+                f: record[f][0] for f in fields
+                if f in record and record[f][0] is not _ABSENT
+            }
+
+    async def get(self, fsq_place_id: str, fields: List[str]) -> Dict[str, Any]:
+        """Return the requested fields, fetching only what is missing or stale"""
+        missing = self._missing_fields(fsq_place_id, fields)
+
+        if missing:
+            details = await self._fetch(fsq_place_id, missing)
+            if "error" in details:
+                return details
+            self._merge(fsq_place_id, missing, details)
+            self.fields_fetched += len(missing)
+            if len(missing) == len(fields):
+                self.misses += 1
+            else:
+                self.partial_hits += 1
+        else:
+            self.hits += 1
+
+        self.fields_served += len(fields) - len(missing)
+        return self._snapshot(fsq_place_id, fields)
+
+    def invalidate(self, fsq_place_id: str):
+        with self._lock:
+            self._places.pop(fsq_place_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.partial_hits + self.misses
+        return {
+            "places": len(self._places),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "partial_hits": self.partial_hits,
+            "misses": self.misses,
+            "fields_served_from_store": self.fields_served,
+            "fields_fetched": self.fields_fetched,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+        }
@@ -1,24 +1,64 @@
+import copy
+import heapq
 import json
-import os
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, List, Any, Optional
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
 import logging
 
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import register_metrics
+from .preference_vectors import PRICE_TIER_TERMS, get_preference_vocabulary
+from .preference_store import PreferenceStore, get_preference_store, import_json_profiles, profile_changes
+from .preference_writer import PreferenceWriteBehind, get_preference_writer
+from .profile_cache import ProfileCache, changes_size
+from .retention_sweep import RetentionSweep
+
 logger = logging.getLogger(__name__)
 
 class PreferenceLearningSystem:
     """
     Learning system that tracks and learns from user preferences across both solo and group modes.
-    Uses file-based storage since no database is available.
+    Profiles live in a PreferenceStore (SQLite by default, Firestore optionally); learning
+    updates hold the user's lock and write back only the fields that changed. By default
+    writes go through a write-behind queue, so no request waits for storage. Recently
+    used profiles are kept in a bounded in-memory cache.
     """
     
-    def __init__(self, storage_path: str = "data/preferences"):
+    def __init__(self, storage_path: str = "data/preferences", store: Optional[PreferenceStore] = None,
+                 writer: Optional[PreferenceWriteBehind] = None):
         self.storage_path = storage_path
-        self.ensure_storage_directory()
-        
-        # In-memory cache for active session
-        self.session_cache = {}
+        shared_storage = store is None and writer is None
+        # An explicit store without a writer is written synchronously
+        if shared_storage:
+            writer = get_preference_writer()
+        self.writer = writer
+        self.store = store or (writer.store if writer is not None else get_preference_store())
+        # Profiles from the old one-JSON-file-per-user layout are imported once
+        import_json_profiles(self.store, storage_path)
+        
+        # Users whose default profile hasn't been stored yet
+        self._unsaved_profiles = set()
+        
+        # In-memory cache of hot profiles (LRU, bounded by count and size, with a TTL)
+        self.session_cache = ProfileCache(
+            maxsize=settings.PREFERENCE_CACHE_SIZE,
+            max_bytes=int(settings.PREFERENCE_CACHE_MAX_MB * 1024 * 1024),
+            ttl=settings.PREFERENCE_CACHE_TTL,
+            on_evict=self._on_evict
+        )
+        
+        # Retention: expired profiles are archived a page at a time from the last-activity index.
+        # Only the process-wide store keeps its sweep position on disk.
+        self.retention = RetentionSweep(
+            self.store,
+            self._archive_stale,
+            checkpoint_path=settings.PREFERENCE_SWEEP_CHECKPOINT if shared_storage else None,
+            batch_size=settings.PREFERENCE_SWEEP_BATCH,
+            max_per_second=settings.PREFERENCE_SWEEP_RATE
+        )
         
         # Preference categories and weights
         self.preference_categories = {
@@ -30,56 +70,120 @@ class PreferenceLearningSystem:
             "cuisine": ["vegetarian", "vegan", "indian", "chinese", "italian", "continental"],
             "amenities": ["wifi", "parking", "outdoor", "indoor", "ac", "music"]
         }
-    
-    def ensure_storage_directory(self):
-        """Create storage directory if it doesn't exist"""
-        try:
-            os.makedirs(self.storage_path, exist_ok=True)
-        except Exception as e:
-            logger.error(f"Failed to create storage directory: {e}")
-    
-    def get_user_profile_path(self, user_id: str) -> str:
-        """Get file path for user's preference profile"""
-        return os.path.join(self.storage_path, f"user_{user_id}.json")
+        
+        # Fixed-layout float32 vectors over a shared vocabulary, for scoring (profiles keep the dict form)
+        self.vocabulary = get_preference_vocabulary()
+        self.vocabulary.extend(self.preference_categories)
     
     def load_user_preferences(self, user_id: str) -> Dict[str, Any]:
-        """Load user's preference profile from storage"""
-        if user_id in self.session_cache:
-            return self.session_cache[user_id]
-        
-        profile_path = self.get_user_profile_path(user_id)
+        """Load user's preference profile (from the cache, else storage)"""
+        profile = self.session_cache.get(user_id)
+        if profile is not None:
+            return profile
         
         try:
-            if os.path.exists(profile_path):
-                with open(profile_path, 'r', encoding='utf-8') as f:
-                    profile = json.load(f)
-            else:
+            if self.writer is not None and self.writer.has_pending(user_id):
+                # Queued by another instance: read our own writes
+                self.writer.flush()
+            profile = self.store.get(user_id)
+            if profile is None:
                 profile = self.create_default_profile(user_id)
-            
-            self.session_cache[user_id] = profile
+                self._unsaved_profiles.add(user_id)
+            self.session_cache.set(user_id, profile)
             return profile
             
         except Exception as e:
             logger.error(f"Error loading user preferences for {user_id}: {e}")
             return self.create_default_profile(user_id)
     
+    def load_many_user_preferences(self, user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Load several users' profiles with one storage read (e.g. every member of a group)"""
+        user_ids = list(dict.fromkeys(user_ids))
+        profiles = {}
+        for user_id in user_ids:
+            profile = self.session_cache.get(user_id)
+            if profile is not None:
+                profiles[user_id] = profile
+        missing = [user_id for user_id in user_ids if user_id not in profiles]
+        if missing:
+            try:
+                if self.writer is not None and any(self.writer.has_pending(user_id) for user_id in missing):
+                    self.writer.flush()
+                stored = self.store.get_many(missing)
+            except Exception as e:
+                logger.error(f"Error loading user preferences for {len(missing)} users: {e}")
+                stored = {}
+            for user_id in missing:
+                if user_id not in stored:
+                    stored[user_id] = self.create_default_profile(user_id)
+                    self._unsaved_profiles.add(user_id)
+                profiles[user_id] = stored[user_id]
+                self.session_cache.set(user_id, profiles[user_id])
+        return profiles
+    
     def save_user_preferences(self, user_id: str, profile: Dict[str, Any]) -> bool:
-        """Save user's preference profile to storage"""
+        """Save user's whole preference profile to storage"""
         try:
-            profile_path = self.get_user_profile_path(user_id)
             profile["last_updated"] = datetime.now().isoformat()
-            
-            with open(profile_path, 'w', encoding='utf-8') as f:
-                json.dump(profile, f, indent=2, ensure_ascii=False)
+            if self.writer is not None:
+                self.writer.put(user_id, profile)
+            else:
+                self.store.put(user_id, profile)
+            self._unsaved_profiles.discard(user_id)
             
             # Update cache
-            self.session_cache[user_id] = profile
+            self.session_cache.set(user_id, profile)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error saving user preferences for {user_id}: {e}")
+            # Keep the changes; they are written back when the profile leaves the cache
+            self.session_cache.set(user_id, profile, dirty=True)
+            return False
+    
+    def _save_changes(self, user_id: str, before: Dict[str, Any], profile: Dict[str, Any]) -> bool:
+        """
+        Write back only the fields of `profile` that differ from `before`
+        (queued when there is a writer). Caller holds the user's lock.
+        """
+        try:
+            profile["last_updated"] = datetime.now().isoformat()
+            # Write the whole profile when storage doesn't hold `before`: a new user, an
+            # earlier save that failed, or a profile that left the cache since it was loaded
+            first_write = (user_id in self._unsaved_profiles or user_id not in self.session_cache
+                           or self.session_cache.is_dirty(user_id))
+            changes = None if first_write else profile_changes(before, profile)
+            if self.writer is not None:
+                if changes is None:
+                    self.writer.put(user_id, profile)
+                else:
+                    self.writer.update(user_id, *changes)
+            elif changes is None or not self.store.update(user_id, *changes):
+                self.store.put(user_id, profile)
+            self._unsaved_profiles.discard(user_id)
+            if changes is None:
+                self.session_cache.set(user_id, profile)
+            else:
+                # Resize from the changed fields rather than re-serializing the profile
+                self.session_cache.update(user_id, profile, changes_size(before, *changes))
             return True
             
         except Exception as e:
             logger.error(f"Error saving user preferences for {user_id}: {e}")
+            # The cached copy holds changes that never reached storage
+            self.session_cache.set(user_id, profile, dirty=True)
             return False
     
+    def _on_evict(self, user_id: str, profile: Dict[str, Any], dirty: bool):
+        """A profile left the cache; write it back if storage is missing its changes"""
+        self._unsaved_profiles.discard(user_id)
+        if not dirty:
+            return
+        if self.writer is not None:
+            self.writer.put(user_id, profile)
+        else:
+            self.store.put(user_id, profile)
+    
     def create_default_profile(self, user_id: str) -> Dict[str, Any]:
         """Create default preference profile for new user"""
         return {
@@ -111,10 +215,26 @@ class PreferenceLearningSystem:
     
     def extract_preferences_from_query(self, query: str) -> Dict[str, List[str]]:
         """Extract preference indicators from natural language query using LLM"""
-        from langchain_google_genai import ChatGoogleGenerativeAI
         from ...core.config import settings
-        
+        from ...core.llm_cache import get_llm_cache
+        from .intent_parser import get_intent_parser
+
+        # Queries the keyword rules fully explain don't need the LLM
+        parser = get_intent_parser()
+        parsed = parser.parse(query, threshold=settings.INTENT_PARSER_CONFIDENCE)
+        if parsed["confidence"] >= settings.INTENT_PARSER_CONFIDENCE:
+            return parser.preference_indicators(parsed["fields"])
+
+        cache = get_llm_cache()
+        # Similar queries share an answer only if they agree on place, diet, negations and numbers
+        signature = parser.signature(query)
+        cached = cache.get("query_preferences", query, signature=signature)
+        if cached is not None:
+            return json.loads(cached)
+
         try:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
             llm = ChatGoogleGenerativeAI(
                 model="gemini-2.5-flash",
                 google_api_key=settings.GEMINI_API_KEY,
@@ -141,9 +261,9 @@ class PreferenceLearningSystem:
             response = llm.invoke(prompt)
             
             # Parse LLM response
-            import json
             try:
                 extracted = json.loads(response.content.strip())
+                cache.set("query_preferences", query, json.dumps(extracted), signature=signature)
                 return extracted
             except json.JSONDecodeError:
                 # Fallback to simple keyword matching if JSON parsing fails
@@ -154,35 +274,14 @@ class PreferenceLearningSystem:
             return self._fallback_preference_extraction(query)
     
     def _fallback_preference_extraction(self, query: str) -> Dict[str, List[str]]:
-        """Fallback preference extraction using basic keyword matching"""
-        query_lower = query.lower()
-        extracted = defaultdict(list)
-        
-        # Basic keyword matching as fallback
-        venue_keywords = {
-            "cafe": ["cafe", "coffee"],
-            "restaurant": ["restaurant", "dining", "food"],
-            "bar": ["bar", "drinks", "alcohol"],
-            "library": ["library", "study"],
-            "mall": ["mall", "shopping"]
-        }
-        
-        for venue_type, keywords in venue_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                extracted["venue_types"].append(venue_type)
-        
-        # Basic atmosphere detection
-        if any(word in query_lower for word in ["quiet", "peaceful", "calm"]):
-            extracted["atmosphere"].append("quiet")
-        if any(word in query_lower for word in ["lively", "busy", "active"]):
-            extracted["atmosphere"].append("lively")
-            
-        return dict(extracted)
+        """Fallback preference extraction using the rule-based intent parser's keyword matching"""
+        from .intent_parser import get_intent_parser
+
+        parser = get_intent_parser()
+        return parser.preference_indicators(parser.parse(query)["fields"])
     
     def update_preferences_from_interaction(self, user_id: str, interaction_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update user preferences based on interaction data"""
-        profile = self.load_user_preferences(user_id)
-        
         # Extract interaction type and details
         interaction_type = interaction_data.get("type", "query")  # query, selection, rating
         query = interaction_data.get("query", "")
@@ -190,39 +289,47 @@ class PreferenceLearningSystem:
         rating = interaction_data.get("rating")
         venue_details = interaction_data.get("venue_details", {})
         
-        # Extract preferences from query
-        if query:
-            extracted_prefs = self.extract_preferences_from_query(query)
-            self._update_preference_scores(profile, extracted_prefs, 1.0)
-        
-        # Learn from venue selection
+        # Extract preferences from query (before taking the lock; may call the LLM)
+        extracted_prefs = self.extract_preferences_from_query(query) if query else None
+        venue_prefs = None
         if selected_venue and venue_details:
-            self._learn_from_venue_selection(profile, venue_details, rating or 5)
-        
-        # Update interaction count
-        profile["interaction_count"] += 1
-        
-        # Update confidence scores based on interaction count
-        self._update_confidence_scores(profile)
-        
-        # Record successful recommendation
-        if rating and rating >= 4:
-            profile["successful_recommendations"].append({
-                "timestamp": datetime.now().isoformat(),
-                "query": query,
-                "venue": selected_venue,
-                "rating": rating
-            })
-        elif rating and rating <= 2:
-            profile["rejected_recommendations"].append({
-                "timestamp": datetime.now().isoformat(),
-                "query": query,
-                "venue": selected_venue,
-                "rating": rating
-            })
-        
-        # Save updated profile
-        self.save_user_preferences(user_id, profile)
+            venue_prefs = self._infer_venue_preferences(venue_details, rating or 5)
+        
+        with self.store.lock(user_id):
+            profile = self.load_user_preferences(user_id)
+            before = copy.deepcopy(profile)
+            
+            if extracted_prefs:
+                self._update_preference_scores(profile, extracted_prefs, 1.0)
+            
+            # Learn from venue selection
+            if selected_venue and venue_details:
+                self._learn_from_venue_selection(profile, venue_details, rating or 5, venue_prefs)
+            
+            # Update interaction count
+            profile["interaction_count"] += 1
+            
+            # Update confidence scores based on interaction count
+            self._update_confidence_scores(profile)
+            
+            # Record successful recommendation
+            if rating and rating >= 4:
+                profile["successful_recommendations"].append({
+                    "timestamp": datetime.now().isoformat(),
+                    "query": query,
+                    "venue": selected_venue,
+                    "rating": rating
+                })
+            elif rating and rating <= 2:
+                profile["rejected_recommendations"].append({
+                    "timestamp": datetime.now().isoformat(),
+                    "query": query,
+                    "venue": selected_venue,
+                    "rating": rating
+                })
+            
+            # Save the changed fields
+            self._save_changes(user_id, before, profile)
         
         return profile
     
@@ -236,12 +343,13 @@ class PreferenceLearningSystem:
                     new_score = current_score * 0.8 + weight * 0.2
                     profile["preferences"][category][item] = round(new_score, 3)
     
-    def _learn_from_venue_selection(self, profile: Dict[str, Any], venue_details: Dict[str, Any], rating: int):
-        """Learn preferences from selected venue characteristics using LLM analysis"""
-        from langchain_google_genai import ChatGoogleGenerativeAI
+    def _infer_venue_preferences(self, venue_details: Dict[str, Any], rating: int) -> Optional[Dict[str, List[str]]]:
+        """Infer preferences from selected venue characteristics using LLM analysis (None if it fails)"""
         from ...core.config import settings
         
         try:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
             llm = ChatGoogleGenerativeAI(
                 model="gemini-2.5-flash", 
                 google_api_key=settings.GEMINI_API_KEY,
@@ -277,19 +385,25 @@ class PreferenceLearningSystem:
             
             response = llm.invoke(prompt)
             
-            # Parse and apply learned preferences
             import json
             try:
                 learned_prefs = json.loads(response.content.strip())
-                weight = max(0.1, rating / 5.0)  # Convert rating to learning weight
-                self._update_preference_scores(profile, learned_prefs, weight)
             except json.JSONDecodeError:
-                # Fallback to basic learning
-                self._fallback_venue_learning(profile, venue_details, rating)
+                return None
+            return learned_prefs if isinstance(learned_prefs, dict) else None
                 
         except Exception as e:
             print(f"Error learning from venue with LLM: {e}")
+            return None
+    
+    def _learn_from_venue_selection(self, profile: Dict[str, Any], venue_details: Dict[str, Any], rating: int,
+                                    learned_prefs: Optional[Dict[str, List[str]]]):
+        """Apply preferences inferred from a selected venue, or basic rules if inference failed"""
+        if learned_prefs is None:
             self._fallback_venue_learning(profile, venue_details, rating)
+            return
+        weight = max(0.1, rating / 5.0)  # Convert rating to learning weight
+        self._update_preference_scores(profile, learned_prefs, weight)
     
     def _fallback_venue_learning(self, profile: Dict[str, Any], venue_details: Dict[str, Any], rating: int):
         """Fallback venue learning using basic rules"""
@@ -310,9 +424,8 @@ class PreferenceLearningSystem:
                 venue_prefs["venue_types"].append("bar")
         
         # Basic price learning
-        price_mapping = {1: "budget", 2: "affordable", 3: "moderate", 4: "expensive"}
-        if price_level in price_mapping:
-            venue_prefs["budget"].append(price_mapping[price_level])
+        if price_level in PRICE_TIER_TERMS:
+            venue_prefs["budget"].append(PRICE_TIER_TERMS[price_level])
         
         self._update_preference_scores(profile, dict(venue_prefs), weight)
     
@@ -349,14 +462,12 @@ class PreferenceLearningSystem:
         
         # Generate category recommendations based on learned preferences
         for category, prefs in profile["preferences"].items():
-            if prefs:
-                # Get top preferences with confidence above threshold
-                sorted_prefs = sorted(prefs.items(), key=lambda x: x[1], reverse=True)
-                confident_prefs = [(item, score) for item, score in sorted_prefs if score > 0.3]
-                
-                if confident_prefs:
-                    recommendations["suggested_categories"].extend([item for item, _ in confident_prefs[:3]])
-                    recommendations["personalized_filters"][category] = confident_prefs[:2]
+            # Top preferences with confidence above threshold (a bounded heap, not a full sort)
+            confident_prefs = heapq.nlargest(3, ((item, score) for item, score in prefs.items() if score > 0.3),
+                                             key=lambda x: x[1])
+            if confident_prefs:
+                recommendations["suggested_categories"].extend([item for item, _ in confident_prefs])
+                recommendations["personalized_filters"][category] = confident_prefs[:2]
         
         # Determine budget preference
         budget_prefs = profile["preferences"].get("budget", {})
@@ -375,6 +486,31 @@ class PreferenceLearningSystem:
         
         return recommendations
     
+    def preference_vectors(self, user_ids: List[str]) -> np.ndarray:
+        """(users x vocabulary) float32 preference matrix, one row per user in order"""
+        profiles = self.load_many_user_preferences(user_ids)
+        return self.vocabulary.compile_many([profiles[user_id]["preferences"] for user_id in user_ids])
+    
+    def score_venues(self, user_ids: List[str], venues: List[Dict[str, Any]]) -> np.ndarray:
+        """How well each venue matches each user's learned preferences: (venues x users), one matrix multiply"""
+        users = self.preference_vectors(user_ids)
+        features = self.vocabulary.venue_features(venues, size=users.shape[1])
+        return features @ users.T
+    
+    def rank_venues_for_group(self, user_ids: List[str], venues: List[Dict[str, Any]],
+                              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Venues ordered by mean preference score across the group, each with its per-member scores"""
+        if not venues:
+            return []
+        scores = self.score_venues(user_ids, venues)
+        group_scores = scores.mean(axis=1) if user_ids else np.zeros(len(venues), dtype=np.float32)
+        order = np.argsort(-group_scores, kind="stable")[:limit]
+        return [{
+            "venue": venues[i],
+            "preference_score": round(float(group_scores[i]), 3),
+            "member_scores": {user_id: round(float(score), 3) for user_id, score in zip(user_ids, scores[i])}
+        } for i in order]
+    
     def _calculate_overall_confidence(self, profile: Dict[str, Any]) -> float:
         """Calculate overall confidence in user preferences"""
         confidence_scores = profile.get("confidence_scores", {})
@@ -386,8 +522,6 @@ class PreferenceLearningSystem:
     def learn_from_group_coordination(self, user_id: str, group_data: Dict[str, Any], 
                                     selected_venue: Dict[str, Any], satisfaction_rating: int):
         """Learn from group coordination outcomes"""
-        profile = self.load_user_preferences(user_id)
-        
         # Record group coordination history
         coordination_record = {
             "timestamp": datetime.now().isoformat(),
@@ -399,16 +533,12 @@ class PreferenceLearningSystem:
             "travel_time": group_data.get("user_travel_time", 0)
         }
         
-        profile["group_coordination_history"].append(coordination_record)
-        
-        # Learn preferences from successful group coordination
+        # Extract learnable patterns from successful group coordination (before taking the lock)
+        extracted_prefs = None
         if satisfaction_rating >= 4:
-            # Extract learnable patterns
             meeting_purpose = group_data.get("meeting_purpose", "").lower()
             if meeting_purpose:
                 extracted_prefs = self.extract_preferences_from_query(meeting_purpose)
-                weight = satisfaction_rating / 5.0
-                self._update_preference_scores(profile, extracted_prefs, weight)
         
         # Update group type preferences
         group_size = group_data.get("group_size", 1)
@@ -421,13 +551,23 @@ class PreferenceLearningSystem:
         else:
             group_type = "large_group"
         
-        current_score = profile["preferences"]["group_types"].get(group_type, 0.0)
-        weight = satisfaction_rating / 5.0
-        new_score = current_score * 0.8 + weight * 0.2
-        profile["preferences"]["group_types"][group_type] = round(new_score, 3)
-        
-        # Save updated profile
-        self.save_user_preferences(user_id, profile)
+        with self.store.lock(user_id):
+            profile = self.load_user_preferences(user_id)
+            before = copy.deepcopy(profile)
+            
+            profile["group_coordination_history"].append(coordination_record)
+            
+            if extracted_prefs:
+                weight = satisfaction_rating / 5.0
+                self._update_preference_scores(profile, extracted_prefs, weight)
+            
+            current_score = profile["preferences"]["group_types"].get(group_type, 0.0)
+            weight = satisfaction_rating / 5.0
+            new_score = current_score * 0.8 + weight * 0.2
+            profile["preferences"]["group_types"][group_type] = round(new_score, 3)
+            
+            # Save the changed fields
+            self._save_changes(user_id, before, profile)
         
         return profile
     
@@ -496,35 +636,29 @@ class PreferenceLearningSystem:
         else:
             return "mature"
     
-    def cleanup_old_data(self, days_to_keep: int = 90):
-        """Clean up old preference data to prevent storage bloat"""
-        cutoff_date = datetime.now() - timedelta(days=days_to_keep)
-        
+    def cleanup_old_data(self, days_to_keep: int = 90, max_users: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Archive profiles not updated for `days_to_keep` days. Only expired profiles
+        are visited, at most `max_users` per call; the next call continues from there.
+        """
         try:
-            for filename in os.listdir(self.storage_path):
-                if filename.startswith("user_") and filename.endswith(".json"):
-                    filepath = os.path.join(self.storage_path, filename)
-                    
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            profile = json.load(f)
-                        
-                        last_updated = datetime.fromisoformat(profile.get("last_updated", cutoff_date.isoformat()))
-                        
-                        if last_updated < cutoff_date:
-                            # Archive or remove old profiles
-                            archive_path = os.path.join(self.storage_path, "archived")
-                            os.makedirs(archive_path, exist_ok=True)
-                            
-                            archive_filepath = os.path.join(archive_path, filename)
-                            os.rename(filepath, archive_filepath)
-                            logger.info(f"Archived old preference profile: {filename}")
-                            
-                    except Exception as e:
-                        logger.error(f"Error processing file {filename}: {e}")
-                        
+            return self.retention.run(days_to_keep * 86400, max_users=max_users)
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
+            return {"examined": 0, "archived": 0, "pass_complete": False}
+    
+    def _archive_stale(self, user_id: str, updated_before: float) -> bool:
+        """Archive a profile unless it was updated since `updated_before`"""
+        with self.store.lock(user_id):
+            # Checked under the lock, so no interaction can queue an update before the archive
+            if self.writer is not None and self.writer.has_pending(user_id):
+                # Updated since its last flush; not stale
+                return False
+            if not self.store.archive(user_id, updated_before=updated_before):
+                return False
+            self.session_cache.pop(user_id)
+        logger.info(f"Archived old preference profile: {user_id}")
+        return True
     
     def export_user_data(self, user_id: str) -> Dict[str, Any]:
         """Export user data for privacy compliance"""
@@ -542,14 +676,15 @@ class PreferenceLearningSystem:
     def delete_user_data(self, user_id: str) -> bool:
         """Delete all user data for privacy compliance"""
         try:
-            profile_path = self.get_user_profile_path(user_id)
-            
-            if os.path.exists(profile_path):
-                os.remove(profile_path)
-            
-            # Remove from session cache
-            if user_id in self.session_cache:
-                del self.session_cache[user_id]
+            with self.store.lock(user_id):
+                if self.writer is not None:
+                    self.writer.delete(user_id, lambda: self.store.delete(user_id))
+                else:
+                    self.store.delete(user_id)
+                self._unsaved_profiles.discard(user_id)
+                
+                # Remove from session cache
+                self.session_cache.pop(user_id)
             
             logger.info(f"Deleted user data for user_id: {user_id}")
             return True
@@ -562,4 +697,9 @@ class PreferenceLearningSystem:
 # Factory function for creating preference learning system
 def create_preference_learning_system() -> PreferenceLearningSystem:
     """Create and return a preference learning system instance"""
-    return PreferenceLearningSystem()
\ No newline at end of file
+    system = PreferenceLearningSystem()
+    register_metrics("preference_profile_cache", system.session_cache.stats)
+    register_metrics("preference_retention", system.retention.stats)
+    if settings.PREFERENCE_SWEEP_INTERVAL > 0:
+        system.retention.start(settings.PREFERENCE_RETENTION_DAYS * 86400, settings.PREFERENCE_SWEEP_INTERVAL)
+    return system
\ No newline at end of file
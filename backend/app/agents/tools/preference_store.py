@@ -0,0 +1,504 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.core.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# A field inside a profile: ("preferences", "cuisine", "italian"); "a.b.c" is accepted too
+Path = Tuple[str, ...]
+PathLike = Union[str, Path]
+# (fields to set, items to append) for one profile
+Changes = Tuple[Dict[PathLike, Any], Dict[PathLike, List[Any]]]
+# Position of a profile in the last-activity index: (updated_at, user_id)
+ActivityKey = Tuple[float, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_preferences (
+    user_id TEXT PRIMARY KEY,
+    profile TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archived_user_preferences (
+    user_id TEXT PRIMARY KEY,
+    profile TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    archived_at REAL NOT NULL
+);
+DROP INDEX IF EXISTS idx_user_preferences_updated;
+CREATE INDEX IF NOT EXISTS idx_user_preferences_activity ON user_preferences (updated_at, user_id);
+"""
+
+# json_set() takes two arguments per field; stay under SQLite's function argument limit
+_MAX_FIELDS_PER_STATEMENT = 50
+
+
+def _as_path(path: PathLike) -> Path:
+    return tuple(path.split(".")) if isinstance(path, str) else tuple(path)
+
+
+def profile_changes(before: Dict[str, Any], after: Dict[str, Any], _prefix: Path = ()) -> Tuple[Dict[Path, Any], Dict[Path, List[Any]]]:
+    """
+    Field-level difference between two versions of a profile, as
+    ({path: new value}, {path: items appended to the list there}).
+
+    Nested dicts are compared key by key, so bumping one preference score
+    yields a single changed path. A list that only grew is reported as an
+    append; any other change replaces the value. Keys removed from `after`
+    are not reported (profiles only grow).
+    """
+    sets: Dict[Path, Any] = {}
+    appends: Dict[Path, List[Any]] = {}
+    for key, value in after.items():
+        path = _prefix + (key,)
+        if key not in before:
+            sets[path] = value
+            continue
+        old = before[key]
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested_sets, nested_appends = profile_changes(old, value, path)
+            sets.update(nested_sets)
+            appends.update(nested_appends)
+        elif isinstance(value, list) and isinstance(old, list) and len(value) > len(old) and value[:len(old)] == old:
+            appends[path] = value[len(old):]
+        elif value != old:
+            sets[path] = value
+    return sets, appends
+
+
+def apply_changes(profile: Dict[str, Any], sets: Dict[PathLike, Any], appends: Optional[Dict[PathLike, List[Any]]] = None):
+    """Apply partial changes to a profile dict in place (the in-memory twin of PreferenceStore.update)"""
+    for path, value in sets.items():
+        *parents, key = _as_path(path)
+        target = profile
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[key] = value
+    for path, items in (appends or {}).items():
+        *parents, key = _as_path(path)
+        target = profile
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target.setdefault(key, []).extend(items)
+
+
+class UserLocks:
+    """One re-entrant lock per user id, dropped once nobody holds or waits for it"""
+
+    def __init__(self):
+        self._locks: Dict[str, list] = {}  # user id -> [lock, holders + waiters]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def __call__(self, user_id: str) -> Iterator[None]:
+        with self._lock:
+            entry = self._locks.setdefault(user_id, [threading.RLock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._locks.pop(user_id, None)
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+class PreferenceStore(ABC):
+    """
+    Storage interface for user preference profiles.
+
+    `update` writes only the given fields (and appends to lists) instead of
+    rewriting the whole profile. `lock(user_id)` serialises read-modify-write
+    cycles for one user so concurrent interactions don't lose updates; other
+    users are never blocked. Backends implement the abstract methods; the
+    batch and convenience methods build on them.
+    """
+
+    def __init__(self):
+        self.lock = UserLocks()
+        self.reads = 0
+        self.writes = 0
+        self.partial_writes = 0
+        self.fields_written = 0
+        self.batches = 0
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([user_id]).get(user_id)
+
+    @abstractmethod
+    def get_many(self, user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Profiles of every listed user that has one"""
+
+    @abstractmethod
+    def put(self, user_id: str, profile: Dict[str, Any]):
+        """Create or replace a whole profile"""
+
+    @abstractmethod
+    def update(self, user_id: str, sets: Dict[PathLike, Any], appends: Optional[Dict[PathLike, List[Any]]] = None) -> bool:
+        """Set fields and append list items in place. False if the user has no profile."""
+
+    def write_batch(self, puts: Dict[str, Dict[str, Any]], updates: Dict[str, Changes]) -> List[str]:
+        """
+        Write whole profiles and partial updates for many users at once.
+        Returns the users in `updates` that have no stored profile.
+        """
+        for user_id, profile in puts.items():
+            self.put(user_id, profile)
+        missing = [user_id for user_id, (sets, appends) in updates.items() if not self.update(user_id, sets, appends)]
+        self.batches += 1
+        return missing
+
+    @abstractmethod
+    def delete(self, user_id: str) -> bool:
+        """Remove the user's profile, archived copy included. False if there was none."""
+
+    @abstractmethod
+    def archive(self, user_id: str, updated_before: Optional[float] = None) -> bool:
+        """
+        Move the profile out of the live set. False if there was none, or if it
+        was written at or after `updated_before` (i.e. it's no longer stale).
+        """
+
+    @abstractmethod
+    def stale_users(self, updated_before: float, limit: Optional[int] = None,
+                    after: Optional[ActivityKey] = None) -> List[ActivityKey]:
+        """
+        (updated_at, user_id) of profiles last written before `updated_before`,
+        oldest first, starting after the `after` key; pass the last key of one
+        page as `after` to read the next.
+        """
+
+    def stale_user_ids(self, updated_before: float, limit: Optional[int] = None) -> List[str]:
+        """Users whose profile was last written before the `updated_before` timestamp"""
+        return [user_id for _, user_id in self.stale_users(updated_before, limit)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "reads": self.reads,
+            "writes": self.writes,
+            "partial_writes": self.partial_writes,
+            "fields_written": self.fields_written,
+            "batches": self.batches,
+            "locked_users": len(self.lock)
+        }
+
+
+class SQLitePreferenceStore(PreferenceStore):
+    """
+    Profiles as JSON documents in a local SQLite file (WAL mode).
+
+    Partial updates are applied inside SQLite with json_set / json_insert, so
+    a write sends only the changed fields rather than re-serialising the
+    profile. `updated_at` is a separate column, indexed together with the user
+    id, so retention sweeps page through only the expired profiles.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _json_path(path: Path) -> str:
+        return "$" + "".join('."{}"'.format(key.replace('"', '\\"')) for key in path)
+
+    def get_many(self, user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        user_ids = list(dict.fromkeys(user_ids))
+        profiles = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(user_ids), 500):
+                chunk = user_ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT user_id, profile FROM user_preferences WHERE user_id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                profiles.update((user_id, json.loads(profile)) for user_id, profile in rows)
+        self.reads += len(user_ids)
+        return profiles
+
+    def put(self, user_id: str, profile: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO user_preferences (user_id, profile, updated_at) VALUES (?, ?, ?)",
+                (user_id, json.dumps(profile, ensure_ascii=False), time.time())
+            )
+        self.writes += 1
+
+    def _apply_update(self, user_id: str, sets: Dict[PathLike, Any], appends: Optional[Dict[PathLike, List[Any]]]) -> bool:
+        """Partial update inside the caller's transaction. Caller holds the lock."""
+        assignments = [(self._json_path(_as_path(path)), json.dumps(value, ensure_ascii=False)) for path, value in sets.items()]
+        insertions = [
+            (self._json_path(_as_path(path)) + "[#]", json.dumps(item, ensure_ascii=False))
+            for path, items in (appends or {}).items() for item in items
+        ]
+        exists = self._conn.execute(
+            "UPDATE user_preferences SET updated_at = ? WHERE user_id = ?", (time.time(), user_id)
+        ).rowcount
+        if not exists:
+            return False
+
+        statements = [("json_set", assignments[i:i + _MAX_FIELDS_PER_STATEMENT])
+                      for i in range(0, len(assignments), _MAX_FIELDS_PER_STATEMENT)]
+        statements += [("json_insert", insertions[i:i + _MAX_FIELDS_PER_STATEMENT])
+                       for i in range(0, len(insertions), _MAX_FIELDS_PER_STATEMENT)]
+        for function, fields in statements:
+            placeholders = ", ".join("?, json(?)" for _ in fields)
+            self._conn.execute(
+                f"UPDATE user_preferences SET profile = {function}(profile, {placeholders}) WHERE user_id = ?",
+                [arg for field in fields for arg in field] + [user_id]
+            )
+        self.partial_writes += 1
+        self.fields_written += len(assignments) + len(insertions)
+        return True
+
+    def update(self, user_id: str, sets: Dict[PathLike, Any], appends: Optional[Dict[PathLike, List[Any]]] = None) -> bool:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                exists = self._apply_update(user_id, sets, appends)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return exists
+
+    def write_batch(self, puts: Dict[str, Dict[str, Any]], updates: Dict[str, Changes]) -> List[str]:
+        """All puts and updates in one transaction: one fsync for the whole batch"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO user_preferences (user_id, profile, updated_at) VALUES (?, ?, ?)",
+                    [(user_id, json.dumps(profile, ensure_ascii=False), now) for user_id, profile in puts.items()]
+                )
+                missing = [user_id for user_id, (sets, appends) in updates.items()
+                           if not self._apply_update(user_id, sets, appends)]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.writes += len(puts)
+        self.batches += 1
+        return missing
+
+    def delete(self, user_id: str) -> bool:
+        with self._lock:
+            live = self._conn.execute("DELETE FROM user_preferences WHERE user_id = ?", (user_id,)).rowcount
+            archived = self._conn.execute("DELETE FROM archived_user_preferences WHERE user_id = ?", (user_id,)).rowcount
+        return bool(live or archived)
+
+    def archive(self, user_id: str, updated_before: Optional[float] = None) -> bool:
+        updated_before = float("inf") if updated_before is None else updated_before
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                moved = self._conn.execute(
+                    "INSERT OR REPLACE INTO archived_user_preferences (user_id, profile, updated_at, archived_at) "
+                    "SELECT user_id, profile, updated_at, ? FROM user_preferences WHERE user_id = ? AND updated_at < ?",
+                    (time.time(), user_id, updated_before)
+                ).rowcount
+                if moved:
+                    self._conn.execute("DELETE FROM user_preferences WHERE user_id = ?", (user_id,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return bool(moved)
+
+    def stale_users(self, updated_before: float, limit: Optional[int] = None,
+                    after: Optional[ActivityKey] = None) -> List[ActivityKey]:
+        after_updated_at, after_user_id = after if after is not None else (float("-inf"), "")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT updated_at, user_id FROM user_preferences "
+                "WHERE updated_at < ? AND (updated_at, user_id) > (?, ?) "
+                "ORDER BY updated_at, user_id LIMIT ?",
+                (updated_before, after_updated_at, after_user_id, -1 if limit is None else limit)
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            users = self._conn.execute("SELECT COUNT(*) FROM user_preferences").fetchone()[0]
+            archived = self._conn.execute("SELECT COUNT(*) FROM archived_user_preferences").fetchone()[0]
+        return {**super().stats(), "users": users, "archived_users": archived}
+
+
+class FirestorePreferenceStore(PreferenceStore):
+    """
+    Profiles as Firestore documents (one per user) for multi-instance deployments.
+
+    Partial updates use Firestore field paths, so only the changed fields
+    travel. `lock(user_id)` only serialises writers within this process;
+    Firestore's per-field updates keep concurrent instances from overwriting
+    each other's unrelated fields, and appends run in a transaction.
+    """
+
+    def __init__(self, collection: str, client=None):
+        super().__init__()
+        from google.cloud import firestore
+        from google.cloud.firestore_v1.field_path import FieldPath
+
+        self._firestore = firestore
+        self._field_path = FieldPath
+        if client is None:
+            if os.path.exists(settings.FIREBASE_CREDENTIALS):
+                client = firestore.Client.from_service_account_json(settings.FIREBASE_CREDENTIALS)
+            else:
+                client = firestore.Client()
+        self._client = client
+        self._collection = client.collection(collection)
+        self._archive = client.collection(f"{collection}_archived")
+
+    def _field(self, path: Path) -> str:
+        return self._field_path(*path).to_api_repr()
+
+    @staticmethod
+    def _profile(snapshot) -> Dict[str, Any]:
+        profile = snapshot.to_dict()
+        profile.pop("_updated_at", None)
+        return profile
+
+    def get_many(self, user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        user_ids = list(dict.fromkeys(user_ids))
+        snapshots = self._client.get_all([self._collection.document(user_id) for user_id in user_ids])
+        self.reads += len(user_ids)
+        return {snapshot.id: self._profile(snapshot) for snapshot in snapshots if snapshot.exists}
+
+    def put(self, user_id: str, profile: Dict[str, Any]):
+        self._collection.document(user_id).set({**profile, "_updated_at": time.time()})
+        self.writes += 1
+
+    def update(self, user_id: str, sets: Dict[PathLike, Any], appends: Optional[Dict[PathLike, List[Any]]] = None) -> bool:
+        from google.api_core.exceptions import NotFound
+
+        document = self._collection.document(user_id)
+        fields = {self._field(_as_path(path)): value for path, value in sets.items()}
+        fields["_updated_at"] = time.time()
+        if not appends:
+            try:
+                document.update(fields)
+            except NotFound:
+                return False
+        else:
+            # Not ArrayUnion: it skips items already in the list, and histories repeat
+            # (the SQLite store keeps them). Read the lists and write them back instead.
+            @self._firestore.transactional
+            def append(transaction) -> bool:
+                snapshot = document.get(transaction=transaction)
+                if not snapshot.exists:
+                    return False
+                profile = snapshot.to_dict()
+                for path, items in appends.items():
+                    current = profile
+                    for key in _as_path(path):
+                        current = current.get(key) if isinstance(current, dict) else None
+                    fields[self._field(_as_path(path))] = (current if isinstance(current, list) else []) + list(items)
+                transaction.update(document, fields)
+                return True
+
+            if not append(self._client.transaction()):
+                return False
+        self.partial_writes += 1
+        self.fields_written += len(fields) - 1
+        return True
+
+    def delete(self, user_id: str) -> bool:
+        existed = self._collection.document(user_id).get().exists or self._archive.document(user_id).get().exists
+        self._collection.document(user_id).delete()
+        self._archive.document(user_id).delete()
+        return existed
+
+    def archive(self, user_id: str, updated_before: Optional[float] = None) -> bool:
+        snapshot = self._collection.document(user_id).get()
+        if not snapshot.exists:
+            return False
+        if updated_before is not None and snapshot.get("_updated_at") >= updated_before:
+            return False
+        batch = self._client.batch()
+        batch.set(self._archive.document(user_id), {**snapshot.to_dict(), "_archived_at": time.time()})
+        batch.delete(self._collection.document(user_id))
+        batch.commit()
+        return True
+
+    def stale_users(self, updated_before: float, limit: Optional[int] = None,
+                    after: Optional[ActivityKey] = None) -> List[ActivityKey]:
+        # Needs a composite index on (_updated_at, __name__)
+        query = (self._collection
+                 .where(filter=self._firestore.FieldFilter("_updated_at", "<", updated_before))
+                 .order_by("_updated_at")
+                 .order_by(self._field_path.document_id()))
+        if after is not None:
+            query = query.start_after({"_updated_at": after[0], self._field_path.document_id(): self._collection.document(after[1])})
+        if limit is not None:
+            query = query.limit(limit)
+        return [(snapshot.get("_updated_at"), snapshot.id) for snapshot in query.stream()]
+
+
+def import_json_profiles(store: PreferenceStore, directory: str) -> int:
+    """
+    One-off migration from the old one-JSON-file-per-user layout: profiles the
+    store doesn't have yet are imported, and every processed file is moved to
+    `<directory>/migrated`. Returns the number of profiles imported.
+    """
+    if not os.path.isdir(directory):
+        return 0
+    filenames = [f for f in os.listdir(directory) if f.startswith("user_") and f.endswith(".json")]
+    if not filenames:
+        return 0
+
+    migrated_dir = os.path.join(directory, "migrated")
+    os.makedirs(migrated_dir, exist_ok=True)
+    existing = store.get_many(f[len("user_"):-len(".json")] for f in filenames)
+    imported = 0
+    for filename in filenames:
+        user_id = filename[len("user_"):-len(".json")]
+        filepath = os.path.join(directory, filename)
+        try:
+            if user_id not in existing:
+                with open(filepath, "r", encoding="utf-8") as f:
+                    store.put(user_id, json.load(f))
+                imported += 1
+            os.replace(filepath, os.path.join(migrated_dir, filename))
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not import preference profile {filename}: {e}")
+    logger.info(f"Imported {imported} preference profiles from {directory}")
+    return imported
+
+
+_preference_store: Optional[PreferenceStore] = None
+_preference_store_lock = threading.Lock()
+
+
+def get_preference_store() -> PreferenceStore:
+    """Process-wide preference store chosen by PREFERENCE_STORE ("sqlite" or "firestore")"""
+    global _preference_store
+    with _preference_store_lock:
+        if _preference_store is None:
+            if settings.PREFERENCE_STORE == "firestore":
+                _preference_store = FirestorePreferenceStore(settings.PREFERENCE_FIRESTORE_COLLECTION)
+            else:
+                _preference_store = SQLitePreferenceStore(settings.PREFERENCE_DB_PATH)
+            register_metrics("preference_store", _preference_store.stats)
+        return _preference_store
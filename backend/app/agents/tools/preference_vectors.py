@@ -0,0 +1,169 @@
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import register_metrics
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+# Venue wording that means a vocabulary term
+_ALIASES = {"coffee": "cafe", "pub": "bar", "wi fi": "wifi", "air conditioned": "ac"}
+# Foursquare price tier -> budget term; used both to learn from a selected venue and to encode venues
+PRICE_TIER_TERMS = {1: "budget", 2: "affordable", 3: "moderate", 4: "expensive"}
+
+
+def normalize_term(text: str) -> str:
+    """Lowercase ASCII words separated by single spaces ("Café" -> "cafe", "small_group" -> "small group")"""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def _venue_text(venue: Dict[str, Any]) -> List[str]:
+    texts = [venue.get("name") or "", venue.get("category") or "", venue.get("description") or ""]
+    for category in venue.get("categories") or []:
+        texts.append(category.get("name", "") if isinstance(category, dict) else str(category))
+    for key in ("tastes", "tags", "features"):
+        values = venue.get(key) or []
+        if isinstance(values, dict):
+            values = [name for name, present in values.items() if present]
+        texts.extend(str(value) for value in values)
+    return texts
+
+
+class PreferenceVocabulary:
+    """
+    Shared layout of preference vectors: one float32 slot per (category, term).
+
+    Slots are append-only, so a slot index never changes once assigned and
+    vectors compiled earlier stay valid (they are just shorter). Compiling a
+    profile adds terms it learned in a known category, up to `max_learned`
+    of them in all; other terms (free-form LLM output once the cap is
+    reached, unknown categories) get no slot and stay in the dict form only.
+    Venues are encoded over the same slots (1.0 where the venue matches a
+    term), so preference scoring is a dot product, and scoring a venue list
+    for a group is one matrix multiply.
+    """
+
+    def __init__(self, categories: Optional[Dict[str, Iterable[str]]] = None, max_learned: int = 256):
+        self.max_learned = max_learned
+        self.learned = 0
+        self.unslotted = 0
+        self._slots: List[Tuple[str, str]] = []
+        self._index: Dict[Tuple[str, str], int] = {}
+        self._by_term: Dict[str, List[int]] = {}
+        self._by_category: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        if categories:
+            self.extend(categories)
+
+    def _add(self, category: str, term: str) -> int:
+        index = self._index.get((category, term))
+        if index is None:
+            index = len(self._slots)
+            self._slots.append((category, term))
+            self._index[(category, term)] = index
+            self._by_term.setdefault(normalize_term(term), []).append(index)
+            self._by_category.setdefault(category, []).append(index)
+        return index
+
+    def _learned_slot(self, category: str, term: str) -> Optional[int]:
+        """Slot of a term met in a profile: existing, new while under the cap, else None"""
+        index = self._index.get((category, term))
+        if index is not None:
+            return index
+        if category not in self._by_category or self.learned >= self.max_learned:
+            self.unslotted += 1
+            return None
+        self.learned += 1
+        return self._add(category, term)
+
+    def extend(self, categories: Dict[str, Iterable[str]]):
+        """Make sure every (category, term) has a slot"""
+        with self._lock:
+            for category, terms in categories.items():
+                self._by_category.setdefault(category, [])
+                for term in terms:
+                    self._add(category, term)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def slot(self, index: int) -> Tuple[str, str]:
+        return self._slots[index]
+
+    def category_indices(self, category: str, size: Optional[int] = None) -> np.ndarray:
+        """Slots of a category, limited to the first `size` slots"""
+        with self._lock:
+            indices = list(self._by_category.get(category, ()))
+        array = np.array(indices, dtype=np.intp)
+        return array if size is None else array[array < size]
+
+    def compile_many(self, preferences: Sequence[Dict[str, Dict[str, float]]]) -> np.ndarray:
+        """(profiles x slots) float32 matrix of `profile["preferences"]` scores"""
+        with self._lock:
+            rows = [[(index, score) for category, scores in prefs.items() for term, score in scores.items()
+                     for index in (self._learned_slot(category, term),) if index is not None]
+                    for prefs in preferences]
+            size = len(self._slots)
+        matrix = np.zeros((len(rows), size), dtype=np.float32)
+        for row, entries in enumerate(rows):
+            if entries:
+                indices, scores = zip(*entries)
+                matrix[row, list(indices)] = scores
+        return matrix
+
+    def compile(self, preferences: Dict[str, Dict[str, float]]) -> np.ndarray:
+        return self.compile_many([preferences])[0]
+
+    def venue_features(self, venues: Sequence[Dict[str, Any]], size: Optional[int] = None) -> np.ndarray:
+        """(venues x slots) float32 matrix: 1.0 where a venue's name, categories or tags match a term, and for its price level"""
+        size = len(self._slots) if size is None else size
+        with self._lock:
+            by_term = {term: [i for i in indices if i < size] for term, indices in self._by_term.items()}
+            tier_slots = {tier: self._index.get(("budget", term)) for tier, term in PRICE_TIER_TERMS.items()}
+        matrix = np.zeros((len(venues), size), dtype=np.float32)
+        for row, venue in enumerate(venues):
+            matched = set()
+            for text in _venue_text(venue):
+                words = normalize_term(text).split()
+                # Single words and two-word phrases ("coffee shop", "wi fi")
+                for phrase in words + [" ".join(pair) for pair in zip(words, words[1:])]:
+                    phrase = _ALIASES.get(phrase, phrase)
+                    matched.update(by_term.get(phrase, ()))
+            price = venue.get("price")
+            if isinstance(price, dict):
+                price = price.get("tier")
+            if isinstance(price, (int, float)):
+                slot = tier_slots.get(int(price))
+                if slot is not None and slot < size:
+                    matched.add(slot)
+            if matched:
+                matrix[row, list(matched)] = 1.0
+        return matrix
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "slots": len(self._slots),
+                "learned": self.learned,
+                "max_learned": self.max_learned,
+                "unslotted_terms": self.unslotted,
+                "categories": {c: len(i) for c, i in self._by_category.items()}
+            }
+
+
+_preference_vocabulary: Optional[PreferenceVocabulary] = None
+_preference_vocabulary_lock = threading.Lock()
+
+
+def get_preference_vocabulary() -> PreferenceVocabulary:
+    """Process-wide vocabulary shared by every preference vector"""
+    global _preference_vocabulary
+    with _preference_vocabulary_lock:
+        if _preference_vocabulary is None:
+            _preference_vocabulary = PreferenceVocabulary(max_learned=settings.PREFERENCE_VOCAB_MAX_LEARNED)
+            register_metrics("preference_vocabulary", _preference_vocabulary.stats)
+        return _preference_vocabulary
@@ -0,0 +1,228 @@
+import atexit
+import copy
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.agents.tools.preference_store import PathLike, PreferenceStore, apply_changes, get_preference_store
+from app.core.config import settings
+from app.core.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingWrite:
+    """Coalesced, not yet stored changes for one user: a whole profile, or fields to set and items to append"""
+
+    def __init__(self, enqueued_at: float):
+        self.enqueued_at = enqueued_at
+        self.profile: Optional[Dict[str, Any]] = None
+        self.sets: Dict[PathLike, Any] = {}
+        self.appends: Dict[PathLike, List[Any]] = {}
+        self.updates = 0
+
+    def merge(self, later: "_PendingWrite"):
+        """Fold `later` changes into this (older) pending write"""
+        if later.profile is not None:
+            self.profile = later.profile
+            self.sets, self.appends = {}, {}
+        elif self.profile is not None:
+            apply_changes(self.profile, later.sets, later.appends)
+        else:
+            self.sets.update(later.sets)
+            for path, items in later.appends.items():
+                self.appends.setdefault(path, []).extend(items)
+        self.enqueued_at = min(self.enqueued_at, later.enqueued_at)
+        self.updates += later.updates
+
+
+class PreferenceWriteBehind:
+    """
+    Write-behind queue in front of a PreferenceStore.
+
+    Learning updates are queued in memory and return straight away; several
+    updates to one profile are coalesced into a single write (later values
+    win, list appends accumulate). A background thread flushes every pending
+    profile in one `write_batch` every `interval` seconds, or sooner once
+    `max_pending` users are waiting. Call `close()` (registered with atexit)
+    to flush on shutdown.
+
+    Readers must see queued changes through the in-memory profile they came
+    from (PreferenceLearningSystem's cache); the store lags by up to one
+    flush, reported as flush lag.
+    """
+
+    def __init__(self, store: PreferenceStore, interval: float = 2.0, max_pending: int = 256):
+        self.store = store
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: Dict[str, _PendingWrite] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self.enqueued = 0
+        self.flushes = 0
+        self.profiles_written = 0
+        self.failures = 0
+        self.last_flush_lag_ms = 0.0
+        self.max_flush_lag_ms = 0.0
+        self.flush_lag_ms_total = 0.0
+        self._thread = threading.Thread(target=self._run, name="preference-write-behind", daemon=True)
+        self._thread.start()
+
+    def _enqueue(self, user_id: str, write: _PendingWrite):
+        if self._closed:
+            # Shutting down: nothing will flush later, write through
+            self._pending_write(user_id, write)
+            return
+        with self._lock:
+            pending = self._pending.get(user_id)
+            if pending is None:
+                self._pending[user_id] = write
+            else:
+                pending.merge(write)
+            self.enqueued += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def _pending_write(self, user_id: str, write: _PendingWrite):
+        with self._lock:
+            pending = self._pending.pop(user_id, None)
+        if pending is not None:
+            pending.merge(write)
+            write = pending
+        self._write({user_id: write})
+
+    def put(self, user_id: str, profile: Dict[str, Any]):
+        """Queue a whole profile (snapshotted now, so later in-place edits don't leak into the write)"""
+        write = _PendingWrite(time.monotonic())
+        write.profile = copy.deepcopy(profile)
+        write.updates = 1
+        self._enqueue(user_id, write)
+
+    def update(self, user_id: str, sets: Dict[PathLike, Any], appends: Optional[Dict[PathLike, List[Any]]] = None):
+        """Queue a partial update"""
+        write = _PendingWrite(time.monotonic())
+        write.sets = copy.deepcopy(sets)
+        write.appends = {path: copy.deepcopy(items) for path, items in (appends or {}).items()}
+        write.updates = 1
+        self._enqueue(user_id, write)
+
+    def discard(self, user_id: str) -> bool:
+        """Drop queued changes for a user, waiting for a flush in flight (which may still write them) to finish"""
+        with self._flush_lock:
+            with self._lock:
+                return self._pending.pop(user_id, None) is not None
+
+    def delete(self, user_id: str, delete: Callable[[], Any]) -> Any:
+        """
+        Drop queued changes for a user and run `delete` (removing their stored
+        profile) with no flush in flight, so neither a flush that already took
+        the changes nor a retry of a failed one can write the profile back.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._pending.pop(user_id, None)
+            return delete()
+
+    def has_pending(self, user_id: str) -> bool:
+        with self._lock:
+            return user_id in self._pending
+
+    def _write(self, batch: Dict[str, _PendingWrite]) -> bool:
+        puts = {user_id: write.profile for user_id, write in batch.items() if write.profile is not None}
+        updates = {user_id: (write.sets, write.appends) for user_id, write in batch.items() if write.profile is None}
+        try:
+            missing = self.store.write_batch(puts, updates)
+            if missing:
+                # Partial updates for users the store doesn't know; nothing to apply them to
+                logger.warning(f"Dropped preference updates for {len(missing)} users without a stored profile")
+        except Exception as e:
+            logger.error(f"Preference flush of {len(batch)} profiles failed: {e}")
+            self.failures += 1
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            for write in batch.values():
+                lag_ms = (now - write.enqueued_at) * 1000
+                self.flush_lag_ms_total += lag_ms
+                self.max_flush_lag_ms = max(self.max_flush_lag_ms, lag_ms)
+                self.last_flush_lag_ms = lag_ms
+            self.profiles_written += len(batch)
+        return True
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number of profiles written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            if self._write(batch):
+                self.flushes += 1
+                return len(batch)
+            # Put the batch back in front of anything queued meanwhile, for the next flush
+            with self._lock:
+                for user_id, newer in self._pending.items():
+                    if user_id in batch:
+                        batch[user_id].merge(newer)
+                    else:
+                        batch[user_id] = newer
+                self._pending = batch
+            return 0
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Preference write-behind flush failed: {e}")
+
+    def close(self):
+        """Stop the flusher and write whatever is still queued"""
+        self._closed = True
+        self._wake.set()
+        self._thread.join(5)
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            oldest = min((write.enqueued_at for write in self._pending.values()), default=None)
+            pending = len(self._pending)
+        return {
+            "pending_profiles": pending,
+            "enqueued_updates": self.enqueued,
+            "flushes": self.flushes,
+            "profiles_written": self.profiles_written,
+            "coalesced_updates": max(0, self.enqueued - self.profiles_written - pending),
+            "failures": self.failures,
+            "current_lag_ms": round((time.monotonic() - oldest) * 1000, 1) if oldest is not None else 0.0,
+            "last_flush_lag_ms": round(self.last_flush_lag_ms, 1),
+            "max_flush_lag_ms": round(self.max_flush_lag_ms, 1),
+            "avg_flush_lag_ms": round(self.flush_lag_ms_total / self.profiles_written, 1) if self.profiles_written else 0.0
+        }
+
+
+_preference_writer: Optional[PreferenceWriteBehind] = None
+_preference_writer_lock = threading.Lock()
+
+
+def get_preference_writer() -> PreferenceWriteBehind:
+    """Process-wide write-behind queue for the shared preference store; flushed at exit"""
+    global _preference_writer
+    with _preference_writer_lock:
+        if _preference_writer is None:
+            _preference_writer = PreferenceWriteBehind(
+                get_preference_store(),
+                interval=settings.PREFERENCE_FLUSH_INTERVAL,
+                max_pending=settings.PREFERENCE_FLUSH_MAX_PENDING
+            )
+            atexit.register(_preference_writer.close)
+            register_metrics("preference_write_behind", _preference_writer.stats)
+        return _preference_writer
@@ -0,0 +1,213 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EvictCallback = Callable[[str, Dict[str, Any], bool], None]
+
+
+def profile_size(profile: Dict[str, Any]) -> int:
+    """Approximate resident size of a profile: its serialized length in bytes"""
+    return len(json.dumps(profile, default=str).encode("utf-8"))
+
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value, default=str).encode("utf-8"))
+
+
+def changes_size(before: Dict[str, Any], sets: Dict[Tuple[str, ...], Any], appends: Dict[Tuple[str, ...], List[Any]]) -> int:
+    """
+    Change in `profile_size` from applying `profile_changes(before, after)`
+    to `before`, measuring only the changed values instead of the profile
+    """
+    delta = 0
+    filled = set()  # containers that were empty; their first entry has no ", "
+
+    def separator(container) -> int:
+        if container or id(container) in filled:
+            return 2
+        filled.add(id(container))
+        return 0
+
+    def lookup(path):
+        target = before
+        for key in path:
+            target = target.get(key) if isinstance(target, dict) else None
+        return target
+
+    for path, value in sets.items():
+        *parents, key = path
+        target = lookup(parents)
+        if isinstance(target, dict) and key in target:
+            delta += _json_size(value) - _json_size(target[key])
+        else:
+            delta += _json_size(key) + 2 + _json_size(value) + separator(target)  # '"key": value'
+    for path, items in appends.items():
+        target = lookup(path)
+        delta += sum(_json_size(item) + separator(target) for item in items)
+    return delta
+
+
+class _CachedProfile:
+    __slots__ = ("profile", "size", "expires_at", "dirty")
+
+    def __init__(self, profile: Dict[str, Any], size: int, expires_at: float, dirty: bool):
+        self.profile = profile
+        self.size = size
+        self.expires_at = expires_at
+        self.dirty = dirty
+
+
+class ProfileCache:
+    """
+    In-memory cache of user preference profiles, bounded by entry count and
+    by approximate resident bytes, with LRU eviction and a time-to-live.
+
+    Cached profiles are the live objects handed to callers, so hot users are
+    served (and updated) from memory. An entry is dirty while it holds changes
+    storage hasn't accepted. Every entry that is evicted or expires is passed
+    to `on_evict(user_id, profile, dirty)`, so dirty ones can be written back
+    instead of being lost.
+    """
+
+    def __init__(self, maxsize: int = 1024, max_bytes: int = 32 * 1024 * 1024, ttl: float = 900.0,
+                 on_evict: Optional[EvictCallback] = None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data: "OrderedDict[str, _CachedProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.write_backs = 0
+
+    def _remove(self, user_id: str) -> _CachedProfile:
+        entry = self._data.pop(user_id)
+        self.resident_bytes -= entry.size
+        return entry
+
+    def _evicted(self, dropped: List[Tuple[str, _CachedProfile]]):
+        """Hand entries that left the cache to `on_evict` (outside the cache lock)"""
+        if self.on_evict is None:
+            return
+        for user_id, entry in dropped:
+            try:
+                self.on_evict(user_id, entry.profile, entry.dirty)
+                if entry.dirty:
+                    self.write_backs += 1
+            except Exception as e:
+                logger.error(f"Handling evicted profile {user_id} failed: {e}")
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        dropped = []
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                dropped.append((user_id, self._remove(user_id)))
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._data.move_to_end(user_id)
+                self.hits += 1
+        self._evicted(dropped)
+        return entry.profile if entry is not None else None
+
+    def _trim(self) -> List[Tuple[str, _CachedProfile]]:
+        """Evict least recently used users past the caps (caller holds the cache lock)"""
+        dropped = []
+        while self._data and (len(self._data) > self.maxsize or self.resident_bytes > self.max_bytes):
+            evicted_id = next(iter(self._data))
+            dropped.append((evicted_id, self._remove(evicted_id)))
+            self.evictions += 1
+        return dropped
+
+    def set(self, user_id: str, profile: Dict[str, Any], dirty: bool = False):
+        """Cache `profile` (re-measuring its size), evicting least recently used users past the caps"""
+        entry = _CachedProfile(profile, profile_size(profile), time.monotonic() + self.ttl, dirty)
+        with self._lock:
+            if user_id in self._data:
+                self._remove(user_id)
+            self._data[user_id] = entry
+            self.resident_bytes += entry.size
+            dropped = self._trim()
+        self._evicted(dropped)
+
+    def update(self, user_id: str, profile: Dict[str, Any], size_delta: int, dirty: bool = False):
+        """
+        Re-cache a profile changed in place, adjusting its size by `size_delta`
+        (see `changes_size`) instead of re-measuring it. Falls back to `set`
+        when the user's entry is gone or holds another object.
+        """
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None or entry.profile is not profile:
+                dropped = None
+            else:
+                entry.size += size_delta
+                entry.expires_at = time.monotonic() + self.ttl
+                entry.dirty = dirty
+                self.resident_bytes += size_delta
+                self._data.move_to_end(user_id)
+                dropped = self._trim()
+        if dropped is None:
+            self.set(user_id, profile, dirty)
+        else:
+            self._evicted(dropped)
+
+    def pop(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Drop a user without writing anything back (e.g. their data was deleted)"""
+        with self._lock:
+            if user_id not in self._data:
+                return None
+            return self._remove(user_id).profile
+
+    def is_dirty(self, user_id: str) -> bool:
+        with self._lock:
+            entry = self._data.get(user_id)
+            return entry is not None and entry.dirty
+
+    def clear(self):
+        dropped = []
+        with self._lock:
+            while self._data:
+                dropped.append(self._data.popitem(last=False))
+            self.resident_bytes = 0
+        self._evicted(dropped)
+
+    def __contains__(self, user_id: str) -> bool:
+        """Whether the user is cached and fresh (doesn't count as a lookup)"""
+        with self._lock:
+            entry = self._data.get(user_id)
+            return entry is not None and entry.expires_at > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        with self._lock:
+            dirty = sum(1 for entry in self._data.values() if entry.dirty)
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "resident_bytes": self.resident_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "dirty": dirty,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "write_backs": self.write_backs,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+        }
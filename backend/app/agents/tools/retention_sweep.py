@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .preference_store import ActivityKey, PreferenceStore
+
+logger = logging.getLogger(__name__)
+
+# archive(user_id, updated_before) -> True if the profile was archived
+ArchiveFn = Callable[[str, float], bool]
+
+
+class RetentionSweep:
+    """
+    Incremental retention sweep over a PreferenceStore's last-activity index.
+
+    Each step pages through profiles last written before the cutoff, oldest
+    first, and hands them to `archive`; profiles that are still active are
+    never read. The position in the index is checkpointed after every page
+    (to `checkpoint_path` when given), so a sweep that is stopped or limited
+    to `max_users` resumes where it left off, and archives are paced to
+    `max_per_second` so a sweep doesn't cause an I/O spike. A pass ends when
+    no expired profiles are left after the position; the next one starts from
+    the oldest again, revisiting users that were skipped.
+    """
+
+    def __init__(self, store: PreferenceStore, archive: ArchiveFn, checkpoint_path: Optional[str] = None,
+                 batch_size: int = 100, max_per_second: float = 20.0):
+        self.store = store
+        self.archive = archive
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = batch_size
+        self.max_per_second = max_per_second
+        self.cursor: Optional[ActivityKey] = None
+        self.passes = 0
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._next_at = 0.0
+        self.examined = 0
+        self.archived = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_run_at: Optional[float] = None
+        self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.cursor = tuple(state["cursor"]) if state.get("cursor") else None
+            self.passes = state.get("passes", 0)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Ignoring unreadable retention sweep checkpoint {self.checkpoint_path}: {e}")
+
+    def _save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.checkpoint_path)), exist_ok=True)
+            tmp_path = f"{self.checkpoint_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"cursor": list(self.cursor) if self.cursor else None, "passes": self.passes}, f)
+            os.replace(tmp_path, self.checkpoint_path)
+        except OSError as e:
+            logger.error(f"Could not save retention sweep checkpoint: {e}")
+
+    def _pace(self) -> bool:
+        """Wait for the next archive slot; False if the sweep was stopped meanwhile"""
+        if self.max_per_second <= 0:
+            return not self._stop.is_set()
+        now = time.monotonic()
+        if self._next_at > now and self._stop.wait(self._next_at - now):
+            return False
+        self._next_at = max(now, self._next_at) + 1.0 / self.max_per_second
+        return not self._stop.is_set()
+
+    def run(self, max_age: float, max_users: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Archive profiles not written for `max_age` seconds, continuing from the
+        saved position; stops after examining `max_users` profiles, at the end
+        of the pass, or when the sweep is stopped.
+        """
+        cutoff = time.time() - max_age
+        examined = archived = 0
+        with self._run_lock:
+            self.last_run_at = time.time()
+            while max_users is None or examined < max_users:
+                limit = self.batch_size if max_users is None else min(self.batch_size, max_users - examined)
+                page = self.store.stale_users(cutoff, limit, self.cursor)
+                for key in page:
+                    if not self._pace():
+                        self._save_checkpoint()
+                        return self._result(examined, archived)
+                    try:
+                        if self.archive(key[1], cutoff):
+                            archived += 1
+                        else:
+                            self.skipped += 1
+                    except Exception as e:
+                        logger.error(f"Error archiving profile {key[1]}: {e}")
+                        self.failures += 1
+                    self.cursor = key
+                    examined += 1
+                if len(page) < limit:
+                    # Nothing expired beyond the position: pass complete
+                    self.cursor = None
+                    self.passes += 1
+                    self._save_checkpoint()
+                    break
+                self._save_checkpoint()
+        if archived:
+            logger.info(f"Retention sweep archived {archived} of {examined} expired preference profiles")
+        return self._result(examined, archived)
+
+    def _result(self, examined: int, archived: int) -> Dict[str, Any]:
+        self.examined += examined
+        self.archived += archived
+        return {"examined": examined, "archived": archived, "pass_complete": self.cursor is None}
+
+    def start(self, max_age: float, interval: float):
+        """Sweep in a background thread every `interval` seconds until `stop()`"""
+        if self._thread is not None:
+            return
+
+        def _loop():
+            while not self._stop.is_set():
+                try:
+                    self.run(max_age)
+                except Exception as e:
+                    logger.error(f"Retention sweep failed: {e}")
+                self._stop.wait(interval)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=_loop, name="preference-retention-sweep", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Interrupt a running sweep (its position is saved) and stop the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "passes": self.passes,
+            "examined": self.examined,
+            "archived": self.archived,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "in_pass": self.cursor is not None,
+            "position_updated_at": self.cursor[0] if self.cursor else None,
+            "last_run_at": self.last_run_at,
+            "max_per_second": self.max_per_second,
+            "background": self._thread is not None
+        }
@@ -0,0 +1,144 @@
+import heapq
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Objectives, all expressed as costs (lower is better)
+OBJECTIVES = ("max_distance", "distance_variance", "rating", "safety", "price_fit")
+
+# Minimax fairness first: the worst-off member's trip dominates the score
+DEFAULT_WEIGHTS = {
+    "max_distance": 0.4,
+    "distance_variance": 0.15,
+    "rating": 0.2,
+    "safety": 0.15,
+    "price_fit": 0.1,
+}
+
+NEUTRAL_RATING = 6.0
+BUDGET_LEVELS = {"budget": 1, "cheap": 1, "affordable": 1, "moderate": 2, "expensive": 3, "luxury": 4}
+
+
+class TopK:
+    """
+    Incremental top-k by lowest score: a bounded max-heap, so feeding n
+    candidates costs O(n log k) and nothing is ever fully sorted. Ties are
+    broken by `key` so results are deterministic.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[Tuple[float, Any, int, Any]] = []
+        self._count = 0
+
+    def push(self, score: float, key: Any, item: Any):
+        # heapq is a min-heap; negate so the root is the current worst kept entry
+        entry = (-score, _Reversed(key), -self._count, item)
+        self._count += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self) -> List[Tuple[float, Any]]:
+        """(score, item) pairs, best first"""
+        return [(-neg, item) for neg, _, _, item in sorted(self._heap, reverse=True)]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class _Reversed:
+    """Inverts ordering of a tie-break key inside the negated heap"""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return self.key > other.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+def price_target(budgets: Sequence[str]) -> Optional[float]:
+    """Average Foursquare price level (1-4) the group's stated budgets point to"""
+    levels = [BUDGET_LEVELS[b.lower()] for b in budgets if isinstance(b, str) and b.lower() in BUDGET_LEVELS]
+    return sum(levels) / len(levels) if levels else None
+
+
+def cost_matrix(
+    max_distance: np.ndarray,
+    distance_variance: np.ndarray,
+    venues: Sequence[Dict[str, Any]],
+    target_price: Optional[float] = None
+) -> np.ndarray:
+    """(n_venues, len(OBJECTIVES)) array of costs for the candidate set"""
+    ratings = np.array([v.get("rating") or NEUTRAL_RATING for v in venues], dtype=float)
+    safety = np.array([v.get("safety_score", 6.0) for v in venues], dtype=float)
+    if target_price is None:
+        price_fit = np.zeros(len(venues))
+    else:
+        price_fit = np.array(
+            [abs(v["price"] - target_price) if v.get("price") else 1.0 for v in venues], dtype=float
+        )
+    return np.column_stack((max_distance, distance_variance, -ratings, -safety, price_fit))
+
+
+def pareto_front(costs: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask of non-dominated rows: no other venue is at least as good on
+    every objective and strictly better on one.
+    """
+    if len(costs) == 0:
+        return np.zeros(0, dtype=bool)
+    no_worse = (costs[:, None, :] <= costs[None, :, :]).all(axis=2)
+    better = (costs[:, None, :] < costs[None, :, :]).any(axis=2)
+    dominated = (no_worse & better).any(axis=0)
+    return ~dominated
+
+
+def scalarize(costs: np.ndarray, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Weighted sum of min-max normalised costs, in [0, 1] (0 = best on every objective)"""
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    w = np.array([weights[name] for name in OBJECTIVES], dtype=float)
+    lo, hi = costs.min(axis=0), costs.max(axis=0)
+    span = np.where(hi > lo, hi - lo, 1.0)
+    return ((costs - lo) / span) @ (w / w.sum())
+
+
+def rank_venues(
+    venues: Sequence[Dict[str, Any]],
+    costs: np.ndarray,
+    k: int = 10,
+    weights: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """
+    Rank candidates on all objectives at once.
+
+    Returns the top-k venues by weighted score (each annotated with
+    `fairness_score`, higher is better, and `pareto_optimal`) and the full
+    Pareto front, so callers can offer trade-offs the weights would hide.
+    """
+    if len(venues) == 0:
+        return {"ranked": [], "pareto_front": []}
+
+    scores = scalarize(costs, weights)
+    on_front = pareto_front(costs)
+
+    top = TopK(k)
+    for i, venue in enumerate(venues):
+        key = (venue.get("fsq_place_id") or venue.get("fsq_id") or "", venue.get("name", ""), i)
+        top.push(float(scores[i]), key, i)
+
+    ranked = []
+    for score, i in top.items():
+        ranked.append({
+            **venues[i],
+            "fairness_score": round(1.0 - score, 3),
+            "pareto_optimal": bool(on_front[i])
+        })
+    pareto = [venues[i] for i in np.flatnonzero(on_front)]
+    return {"ranked": ranked, "pareto_front": pareto}
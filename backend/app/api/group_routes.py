@@ -3,9 +3,12 @@ from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 import logging
 import traceback
+import uuid
 from datetime import datetime
 
 from ..agents.group_agent import GroupCoordinationAgent
+from ..core.executor import get_route_limits
+from ..core.sse import cancel_stream, sse_response
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -44,6 +47,36 @@ except Exception as e:
     logger.error(f"❌ Failed to initialize group coordination agent: {e}")
     group_agent = None
 
+def _validated_members(request: GroupCoordinationRequest) -> List[Dict[str, Any]]:
+    """Check the agent and request are usable and convert members to the dicts the agent expects"""
+    # Validate that group agent is initialized
+    if group_agent is None:
+        raise HTTPException(
+            status_code=500, 
+            detail="Group coordination agent not initialized. Please check server configuration."
+        )
+    
+    # Validate request
+    if not request.members or len(request.members) < 2:
+        raise HTTPException(
+            status_code=400,
+            detail="At least 2 group members are required for coordination"
+        )
+    
+    # Convert Pydantic models to dictionaries for the agent
+    members_dict = []
+    for member in request.members:
+        member_dict = {
+            "name": member.name,
+            "age": member.age,
+            "gender": member.gender,
+            "location": member.location,
+            "preferences": member.preferences or {},
+            "constraints": member.constraints or {}
+        }
+        members_dict.append(member_dict)
+    return members_dict
+
 @router.post("/coordinate", response_model=GroupCoordinationResponse)
 async def coordinate_group_meetup(
     request: GroupCoordinationRequest = Body(..., description="Group coordination request")
@@ -67,43 +100,19 @@ async def coordinate_group_meetup(
     start_time = datetime.now()
     
     try:
-        # Validate that group agent is initialized
-        if group_agent is None:
-            raise HTTPException(
-                status_code=500, 
-                detail="Group coordination agent not initialized. Please check server configuration."
-            )
-        
-        # Validate request
-        if not request.members or len(request.members) < 2:
-            raise HTTPException(
-                status_code=400,
-                detail="At least 2 group members are required for coordination"
-            )
-        
-        # Convert Pydantic models to dictionaries for the agent
-        members_dict = []
-        for member in request.members:
-            member_dict = {
-                "name": member.name,
-                "age": member.age,
-                "gender": member.gender,
-                "location": member.location,
-                "preferences": member.preferences or {},
-                "constraints": member.constraints or {}
-            }
-            members_dict.append(member_dict)
+        members_dict = _validated_members(request)
         
         logger.info(f"🤝 Starting group coordination for {len(members_dict)} members")
         logger.info(f"📍 Meeting purpose: {request.meeting_purpose or 'General meetup'}")
         logger.info(f"⚡ Quick mode: {request.quick_mode}")
         
-        # Process the coordination request
-        coordination_results = await group_agent.coordinate_group_meetup(
-            members=members_dict,
-            meeting_time=None,  # Can be extended later to support specific meeting times
-            meeting_purpose=request.meeting_purpose
-        )
+        # Process the coordination request (503 with Retry-After if group mode is saturated)
+        with get_route_limits().slot("group"):
+            coordination_results = await group_agent.coordinate_group_meetup(
+                members=members_dict,
+                meeting_time=None,  # Can be extended later to support specific meeting times
+                meeting_purpose=request.meeting_purpose
+            )
         
         # Calculate processing time
         processing_time = (datetime.now() - start_time).total_seconds()
@@ -139,6 +148,53 @@ async def coordinate_group_meetup(
             detail=f"Internal server error during group coordination: {str(e)}"
         )
 
+@router.post("/coordinate/stream")
+async def stream_group_coordination(
+    request: GroupCoordinationRequest = Body(..., description="Group coordination request")
+):
+    """
+    Coordinate a group meetup, streaming partial results as Server-Sent Events
+
+    Events, in order:
+    - `stream`: the stream id, for DELETE /coordinate/stream/{stream_id}
+    - `fair_point`: fair meeting coordinates, resolved member locations and the execution plan
+    - `venues`: scored venues, one event per search anchor as its results arrive (structured requests only)
+    - `ranking`, `safety`, `personalization`: once every anchor is in (structured requests only)
+    - `result`: the same results /coordinate returns
+    - `error` or `cancelled` end the stream early
+
+    Closing the connection or calling the DELETE endpoint cancels the venue searches still in flight.
+    """
+    members_dict = _validated_members(request)
+    release = get_route_limits().acquire("group")
+    stream_id = uuid.uuid4().hex
+
+    async def produce(emit):
+        start_time = datetime.now()
+        await emit("stream", {"stream_id": stream_id})
+        logger.info(f"🤝 Streaming group coordination {stream_id} for {len(members_dict)} members")
+
+        coordination_results = await group_agent.coordinate_group_meetup(
+            members=members_dict,
+            meeting_time=None,
+            meeting_purpose=request.meeting_purpose,
+            emit=emit
+        )
+        processing_time = (datetime.now() - start_time).total_seconds()
+        if coordination_results.get("status") == "error":
+            await emit("error", {"error": coordination_results.get("error", "Unknown coordination error")})
+            return
+        await emit("result", {"results": coordination_results, "processing_time": processing_time})
+
+    return sse_response(produce, stream_id=stream_id, on_close=release)
+
+@router.delete("/coordinate/stream/{stream_id}")
+async def cancel_group_coordination(stream_id: str):
+    """Cancel a streaming coordination; its in-flight upstream calls are aborted"""
+    if not cancel_stream(stream_id):
+        raise HTTPException(status_code=404, detail="No active stream with that id")
+    return {"status": "cancelled", "stream_id": stream_id, "timestamp": datetime.now().isoformat()}
+
 @router.get("/health")
 async def group_health_check():
     """
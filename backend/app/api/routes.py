@@ -2,10 +2,13 @@ from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 import asyncio
+import json
 from datetime import datetime
 
 from ..agents.solo_agent import create_solo_agent
 from ..core.config import settings
+from ..core.executor import get_agent_executor, get_route_limits
+from ..core.sse import sse_response
 
 # Create router
 router = APIRouter()
@@ -71,15 +74,12 @@ async def process_solo_query(request: QueryRequest):
         if not request.query or not request.query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty")
         
-        # Get solo agent
-        agent = get_solo_agent()
-        
-        # Process query
-        result = await asyncio.to_thread(
-            agent.process_query,
-            request.query,
-            request.user_location
-        )
+        with get_route_limits().slot("solo"):
+            # Get solo agent
+            agent = await get_agent_executor().run(get_solo_agent)
+
+            # Process query (blocking stages run on the agent executor)
+            result = await agent.aprocess_query(request.query, request.user_location)
         
         end_time = datetime.now()
         processing_time = (end_time - start_time).total_seconds()
@@ -114,6 +114,58 @@ async def process_solo_query(request: QueryRequest):
         )
 
 
+def _venues_from_search(search_result: Any) -> List[Dict[str, Any]]:
+    """Venue list out of the search stage's JSON text (empty for errors and no-results)"""
+    try:
+        venues = json.loads(search_result) if isinstance(search_result, str) else search_result
+    except json.JSONDecodeError:
+        return []
+    return venues if isinstance(venues, list) else []
+
+
+@router.post("/solo/query/stream")
+async def stream_solo_query(request: QueryRequest):
+    """
+    Process a natural language query in solo mode, streaming results as Server-Sent Events
+
+    Events, in the order they become available:
+    - `intent`: structured intent
+    - `location`: resolved search coordinates
+    - `venue`: one per place found, before any recommendation is written
+    - `recommendations`: the same payload /solo/query returns in `data`
+    - `error`: if processing fails; the stream ends after it
+    """
+    if not request.query or not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    release = get_route_limits().acquire("solo")
+
+    async def produce(emit):
+        start_time = datetime.now()
+        agent = await get_agent_executor().run(get_solo_agent)
+        sent_venues = set()
+
+        async def on_result(stage: str, result: Any):
+            if stage in ("intent", "location"):
+                await emit(stage, result)
+            elif stage in ("speculative_search", "search"):
+                # A confirmed speculative search sends its venues early (without details);
+                # the search stage returns the same places with details, so send each venue once
+                for venue in _venues_from_search(result):
+                    key = venue.get("fsq_id") or venue.get("name")
+                    if key not in sent_venues:
+                        sent_venues.add(key)
+                        await emit("venue", venue)
+
+        result = await agent.aprocess_query(request.query, request.user_location, on_result=on_result)
+        processing_time = (datetime.now() - start_time).total_seconds()
+        if result.get("status") == "success":
+            await emit("recommendations", {**result, "processing_time": processing_time})
+        else:
+            await emit("error", {"error": result.get("error", "Unknown error occurred"), "processing_time": processing_time})
+
+    return sse_response(produce, on_close=release)
+
+
 @router.post("/solo/place-details", response_model=APIResponse)
 async def get_place_details(request: PlaceDetailsRequest):
     """
@@ -124,15 +176,16 @@ async def get_place_details(request: PlaceDetailsRequest):
     start_time = datetime.now()
     
     try:
-        # Get solo agent
-        agent = get_solo_agent()
-        
-        # Get place details
-        result = await asyncio.to_thread(
-            agent.get_place_details,
-            request.fsq_place_id,
-            request.fields
-        )
+        with get_route_limits().slot("solo"):
+            # Get solo agent
+            agent = await get_agent_executor().run(get_solo_agent)
+
+            # Get place details
+            result = await get_agent_executor().run(
+                agent.get_place_details,
+                request.fsq_place_id,
+                request.fields
+            )
         
         end_time = datetime.now()
         processing_time = (end_time - start_time).total_seconds()
@@ -153,6 +206,8 @@ async def get_place_details(request: PlaceDetailsRequest):
                 processing_time=processing_time
             )
             
+    except HTTPException:
+        raise
     except Exception as e:
         end_time = datetime.now()
         processing_time = (end_time - start_time).total_seconds()
@@ -4,6 +4,18 @@ from dotenv import load_dotenv
 # Load .env file
 load_dotenv()
 
+# backend/ (holds run.py and data/)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def data_path(name: str, default: str) -> str:
+    """Path setting; a relative path is taken from the backend directory, not the working directory"""
+    path = os.getenv(name, default)
+    if not path or path == ":memory:":
+        return path
+    return os.path.join(BACKEND_DIR, path)
+
+
 class Settings:
     APP_NAME: str = os.getenv("APP_NAME", "Coordin-AI-te Backend")
     APP_ENV: str = os.getenv("APP_ENV", "development")
@@ -16,6 +28,109 @@ class Settings:
     GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 
     FSQ_API_KEY = os.getenv("FSQ_API_KEY")
+    FSQ_BASE_URL = os.getenv("FSQ_BASE_URL", "https://places-api.foursquare.com")
+    FSQ_API_VERSION = os.getenv("FSQ_API_VERSION", "2025-06-17")
+
+    # Foursquare place-search response cache
+    FSQ_SEARCH_CACHE_SIZE = int(os.getenv("FSQ_SEARCH_CACHE_SIZE", 1024))
+    FSQ_SEARCH_CACHE_TTL = float(os.getenv("FSQ_SEARCH_CACHE_TTL", 900))
+    FSQ_SEARCH_CACHE_GEOHASH_PRECISION = int(os.getenv("FSQ_SEARCH_CACHE_GEOHASH_PRECISION", 7))
+    FSQ_DETAILS_CACHE_SIZE = int(os.getenv("FSQ_DETAILS_CACHE_SIZE", 2048))
+
+    # Concurrent place-details fan-out
+    FSQ_DETAILS_MAX_IN_FLIGHT = int(os.getenv("FSQ_DETAILS_MAX_IN_FLIGHT", 8))
+    FSQ_DETAILS_DEADLINE = float(os.getenv("FSQ_DETAILS_DEADLINE", 3.0))
+
+    # Group-mode candidate generation (one search per anchor around the fair point)
+    FSQ_GROUP_MAX_SEARCHES = int(os.getenv("FSQ_GROUP_MAX_SEARCHES", 7))
+    FSQ_GROUP_SEARCH_BUDGET = float(os.getenv("FSQ_GROUP_SEARCH_BUDGET", 4.0))
+    FSQ_GROUP_HEX_KM = float(os.getenv("FSQ_GROUP_HEX_KM", 1.5))
+    FSQ_GROUP_ANCHOR_RADIUS = int(os.getenv("FSQ_GROUP_ANCHOR_RADIUS", 2000))
+    FSQ_GROUP_ANCHOR_LIMIT = int(os.getenv("FSQ_GROUP_ANCHOR_LIMIT", 10))
+
+    # Group requests with fully structured data skip the CrewAI crew; latency objective for that path
+    GROUP_DIRECT_SLO_MS = float(os.getenv("GROUP_DIRECT_SLO_MS", 5000))
+
+    # Foursquare rate limiting (shared by every Foursquare caller in the process)
+    FSQ_RATE_LIMIT_RPS = float(os.getenv("FSQ_RATE_LIMIT_RPS", 10))
+    FSQ_RATE_LIMIT_BURST = float(os.getenv("FSQ_RATE_LIMIT_BURST", 20))
+    FSQ_RATE_LIMIT_PER_CALLER_RPS = float(os.getenv("FSQ_RATE_LIMIT_PER_CALLER_RPS", 2))
+    FSQ_RATE_LIMIT_PER_CALLER_BURST = float(os.getenv("FSQ_RATE_LIMIT_PER_CALLER_BURST", 10))
+    FSQ_RATE_LIMIT_QUEUE_TIMEOUT = float(os.getenv("FSQ_RATE_LIMIT_QUEUE_TIMEOUT", 10))
+    FSQ_MAX_RETRIES = int(os.getenv("FSQ_MAX_RETRIES", 2))
+    FSQ_CREDITS_COOLDOWN = float(os.getenv("FSQ_CREDITS_COOLDOWN", 300))
+
+    # Persistent geocode cache (forward + reverse, local SQLite)
+    GEOCODE_CACHE_PATH = data_path("GEOCODE_CACHE_PATH", "data/geocode_cache.sqlite3")
+    GEOCODE_CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", 50000))
+    GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", 30 * 24 * 60 * 60))
+    GEOCODE_CACHE_NEGATIVE_TTL = float(os.getenv("GEOCODE_CACHE_NEGATIVE_TTL", 24 * 60 * 60))
+    GEOCODE_CACHE_WARMUP_FILE = data_path("GEOCODE_CACHE_WARMUP_FILE", "")
+
+    # Offline gazetteer of known localities, consulted before any geocoding API
+    GAZETTEER_PATH = os.getenv(
+        "GAZETTEER_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "gazetteer_bangalore.json")
+    )
+
+    # Rule-based intent parser: queries parsed with at least this confidence skip the intent LLM
+    INTENT_PARSER_CONFIDENCE = float(os.getenv("INTENT_PARSER_CONFIDENCE", 0.8))
+
+    # LLM response cache (exact + semantic match on the varying part of a prompt, local SQLite)
+    LLM_CACHE_PATH = data_path("LLM_CACHE_PATH", "data/llm_cache.sqlite3")
+    LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 6 * 60 * 60))
+    LLM_CACHE_SIMILARITY = float(os.getenv("LLM_CACHE_SIMILARITY", 0.92))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 5000))
+
+    # User preference profiles: "sqlite" (local file) or "firestore" (shared across instances)
+    PREFERENCE_STORE = os.getenv("PREFERENCE_STORE", "sqlite").lower()
+    PREFERENCE_DB_PATH = data_path("PREFERENCE_DB_PATH", "data/preferences.sqlite3")
+    PREFERENCE_FIRESTORE_COLLECTION = os.getenv("PREFERENCE_FIRESTORE_COLLECTION", "user_preferences")
+    # Preference updates are queued and written in batches every interval (seconds) or once this many users wait
+    PREFERENCE_FLUSH_INTERVAL = float(os.getenv("PREFERENCE_FLUSH_INTERVAL", 2.0))
+    PREFERENCE_FLUSH_MAX_PENDING = int(os.getenv("PREFERENCE_FLUSH_MAX_PENDING", 256))
+    # Hot profiles are kept in memory: at most this many users / megabytes, each for up to TTL seconds
+    PREFERENCE_CACHE_SIZE = int(os.getenv("PREFERENCE_CACHE_SIZE", 1024))
+    PREFERENCE_CACHE_MAX_MB = float(os.getenv("PREFERENCE_CACHE_MAX_MB", 32))
+    PREFERENCE_CACHE_TTL = float(os.getenv("PREFERENCE_CACHE_TTL", 900))
+    # Profiles not updated for this many days are archived by a background sweep every interval (seconds, 0 = off),
+    # a batch of users per index read and at most RATE archives per second; its position survives restarts
+    PREFERENCE_RETENTION_DAYS = int(os.getenv("PREFERENCE_RETENTION_DAYS", 90))
+    PREFERENCE_SWEEP_INTERVAL = float(os.getenv("PREFERENCE_SWEEP_INTERVAL", 3600))
+    PREFERENCE_SWEEP_BATCH = int(os.getenv("PREFERENCE_SWEEP_BATCH", 100))
+    PREFERENCE_SWEEP_RATE = float(os.getenv("PREFERENCE_SWEEP_RATE", 20))
+    PREFERENCE_SWEEP_CHECKPOINT = data_path("PREFERENCE_SWEEP_CHECKPOINT", "data/preference_sweep.json")
+    # Preference vectors: at most this many learned terms (beyond the built-in categories) get a slot
+    PREFERENCE_VOCAB_MAX_LEARNED = int(os.getenv("PREFERENCE_VOCAB_MAX_LEARNED", 256))
+
+    # Agent executor: thread pool for blocking agent/tool work, with admission control.
+    # Requests are turned away with 503 + Retry-After once this many jobs wait for a worker,
+    # or once a route has this many requests in progress.
+    AGENT_EXECUTOR_WORKERS = int(os.getenv("AGENT_EXECUTOR_WORKERS", 16))
+    AGENT_EXECUTOR_QUEUE = int(os.getenv("AGENT_EXECUTOR_QUEUE", 32))
+    ROUTE_LIMIT_SOLO = int(os.getenv("ROUTE_LIMIT_SOLO", 16))
+    ROUTE_LIMIT_GROUP = int(os.getenv("ROUTE_LIMIT_GROUP", 4))
+    OVERLOAD_RETRY_AFTER = float(os.getenv("OVERLOAD_RETRY_AFTER", 5))
+
+    # OpenAI completions for the safety and personalization routers (async, on the shared HTTP client).
+    # Answers about a place are cached per coordinate cell (decimal places) and hour.
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", 20))
+    OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", 1))
+    OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", 8))
+    OPENAI_QUEUE_TIMEOUT = float(os.getenv("OPENAI_QUEUE_TIMEOUT", 10))
+    OPENAI_CACHE_SIZE = int(os.getenv("OPENAI_CACHE_SIZE", 1024))
+    OPENAI_CACHE_TTL = float(os.getenv("OPENAI_CACHE_TTL", 60 * 60))
+    OPENAI_STATIC_CACHE_TTL = float(os.getenv("OPENAI_STATIC_CACHE_TTL", 24 * 60 * 60))
+    OPENAI_CACHE_COORD_PRECISION = int(os.getenv("OPENAI_CACHE_COORD_PRECISION", 2))
+
+    # Shared HTTP client (connection pool used by all outbound API calls)
+    HTTP_CLIENT_HTTP2 = os.getenv("HTTP_CLIENT_HTTP2", "true").lower() == "true"
+    HTTP_CLIENT_TIMEOUT = float(os.getenv("HTTP_CLIENT_TIMEOUT", 10))
+    HTTP_CLIENT_MAX_CONNECTIONS = int(os.getenv("HTTP_CLIENT_MAX_CONNECTIONS", 100))
+    HTTP_CLIENT_MAX_KEEPALIVE = int(os.getenv("HTTP_CLIENT_MAX_KEEPALIVE", 20))
+    HTTP_CLIENT_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_CLIENT_KEEPALIVE_EXPIRY", 30))
 
     DEFAULT_LAT = float(os.getenv("DEFAULT_LAT", 12.9716))
     DEFAULT_LNG = float(os.getenv("DEFAULT_LNG", 77.5946))
@@ -0,0 +1,225 @@
+import asyncio
+import atexit
+import concurrent.futures
+import contextvars
+import functools
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.metrics import register_metrics
+
+
+class Overloaded(HTTPException):
+    """503 with a Retry-After header; routes re-raise HTTPExceptions untouched"""
+
+    def __init__(self, what: str, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail=f"Server busy ({what}), retry shortly",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+        self.retry_after = retry_after
+
+
+class AgentExecutor:
+    """
+    Dedicated, sized thread pool for blocking agent and tool work (CrewAI
+    kickoffs, sync HTTP tools, geocoding), kept apart from the event loop's
+    default executor so a burst of agent work can't starve other endpoints.
+
+    Work submitted with `run` is never rejected: admission happens at the
+    door through `admit()`, which refuses new requests while more than
+    `max_queue` jobs are waiting for a worker. An admitted request therefore
+    never fails halfway because the pool is busy.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, retry_after: float):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent")
+        self._lock = threading.Lock()
+        self.running = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_ms_total = 0.0
+        self.max_queue_wait_ms = 0.0
+
+    def admit(self):
+        """Raise Overloaded if the backlog of jobs waiting for a worker is full"""
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded("agent workers", self.retry_after)
+
+    def _call(self, submitted: float, fn: Callable, *args, **kwargs) -> Any:
+        waited_ms = (time.perf_counter() - submitted) * 1000
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.queue_wait_ms_total += waited_ms
+            self.max_queue_wait_ms = max(self.max_queue_wait_ms, waited_ms)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run `fn(*args, **kwargs)` on the pool, like asyncio.to_thread (context
+        variables such as the current caller follow the call). Cancelling the
+        awaiting task drops a job still queued, or abandons the result of one
+        already running (the thread finishes the call).
+        """
+        with self._lock:
+            self.queued += 1
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, self._call, time.perf_counter(), fn, *args, **kwargs)
+        try:
+            future = self._pool.submit(call)
+        except RuntimeError:
+            with self._lock:
+                self.queued -= 1
+            raise
+        future.add_done_callback(self._cancelled_in_queue)
+        return await asyncio.wrap_future(future)
+
+    def _cancelled_in_queue(self, future: concurrent.futures.Future):
+        """A job cancelled before a worker took it never reaches `_call`; it leaves the queue here"""
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        started = self.completed + self.running
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_queue_wait_ms": round(self.queue_wait_ms_total / started, 1) if started else 0.0,
+            "max_queue_wait_ms": round(self.max_queue_wait_ms, 1)
+        }
+
+
+class RouteLimits:
+    """
+    Per-route concurrency limits. A route at its limit turns new requests away
+    with 503 instead of queueing them, so one busy route (e.g. group
+    coordination) can't take every worker from the others.
+    """
+
+    def __init__(self, limits: Dict[str, int], retry_after: float):
+        self.limits = limits
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self.active: Dict[str, int] = {route: 0 for route in limits}
+        self.admitted: Dict[str, int] = {route: 0 for route in limits}
+        self.rejected: Dict[str, int] = {route: 0 for route in limits}
+
+    def acquire(self, route: str) -> Callable[[], None]:
+        """
+        Take a slot on `route` (and check the agent executor's backlog).
+        Returns an idempotent release function; raises Overloaded when full.
+        """
+        with self._lock:
+            if self.active[route] >= self.limits[route]:
+                self.rejected[route] += 1
+                raise Overloaded(route, self.retry_after)
+            self.active[route] += 1
+        try:
+            get_agent_executor().admit()
+        except Overloaded:
+            with self._lock:
+                self.active[route] -= 1
+                self.rejected[route] += 1
+            raise
+        with self._lock:
+            self.admitted[route] += 1
+
+        released = False
+
+        def release():
+            nonlocal released
+            with self._lock:
+                if not released:
+                    released = True
+                    self.active[route] -= 1
+
+        return release
+
+    def slot(self, route: str) -> "_Slot":
+        """`with route_limits.slot("group"):` around a request's work"""
+        return _Slot(self, route)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            route: {
+                "limit": limit,
+                "active": self.active[route],
+                "admitted": self.admitted[route],
+                "rejected": self.rejected[route]
+            }
+            for route, limit in self.limits.items()
+        }
+
+
+class _Slot:
+    def __init__(self, limits: RouteLimits, route: str):
+        self._limits = limits
+        self._route = route
+        self._release: Optional[Callable[[], None]] = None
+
+    def __enter__(self):
+        self._release = self._limits.acquire(self._route)
+        return self
+
+    def __exit__(self, *exc):
+        self._release()
+        return False
+
+
+_agent_executor: Optional[AgentExecutor] = None
+_route_limits: Optional[RouteLimits] = None
+_lock = threading.Lock()
+
+
+def get_agent_executor() -> AgentExecutor:
+    global _agent_executor
+    if _agent_executor is None:
+        with _lock:
+            if _agent_executor is None:
+                _agent_executor = AgentExecutor(
+                    max_workers=settings.AGENT_EXECUTOR_WORKERS,
+                    max_queue=settings.AGENT_EXECUTOR_QUEUE,
+                    retry_after=settings.OVERLOAD_RETRY_AFTER
+                )
+                atexit.register(_agent_executor.shutdown)
+                register_metrics("agent_executor", _agent_executor.stats)
+    return _agent_executor
+
+
+def get_route_limits() -> RouteLimits:
+    global _route_limits
+    if _route_limits is None:
+        with _lock:
+            if _route_limits is None:
+                _route_limits = RouteLimits(
+                    {"solo": settings.ROUTE_LIMIT_SOLO, "group": settings.ROUTE_LIMIT_GROUP},
+                    retry_after=settings.OVERLOAD_RETRY_AFTER
+                )
+                register_metrics("route_limits", _route_limits.stats)
+    return _route_limits
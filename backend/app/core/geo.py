@@ -0,0 +1,146 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lng: float, precision: int = 7) -> str:
+    """Encode a coordinate as a geohash string (precision 7 ≈ 150m cells)"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_decode(geohash: str) -> Tuple[float, float]:
+    """Decode a geohash string to the (lat, lng) centre of its cell"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        value = _GEOHASH_BASE32.index(char)
+        for shift in range(4, -1, -1):
+            rng = lng_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+
+    return (lat_range[0] + lat_range[1]) / 2, (lng_range[0] + lng_range[1]) / 2
+
+
+def parse_ll(ll: str) -> Tuple[float, float]:
+    """Parse a 'lat,lng' string into floats"""
+    lat, lng = ll.split(",")
+    return float(lat), float(lng)
+
+
+def haversine_matrix(origins: Sequence[Tuple[float, float]], destinations: Sequence[Tuple[float, float]]) -> np.ndarray:
+    """
+    Great-circle distances in km between every origin and every destination,
+    as an (len(origins), len(destinations)) array computed in one broadcast.
+    """
+    a = np.radians(np.asarray(origins, dtype=float).reshape(-1, 2))
+    b = np.radians(np.asarray(destinations, dtype=float).reshape(-1, 2))
+    lat1, lng1 = a[:, 0:1], a[:, 1:2]
+    lat2, lng2 = b[:, 0], b[:, 1]
+
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in km between two points"""
+    return float(haversine_matrix([(lat1, lng1)], [(lat2, lng2)])[0, 0])
+
+
+def project_km(lats, lngs, ref_lat: float) -> np.ndarray:
+    """
+    Project coordinates to a local plane in kilometres (equirectangular around
+    `ref_lat`), so Euclidean distances match ground distances at city scale.
+    Returns an (n, 2) array of (x, y).
+    """
+    k = np.cos(np.radians(ref_lat))
+    return EARTH_RADIUS_KM * np.column_stack((np.radians(lngs) * k, np.radians(lats)))
+
+
+def unproject_km(xy: np.ndarray, ref_lat: float) -> Tuple[float, float]:
+    k = np.cos(np.radians(ref_lat))
+    return float(np.degrees(xy[1] / EARTH_RADIUS_KM)), float(np.degrees(xy[0] / (EARTH_RADIUS_KM * k)))
+
+
+def geometric_median(
+    coords: Sequence[Tuple[float, float]],
+    weights: Optional[Sequence[float]] = None,
+    tol_km: float = 1e-3,
+    max_iter: int = 100
+) -> Tuple[float, float]:
+    """
+    Weighted geometric median of (lat, lng) points: the point minimising the
+    weighted sum of ground distances to all of them.
+
+    Weiszfeld iterations in a local km projection, vectorised over members.
+    Starts from the weighted centroid and stops once a step moves less than
+    `tol_km`. If an iterate lands on a member's location, that member is left
+    out of the step (Vardi–Zhang) rather than dividing by zero.
+    """
+    pts = np.asarray(coords, dtype=float)
+    w = np.ones(len(pts)) if weights is None else np.asarray(weights, dtype=float)
+    if len(pts) == 1:
+        return float(pts[0, 0]), float(pts[0, 1])
+
+    ref_lat = float(pts[:, 0].mean())
+    xy = project_km(pts[:, 0], pts[:, 1], ref_lat)
+    current = (w[:, None] * xy).sum(axis=0) / w.sum()
+
+    for _ in range(max_iter):
+        diff = xy - current
+        dist = np.sqrt((diff * diff).sum(axis=1))
+        coincident = dist < 1e-9
+        if coincident.any():
+            # Vardi–Zhang: weigh the pull of the other members against the
+            # weight of the member we are sitting on
+            inv = np.where(coincident, 0.0, w / np.maximum(dist, 1e-9))
+            pull = np.linalg.norm((diff * inv[:, None]).sum(axis=0))
+            stay = w[coincident].sum()
+            if pull <= stay:
+                break
+            candidate = (inv @ xy) / inv.sum()
+            candidate = current + (1 - stay / pull) * (candidate - current)
+        else:
+            inv = w / dist
+            candidate = (inv @ xy) / inv.sum()
+
+        step = candidate - current
+        current = candidate
+        if step @ step < tol_km * tol_km:
+            break
+
+    return unproject_km(current, ref_lat)
@@ -0,0 +1,112 @@
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Optional
+
+import httpx
+
+from app.core.config import settings
+
+
+class SharedHTTPClient:
+    """
+    Process-wide pooled HTTP client.
+
+    A single httpx.AsyncClient (keep-alive + HTTP/2) lives on a dedicated
+    background event loop, so every caller shares the same connection pool no
+    matter which loop or worker thread it runs on:
+    - async callers (FastAPI handlers) use `run_async`
+    - sync callers (CrewAI tool `_run` methods) use `run_sync`
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    def _http2_available(self) -> bool:
+        try:
+            import h2  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _start(self):
+        with self._lock:
+            if self._loop is not None:
+                return
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _serve():
+                asyncio.set_event_loop(loop)
+                self._client = httpx.AsyncClient(
+                    http2=settings.HTTP_CLIENT_HTTP2 and self._http2_available(),
+                    timeout=httpx.Timeout(settings.HTTP_CLIENT_TIMEOUT, connect=5.0),
+                    limits=httpx.Limits(
+                        max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                        max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+                        keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+                    ),
+                )
+                ready.set()
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=_serve, name="shared-http-client", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._start()
+        return self._loop
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The pooled client. Only use it from coroutines running on `loop`."""
+        if self._client is None:
+            self._start()
+        return self._client
+
+    def on_client_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def run_sync(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the client loop and block until it finishes (sync facade)"""
+        if self.on_client_loop():
+            raise RuntimeError("run_sync() called from the client loop; await the coroutine instead")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    async def run_async(self, coro: Awaitable[Any]) -> Any:
+        """Await a coroutine on the client loop from any other event loop"""
+        if self.on_client_loop():
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def close(self):
+        if self._loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop = None
+        self._thread = None
+        self._client = None
+
+
+shared_http_client = SharedHTTPClient()
+atexit.register(shared_http_client.close)
@@ -0,0 +1,263 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 512
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    text TEXT NOT NULL,
+    response TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    signature TEXT,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    last_hit_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_namespace ON llm_cache (namespace, expires_at);
+"""
+
+
+def normalize_prompt(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s,.]", " ", (text or "").lower()).split())
+
+
+def embed(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Local, dependency-free text embedding: feature-hashed words plus character
+    trigrams, L2-normalised (float32). Words carry most of the weight so a
+    different place or cuisine moves the vector more than a typo does.
+    CRC32 keeps the hashing stable across processes, so stored vectors stay valid.
+    """
+    normalized = normalize_prompt(text)
+    vec = np.zeros(dim, dtype=np.float32)
+    for word in normalized.replace(",", " ").replace(".", " ").split():
+        vec[zlib.crc32(word.encode()) % dim] += 2.0
+    padded = f" {normalized} "
+    for i in range(len(padded) - 2):
+        vec[zlib.crc32(b"#" + padded[i:i + 3].encode()) % dim] += 0.5
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class LLMCache:
+    """
+    Two-level cache for LLM responses, persisted in SQLite.
+
+    1. Exact: the normalised input text (per namespace) hashes to a key.
+    2. Semantic: otherwise the most similar cached input in the same
+       namespace with the same `signature` is used if its cosine similarity
+       reaches `threshold`. Embeddings for a namespace are kept in memory as
+       one matrix, so a lookup is a single matrix-vector product.
+
+    Similar wording doesn't mean the same question: "vegetarian" and "non
+    vegetarian", HSR and BTM Layout, 4 and 6 friends embed almost alike. The
+    signature carries the details that must agree (see
+    IntentParser.signature), so a neighbour that differs in any of them is
+    never served.
+
+    Entries expire after `ttl` seconds and each records how often it was
+    served. Callers pass the part of the prompt that varies (the user query,
+    the member data), not boilerplate like the current time, which would make
+    every prompt unique.
+    """
+
+    def __init__(self, path: str, ttl: float = 6 * 60 * 60, threshold: float = 0.92, max_entries: int = 5000):
+        self.path = path
+        self.ttl = ttl
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict[str, Any]] = {}  # namespace → {"keys": [...], "matrix": ndarray}
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(llm_cache)")}
+        if "signature" not in columns:
+            # Entries stored before signatures existed only serve exact matches
+            self._conn.execute("ALTER TABLE llm_cache ADD COLUMN signature TEXT")
+
+    @staticmethod
+    def _key(namespace: str, text: str) -> str:
+        return hashlib.sha256(f"{namespace}\x00{normalize_prompt(text)}".encode()).hexdigest()
+
+    def _namespace_index(self, namespace: str) -> Dict[str, Any]:
+        """In-memory embedding matrix for a namespace, loaded from disk on first use. Caller holds the lock."""
+        index = self._index.get(namespace)
+        if index is None:
+            rows = self._conn.execute(
+                "SELECT key, embedding, signature FROM llm_cache WHERE namespace = ? AND expires_at > ?",
+                (namespace, time.time())
+            ).fetchall()
+            index = {
+                "keys": [key for key, _, _ in rows],
+                "signatures": [signature for _, _, signature in rows],
+                "matrix": np.array([np.frombuffer(blob, dtype=np.float32) for _, blob, _ in rows], dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+            }
+            self._index[namespace] = index
+        return index
+
+    def _drop_from_index(self, namespace: str, key: str):
+        index = self._index.get(namespace)
+        if index and key in index["keys"]:
+            i = index["keys"].index(key)
+            index["keys"].pop(i)
+            index["signatures"].pop(i)
+            index["matrix"] = np.delete(index["matrix"], i, axis=0)
+
+    def _hit(self, key: str, now: float) -> Optional[str]:
+        row = self._conn.execute("SELECT response, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        self._conn.execute("UPDATE llm_cache SET hits = hits + 1, last_hit_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def get(self, namespace: str, text: str, threshold: Optional[float] = None,
+            signature: Optional[str] = None) -> Optional[str]:
+        """
+        Cached response for `text`, exact match first, then the nearest
+        neighbour above the threshold among entries stored with `signature`
+        """
+        threshold = self.threshold if threshold is None else threshold
+        key = self._key(namespace, text)
+        now = time.time()
+        with self._lock:
+            response = self._hit(key, now)
+            if response is not None:
+                self.exact_hits += 1
+                return response
+
+            if threshold < 1.0:
+                index = self._namespace_index(namespace)
+                candidates = [i for i, stored in enumerate(index["signatures"]) if stored == signature]
+                if candidates:
+                    similarities = index["matrix"][candidates] @ embed(text)
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= threshold:
+                        best_key = index["keys"][candidates[best]]
+                        response = self._hit(best_key, now)
+                        if response is not None:
+                            self.semantic_hits += 1
+                            return response
+                        self._drop_from_index(namespace, best_key)
+
+            self.misses += 1
+            return None
+
+    def set(self, namespace: str, text: str, response: str, ttl: Optional[float] = None, signature: Optional[str] = None):
+        key = self._key(namespace, text)
+        vector = embed(text)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, namespace, text, response, embedding, signature, created_at, expires_at, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, namespace, normalize_prompt(text), response, vector.tobytes(), signature, now, now + (ttl or self.ttl))
+            )
+            index = self._namespace_index(namespace)
+            if key in index["keys"]:
+                index["signatures"][index["keys"].index(key)] = signature
+            else:
+                index["keys"].append(key)
+                index["signatures"].append(signature)
+                index["matrix"] = np.vstack((index["matrix"], vector))
+            self._evict(namespace)
+
+    def _evict(self, namespace: str):
+        """Drop expired entries, then the least recently used beyond max_entries. Caller holds the lock."""
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_cache WHERE namespace = ?", (namespace,)).fetchone()[0]
+        if count <= self.max_entries:
+            return
+        self._conn.execute("DELETE FROM llm_cache WHERE namespace = ? AND expires_at <= ?", (namespace, time.time()))
+        self._conn.execute(
+            "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache WHERE namespace = ? "
+            "ORDER BY COALESCE(last_hit_at, created_at) DESC LIMIT -1 OFFSET ?)",
+            (namespace, self.max_entries)
+        )
+        self._index.pop(namespace, None)  # rebuilt from disk on next access
+
+    def cached(
+        self,
+        namespace: str,
+        text: str,
+        compute: Callable[[], Optional[str]],
+        threshold: Optional[float] = None,
+        signature: Optional[str] = None
+    ) -> Optional[str]:
+        """Return the cached response or compute, store and return it (None results aren't stored)"""
+        response = self.get(namespace, text, threshold, signature)
+        if response is not None:
+            return response
+        response = compute()
+        if response is not None:
+            self.set(namespace, text, response, signature=signature)
+        return response
+
+    def entry_stats(self, namespace: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most-served entries with their hit counts"""
+        query = "SELECT namespace, text, hits, created_at, last_hit_at FROM llm_cache"
+        params: tuple = ()
+        if namespace:
+            query += " WHERE namespace = ?"
+            params = (namespace,)
+        query += " ORDER BY hits DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, params + (limit,)).fetchall()
+        return [
+            {"namespace": ns, "text": text, "hits": hits, "created_at": created, "last_hit_at": last_hit}
+            for ns, text, hits, created, last_hit in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "entries": entries,
+            "threshold": self.threshold,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.exact_hits + self.semantic_hits) / lookups, 3) if lookups else 0.0
+        }
+
+
+_llm_cache: Optional[LLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Process-wide LLM response cache"""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache(
+                settings.LLM_CACHE_PATH,
+                ttl=settings.LLM_CACHE_TTL,
+                threshold=settings.LLM_CACHE_SIMILARITY,
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES
+            )
+            register_metrics("llm_cache", _llm_cache.stats)
+        return _llm_cache
@@ -0,0 +1,24 @@
+import logging
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# name -> zero-arg callable returning a JSON-serialisable dict
+_collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_metrics(name: str, collector: Callable[[], Dict[str, Any]]):
+    """Register a stats collector to be reported by the /metrics endpoint"""
+    _collectors[name] = collector
+
+
+def collect_metrics() -> Dict[str, Any]:
+    """Snapshot every registered collector"""
+    snapshot = {}
+    for name, collector in _collectors.items():
+        try:
+            snapshot[name] = collector()
+        except Exception as e:
+            logger.error(f"Metrics collector {name} failed: {e}")
+            snapshot[name] = {"error": str(e)}
+    return snapshot
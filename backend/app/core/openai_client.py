@@ -0,0 +1,178 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Hashable, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.executor import Overloaded
+from app.core.geo import parse_ll
+from app.core.http_client import shared_http_client
+from app.core.metrics import register_metrics
+from app.core.singleflight import SingleFlight
+
+
+def area_key(value: Any, precision: Optional[int] = None) -> Optional[str]:
+    """
+    Coordinates snapped to a grid for cache keys ("12.97,77.59" at precision 2,
+    cells of roughly 1 km). Accepts {"lat", "lng"} / {"latitude", "longitude"}
+    dicts, "lat,lng" strings and [lat, lng] pairs; None if there are no usable
+    coordinates, so the caller skips the cache.
+    """
+    precision = settings.OPENAI_CACHE_COORD_PRECISION if precision is None else precision
+    lat = lng = None
+    try:
+        if isinstance(value, dict):
+            lat = value.get("lat", value.get("latitude"))
+            lng = value.get("lng", value.get("lon", value.get("longitude")))
+        elif isinstance(value, str):
+            lat, lng = parse_ll(value)
+        elif isinstance(value, (list, tuple)) and len(value) == 2:
+            lat, lng = value
+        if lat is None or lng is None:
+            return None
+        return f"{round(float(lat), precision)},{round(float(lng), precision)}"
+    except (TypeError, ValueError):
+        return None
+
+
+def hour_bucket(now: Optional[datetime] = None) -> str:
+    """Current local hour, so cached answers about a place turn over hourly"""
+    return (now or datetime.now()).strftime("%Y-%m-%dT%H")
+
+
+def stable_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+class OpenAIChatClient:
+    """
+    Non-blocking chat completions for the safety and personalization routers.
+
+    Completions run through an AsyncOpenAI client on the shared HTTP client
+    loop, so they reuse its connection pool and never block a request's event
+    loop. Every call has a timeout; at most `max_concurrency` completions are
+    in flight process-wide and callers wait up to `queue_timeout` seconds for
+    a slot before getting 503 + Retry-After.
+
+    Callers that pass a `cache_key` share answers: identical keys in flight
+    at the same time make one completion (single-flight), and the answer is
+    kept for `ttl` seconds.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
+        self.api_key = api_key or settings.OPENAI_API_KEY
+        self.model = model or settings.OPENAI_MODEL
+        self.cache = TTLCache(maxsize=settings.OPENAI_CACHE_SIZE, ttl=settings.OPENAI_CACHE_TTL)
+        self.inflight = SingleFlight()
+        self._client = None
+        self._client_lock = threading.Lock()
+        # Created lazily on the client loop (asyncio primitives bind to a loop)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.completions = 0
+        self.in_flight = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.queue_rejections = 0
+        self.latency_ms_total = 0.0
+
+    def _openai(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import AsyncOpenAI
+
+                    self._client = AsyncOpenAI(
+                        api_key=self.api_key,
+                        http_client=shared_http_client.client,
+                        timeout=settings.OPENAI_TIMEOUT,
+                        max_retries=settings.OPENAI_MAX_RETRIES
+                    )
+        return self._client
+
+    async def _create(self, prompt: str, max_tokens: int) -> str:
+        """One chat completion on the client loop"""
+        response = await self._openai().chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
+
+    async def _complete(self, prompt: str, max_tokens: int) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), settings.OPENAI_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.queue_rejections += 1
+            raise Overloaded("completions", settings.OVERLOAD_RETRY_AFTER)
+
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            content = await asyncio.wait_for(self._create(prompt, max_tokens), settings.OPENAI_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise TimeoutError(f"Completion timed out after {settings.OPENAI_TIMEOUT:g}s")
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+        self.completions += 1
+        self.latency_ms_total += (time.perf_counter() - started) * 1000
+        return content
+
+    async def acomplete(
+        self,
+        prompt: str,
+        max_tokens: int,
+        cache_key: Optional[Hashable] = None,
+        ttl: Optional[float] = None
+    ) -> str:
+        """Completion text for `prompt`; awaitable from any event loop"""
+        if cache_key is None:
+            return await shared_http_client.run_async(self._complete(prompt, max_tokens))
+
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        async def complete_and_cache() -> str:
+            content = await self._complete(prompt, max_tokens)
+            self.cache.set(cache_key, content, ttl)
+            return content
+
+        return await shared_http_client.run_async(self.inflight.do(cache_key, complete_and_cache))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "completions": self.completions,
+            "in_flight": self.in_flight,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "queue_rejections": self.queue_rejections,
+            "avg_latency_ms": round(self.latency_ms_total / self.completions, 1) if self.completions else 0.0,
+            "deduplicated": self.inflight.deduplicated,
+            "cache": self.cache.stats()
+        }
+
+
+_openai_client: Optional[OpenAIChatClient] = None
+_lock = threading.Lock()
+
+
+def get_openai_client() -> OpenAIChatClient:
+    """Get or create the process-wide OpenAI chat client"""
+    global _openai_client
+    if _openai_client is None:
+        with _lock:
+            if _openai_client is None:
+                _openai_client = OpenAIChatClient()
+                register_metrics("openai", _openai_client.stats)
+    return _openai_client
@@ -0,0 +1,187 @@
+import asyncio
+import random
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from app.core.cache import TTLCache
+
+# Identifies who an outbound call is made for (user id or client address).
+# Set per request by the middleware in run.py; contextvars follow the call
+# into asyncio.to_thread workers and onto the shared HTTP client loop.
+current_caller: ContextVar[Optional[str]] = ContextVar("current_caller", default=None)
+
+
+class TokenBucket:
+    """
+    Async token bucket. Callers wait their turn in FIFO order on the event
+    loop (no thread ever sleeps) until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self.waiting = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float):
+        """Hold every caller back for `seconds` (e.g. after an upstream 429)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take one token, waiting up to `timeout` seconds. Returns False on timeout."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self._refill()
+                    wait = max(self._paused_until - now, 0.0)
+                    if not wait and self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+                    if not wait:
+                        wait = (1 - self._tokens) / self.rate
+                    if deadline is not None and now + wait > deadline:
+                        return False
+                    await asyncio.sleep(wait)
+        finally:
+            self.waiting -= 1
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast while open. Opened explicitly (e.g. when API credits run
+    out); after `cooldown` seconds a single probe call is let through, and its
+    outcome closes or re-opens the breaker. A probe that ends without an
+    outcome must call `release_probe()`; one that never reports back is
+    replaced by a new probe after another cooldown.
+    """
+
+    def __init__(self, cooldown: float):
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.reason = ""
+        self._opened_at = 0.0
+        self._probe_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        now = time.monotonic()
+        if self.state == "open" and now - self._opened_at >= self.cooldown:
+            self.state = "half_open"
+            self._probe_at = now
+            return True
+        if self.state == "half_open" and now - self._probe_at >= self.cooldown:
+            # The last probe never reported an outcome; let another one through
+            self._probe_at = now
+            return True
+        self.rejected += 1
+        return False
+
+    def open(self, reason: str):
+        if self.state != "open":
+            self.times_opened += 1
+        self.state = "open"
+        self.reason = reason
+        self._opened_at = time.monotonic()
+
+    def record_success(self):
+        if self.state == "half_open":
+            self.state = "closed"
+            self.reason = ""
+
+    def record_failure(self):
+        if self.state == "half_open":
+            self.open(self.reason)
+
+    def release_probe(self):
+        """The probe ended without telling anything about upstream (e.g. it timed out queueing); allow a new probe"""
+        if self.state == "half_open":
+            self.state = "open"
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None, base: float = 0.5, cap: float = 10.0) -> float:
+    """
+    Delay before retry number `attempt` (0-based).
+
+    Honours the server's Retry-After with up to 25% added jitter so queued
+    callers don't retry in lockstep; otherwise exponential backoff with full jitter.
+    """
+    if retry_after is not None:
+        return min(cap, retry_after) * random.uniform(1.0, 1.25)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class RateLimiter:
+    """
+    Process-wide limiter for one upstream API: a global token bucket shared by
+    every caller plus a smaller bucket per caller (`current_caller`), so a
+    single noisy user queues behind their own share instead of draining the
+    whole quota.
+    """
+
+    def __init__(self, rate: float, burst: float, per_caller_rate: float, per_caller_burst: float, queue_timeout: float):
+        self.bucket = TokenBucket(rate, burst)
+        self.per_caller_rate = per_caller_rate
+        self.per_caller_burst = per_caller_burst
+        self.queue_timeout = queue_timeout
+        self._caller_buckets = TTLCache(maxsize=10000, ttl=600)
+        self.admitted = 0
+        self.throttled = 0
+        self.retries = 0
+
+    def _caller_bucket(self, caller: str) -> TokenBucket:
+        bucket = self._caller_buckets.get(caller)
+        if bucket is None:
+            bucket = TokenBucket(self.per_caller_rate, self.per_caller_burst)
+        # Re-set on every use so active callers keep their bucket alive
+        self._caller_buckets.set(caller, bucket)
+        return bucket
+
+    async def acquire(self) -> bool:
+        deadline = time.monotonic() + self.queue_timeout
+        caller = current_caller.get()
+        if caller is not None and not await self._caller_bucket(caller).acquire(self.queue_timeout):
+            self.throttled += 1
+            return False
+        if not await self.bucket.acquire(max(0.0, deadline - time.monotonic())):
+            self.throttled += 1
+            return False
+        self.admitted += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_second": self.bucket.rate,
+            "burst": self.bucket.capacity,
+            "queued": self.bucket.waiting,
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "active_callers": len(self._caller_buckets)
+        }
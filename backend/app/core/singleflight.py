@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _SyncCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """
+    Request coalescing: concurrent calls with the same key share one
+    execution and its result instead of each hitting the upstream API.
+
+    `do` coalesces coroutines on a single event loop; `do_sync` coalesces
+    blocking calls across threads. Only in-flight calls are shared; nothing
+    is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, list] = {}  # key -> [task, waiters]
+        self._sync_calls: Dict[Hashable, _SyncCall] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.deduplicated = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        entry = self._tasks.get(key)
+        if entry is None:
+            # Run as its own task so one caller being cancelled (e.g. a fan-out
+            # deadline) doesn't cancel the call for everyone else sharing it
+            entry = [asyncio.ensure_future(fn()), 0]
+            self._tasks[key] = entry
+            entry[0].add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.deduplicated += 1
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Last waiter gone: nobody wants the result any more
+            if entry[1] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            entry[1] -= 1
+
+    def do_sync(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.calls += 1
+            call = self._sync_calls.get(key)
+            leader = call is None
+            if leader:
+                call = _SyncCall()
+                self._sync_calls[key] = call
+            else:
+                self.deduplicated += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._sync_calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._tasks) + len(self._sync_calls)
+        }
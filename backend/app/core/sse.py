@@ -0,0 +1,188 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from fastapi.responses import StreamingResponse
+
+from app.core.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Seconds of silence after which a comment line is sent so proxies keep the connection open
+HEARTBEAT_INTERVAL = 15.0
+
+Emit = Callable[[str, Any], Awaitable[None]]
+
+
+def format_event(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """One Server-Sent Event frame with a JSON payload"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    lines.extend(f"data: {line}" for line in payload.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+class StreamStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.active = 0
+        self.first_event_ms_total = 0.0
+        self.first_events = 0
+
+    def record_first_event(self, elapsed_ms: float):
+        with self._lock:
+            self.first_events += 1
+            self.first_event_ms_total += elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "opened": self.opened,
+            "active": self.active,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "avg_first_event_ms": round(self.first_event_ms_total / self.first_events, 1) if self.first_events else 0.0
+        }
+
+
+stream_stats = StreamStats()
+register_metrics("sse_streams", stream_stats.stats)
+
+# stream id → producer task, for streams that can be cancelled by id
+_producers: Dict[str, asyncio.Task] = {}
+
+
+def cancel_stream(stream_id: str) -> bool:
+    """Cancel a running stream's producer; the client receives a `cancelled` event. False if unknown."""
+    task = _producers.get(stream_id)
+    if task is None or task.done():
+        return False
+    task.cancel()
+    return True
+
+
+async def stream_events(
+    producer: Callable[[Emit], Awaitable[Any]],
+    heartbeat: float = HEARTBEAT_INTERVAL,
+    stream_id: Optional[str] = None,
+    on_close: Optional[Callable[[], None]] = None
+) -> AsyncIterator[str]:
+    """
+    Run `producer(emit)` as a task and yield every event it emits as an SSE frame.
+
+    An exception in the producer becomes a final `error` event. If the client
+    goes away the generator is closed, and the producer task is cancelled so
+    upstream work it is awaiting is cancelled too. With a `stream_id`, the
+    stream can also be cancelled explicitly through cancel_stream().
+    `on_close()` runs once the stream is over, e.g. to free an admission slot.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    started = time.perf_counter()
+    first_event = True
+
+    async def emit(event: str, data: Any):
+        await queue.put((event, data))
+
+    async def run():
+        try:
+            await producer(emit)
+        except asyncio.CancelledError:
+            queue.put_nowait(("cancelled", {"stream_id": stream_id}))
+            raise
+        except Exception as e:
+            logger.error(f"Stream producer failed: {e}")
+            with stream_stats._lock:
+                stream_stats.failed += 1
+            await queue.put(("error", {"error": str(e)}))
+        finally:
+            queue.put_nowait(done)
+
+    with stream_stats._lock:
+        stream_stats.opened += 1
+        stream_stats.active += 1
+    task = asyncio.ensure_future(run())
+    if stream_id is not None:
+        _producers[stream_id] = task
+    event_id = 0
+    cancelled = False
+    try:
+        yield ": stream open\n\n"  # flush headers straight away
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is done:
+                break
+            cancelled = cancelled or item[0] == "cancelled"
+            if first_event:
+                first_event = False
+                stream_stats.record_first_event((time.perf_counter() - started) * 1000)
+            event, data = item
+            yield format_event(event, data, event_id)
+            event_id += 1
+        with stream_stats._lock:
+            if cancelled:
+                stream_stats.cancelled += 1
+            else:
+                stream_stats.completed += 1
+    finally:
+        if not task.done():
+            task.cancel()
+            with stream_stats._lock:
+                stream_stats.cancelled += 1
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        if stream_id is not None:
+            _producers.pop(stream_id, None)
+        with stream_stats._lock:
+            stream_stats.active -= 1
+        if on_close is not None:
+            on_close()
+
+
+class _EventStreamResponse(StreamingResponse):
+    """
+    StreamingResponse that runs `on_close()` once it has been sent, however
+    that ended. The stream's own cleanup only runs if its generator started;
+    a client that is gone before the headers go out never starts it (and
+    Starlette skips background tasks then), so `on_close` must be idempotent.
+    """
+
+    def __init__(self, content, on_close: Optional[Callable[[], None]] = None, **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.on_close is not None:
+                self.on_close()
+
+
+def sse_response(
+    producer: Callable[[Emit], Awaitable[Any]],
+    stream_id: Optional[str] = None,
+    on_close: Optional[Callable[[], None]] = None
+) -> StreamingResponse:
+    return _EventStreamResponse(
+        stream_events(producer, stream_id=stream_id, on_close=on_close),
+        on_close=on_close,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -3,53 +3,35 @@ from typing import Dict, Any, List
 import requests
 import os
 
+from app.agents.tools.gazetteer import get_gazetteer
+
 router = APIRouter()
 
 @router.get("/search")
 async def search_locations(query: str, limit: int = 5):
     """
     Search for locations based on query string
-    This extends your existing location functionality
+    Autocomplete from the offline gazetteer (prefix + fuzzy match), no API calls
     """
     try:
-        # You can use OpenCage Geocoding API (free tier available)
-        # Or integrate with Google Places API if you have it
-        
-        # For now, using a simple mock response
-        # In production, replace this with actual API calls
-        
         if len(query) < 2:
             return {"suggestions": []}
-        
-        # Mock location suggestions based on query
-        mock_suggestions = [
-            {
-                "formatted": f"{query}, Downtown",
-                "geometry": {"lat": 40.7128, "lng": -74.0060},
-                "type": "city"
-            },
-            {
-                "formatted": f"{query} City Center",
-                "geometry": {"lat": 40.7589, "lng": -73.9851},
-                "type": "area"
-            },
+
+        gazetteer = get_gazetteer()
+        suggestions = [
             {
-                "formatted": f"{query} District",
-                "geometry": {"lat": 40.7505, "lng": -73.9934},
-                "type": "neighborhood"
+                "formatted": f"{place['name']}, {gazetteer.city}" if gazetteer.city and place["type"] != "city" else place["name"],
+                "geometry": {"lat": place["centroid"][0], "lng": place["centroid"][1]},
+                "bbox": place["bbox"],
+                "type": place["type"]
             }
+            for place in gazetteer.suggest(query, limit)
         ]
-        
-        # Filter suggestions based on query
-        filtered_suggestions = [
-            suggestion for suggestion in mock_suggestions
-            if query.lower() in suggestion["formatted"].lower()
-        ][:limit]
-        
+
         return {
-            "suggestions": filtered_suggestions,
+            "suggestions": suggestions,
             "query": query,
-            "count": len(filtered_suggestions)
+            "count": len(suggestions)
         }
         
     except Exception as e:
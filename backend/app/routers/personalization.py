@@ -1,12 +1,9 @@
 from fastapi import APIRouter, HTTPException
 from typing import Dict, Any, List
-import openai
-import os
 
-router = APIRouter()
+from app.core.openai_client import area_key, get_openai_client, hour_bucket, stable_json
 
-# Initialize OpenAI client
-openai.api_key = os.getenv("OPENAI_API_KEY")
+router = APIRouter()
 
 @router.post("/learn-preferences")
 async def learn_user_preferences(request: Dict[str, Any]):
@@ -29,16 +26,14 @@ async def learn_user_preferences(request: Dict[str, Any]):
         Suggest 3-5 preference updates based on behavior patterns.
         """
         
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=300
-        )
+        content = await get_openai_client().acomplete(prompt, max_tokens=300)
         
         return {
-            "suggested_preferences": response.choices[0].message.content,
+            "suggested_preferences": content,
             "learning_enabled": True
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -62,16 +57,14 @@ async def analyze_user_routine(request: Dict[str, Any]):
         Identify 2-3 routine patterns and suggest proactive actions.
         """
         
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=300
-        )
+        content = await get_openai_client().acomplete(prompt, max_tokens=300)
         
         return {
-            "routine_patterns": response.choices[0].message.content,
+            "routine_patterns": content,
             "proactive_suggestions": True
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -94,16 +87,21 @@ async def get_contextual_suggestions(request: Dict[str, Any]):
         Give 3-5 context-aware recommendations.
         """
         
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=300
-        )
+        # Suggestions for the same spot, context and preferences are reused within the hour
+        cache_key = None
+        if isinstance(current_context, dict):
+            cell = area_key(current_context.get("location", current_context.get("coordinates")))
+            if cell:
+                rest = {k: v for k, v in current_context.items() if k not in ("location", "coordinates")}
+                cache_key = ("contextual-suggestions", cell, stable_json(rest), stable_json(user_preferences), hour_bucket())
+        content = await get_openai_client().acomplete(prompt, max_tokens=300, cache_key=cache_key)
         
         return {
-            "contextual_suggestions": response.choices[0].message.content,
+            "contextual_suggestions": content,
             "context_aware": True
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -124,16 +122,14 @@ async def get_user_insights(user_id: str):
         Focus on actionable recommendations.
         """
         
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=250
-        )
+        content = await get_openai_client().acomplete(prompt, max_tokens=250)
         
         return {
             "user_id": user_id,
-            "insights": response.choices[0].message.content,
+            "insights": content,
             "ai_generated": True
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
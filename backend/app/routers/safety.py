@@ -1,12 +1,10 @@
 from fastapi import APIRouter, HTTPException
 from typing import Dict, Any, List
-import openai
-import os
 
-router = APIRouter()
+from app.core.config import settings
+from app.core.openai_client import area_key, get_openai_client, hour_bucket, stable_json
 
-# Initialize OpenAI client
-openai.api_key = os.getenv("OPENAI_API_KEY")
+router = APIRouter()
 
 @router.post("/safe-route")
 async def find_safe_route(request: Dict[str, Any]):
@@ -31,16 +29,19 @@ async def find_safe_route(request: Dict[str, Any]):
         Provide route with safety score and alternative options.
         """
         
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=400
-        )
+        # Same endpoints (to within a neighbourhood) at the same hour share one answer
+        start_key, end_key = area_key(start_location), area_key(end_location)
+        cache_key = None
+        if start_key and end_key:
+            cache_key = ("safe-route", start_key, end_key, time_of_day, stable_json(user_preferences), hour_bucket())
+        content = await get_openai_client().acomplete(prompt, max_tokens=400, cache_key=cache_key)
         
         return {
-            "safe_route": response.choices[0].message.content,
+            "safe_route": content,
             "safety_optimized": True
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -65,16 +66,17 @@ async def get_area_safety(request: Dict[str, Any]):
         Provide safety score (0-100) and recommendations.
         """
         
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=300
-        )
+        # Same neighbourhood at the same hour shares one assessment
+        cell = area_key(coordinates)
+        cache_key = ("area-safety", cell, radius, time_of_day, hour_bucket()) if cell else None
+        content = await get_openai_client().acomplete(prompt, max_tokens=300, cache_key=cache_key)
         
         return {
-            "area_safety": response.choices[0].message.content,
+            "area_safety": content,
             "safety_assessed": True
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -98,16 +100,14 @@ async def generate_safety_alerts(request: Dict[str, Any]):
         Provide 2-3 proactive safety recommendations.
         """
         
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=250
-        )
+        content = await get_openai_client().acomplete(prompt, max_tokens=250)
         
         return {
-            "safety_alerts": response.choices[0].message.content,
+            "safety_alerts": content,
             "proactive": True
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -130,16 +130,14 @@ async def coordinate_emergency_contacts(request: Dict[str, Any]):
         Provide emergency response recommendations and contact coordination.
         """
         
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=300
-        )
+        content = await get_openai_client().acomplete(prompt, max_tokens=300)
         
         return {
-            "emergency_response": response.choices[0].message.content,
+            "emergency_response": content,
             "coordinated": True
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -161,15 +159,16 @@ async def get_safety_tips():
         Keep tips practical and actionable.
         """
         
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=400
+        # The same for everyone: generate once a day
+        content = await get_openai_client().acomplete(
+            prompt, max_tokens=400, cache_key=("safety-tips",), ttl=settings.OPENAI_STATIC_CACHE_TTL
         )
         
         return {
-            "safety_tips": response.choices[0].message.content,
+            "safety_tips": content,
             "educational": True
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
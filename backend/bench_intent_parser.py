@@ -0,0 +1,117 @@
+"""
+Benchmark the rule-based intent parser against the intent LLM on the fixture corpus
+
+    python bench_intent_parser.py                 # rules only
+    python bench_intent_parser.py --llm           # rules and LLM (needs GEMINI_API_KEY)
+    python bench_intent_parser.py --threshold 0.7 --corpus intent_fixtures.json
+
+Accuracy is the share of expected fields (search_query, location, group_type,
+budget, atmosphere, time_preference) the path got right; a field is right when
+the expected value appears in the produced one, case-insensitively.
+"""
+import argparse
+import json
+import statistics
+import time
+
+from app.agents.tools.intent_parser import get_intent_parser, intent_fields
+from app.core.config import settings
+
+
+def field_accuracy(expected, intent):
+    got = intent_fields(intent)
+    correct = sum(1 for field, value in expected.items() if got.get(field) and value.lower() in got[field].lower())
+    return correct, len(expected)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize(name, rows):
+    correct = sum(r["correct"] for r in rows)
+    total = sum(r["total"] for r in rows)
+    latencies = [r["ms"] for r in rows]
+    print(f"\n{name}: {len(rows)} queries")
+    print(f"  accuracy: {correct}/{total} = {correct / total if total else 0:.1%}")
+    if latencies:
+        print(f"  latency ms: p50={percentile(latencies, 0.5):.3f} p95={percentile(latencies, 0.95):.3f} "
+              f"mean={statistics.mean(latencies):.3f}")
+
+
+def run_rules(corpus, threshold, repeat):
+    parser = get_intent_parser()
+    rows = []
+    for fixture in corpus:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            parsed = parser.parse(fixture["query"])
+            timings.append((time.perf_counter() - started) * 1000)
+        correct, total = field_accuracy(fixture["expected"], parsed["intent"])
+        rows.append({
+            "query": fixture["query"],
+            "confident": parsed["confidence"] >= threshold,
+            "confidence": parsed["confidence"],
+            "correct": correct,
+            "total": total,
+            "ms": statistics.median(timings)
+        })
+    return rows
+
+
+def run_llm(corpus):
+    from app.agents.solo_agent import SoloModeAgent
+    from app.core.llm_cache import LLMCache
+    import app.core.llm_cache as llm_cache
+
+    llm_cache._llm_cache = LLMCache(":memory:", threshold=1.0)  # measure the model, not the cache
+    agent = SoloModeAgent()
+    rows = []
+    for fixture in corpus:
+        started = time.perf_counter()
+        intent = agent.extract_intent_llm(fixture["query"])
+        elapsed = (time.perf_counter() - started) * 1000
+        correct, total = field_accuracy(fixture["expected"], intent)
+        rows.append({"query": fixture["query"], "correct": correct, "total": total, "ms": elapsed})
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--corpus", default="intent_fixtures.json")
+    ap.add_argument("--threshold", type=float, default=settings.INTENT_PARSER_CONFIDENCE)
+    ap.add_argument("--repeat", type=int, default=50, help="parses per query for stable rule latencies")
+    ap.add_argument("--llm", action="store_true", help="also run the intent LLM on every query")
+    args = ap.parse_args()
+
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    rules = run_rules(corpus, args.threshold, args.repeat)
+    confident = [r for r in rules if r["confident"]]
+    print(f"=== Rule-based parser (threshold {args.threshold}) ===")
+    print(f"LLM skipped for {len(confident)}/{len(rules)} queries ({len(confident) / len(rules):.1%})")
+    summarize("rules, confident queries", confident)
+    summarize("rules, all queries", rules)
+    for row in rules:
+        if row["confident"] and row["correct"] < row["total"]:
+            print(f"  ✗ confident but wrong: {row['query']!r} ({row['correct']}/{row['total']})")
+
+    if args.llm:
+        llm = run_llm(corpus)
+        print("\n=== Intent LLM ===")
+        summarize("llm, all queries", llm)
+        confident_queries = {r["query"] for r in confident}
+        summarize("llm, queries the rules were confident on", [r for r in llm if r["query"] in confident_queries])
+
+        hybrid = [r if r["confident"] else l for r, l in zip(rules, llm)]
+        print("\n=== Hybrid (rules when confident, else LLM) ===")
+        summarize("hybrid, all queries", hybrid)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ Consolidates all routes and configurations into one file
 """
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from datetime import datetime
@@ -15,6 +15,8 @@ from app.routers import personalization, safety, location_search
 from app.api.routes import router as solo_router
 from app.api.solo_page.solo_page_routes import router as solo_page_router
 from app.api.group_routes import router as group_router
+from app.core.metrics import collect_metrics
+from app.core.rate_limit import current_caller
 
 # Create FastAPI app
 app = FastAPI(
@@ -34,6 +36,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Tag each request with its caller so outbound API rate limits are shared fairly
+@app.middleware("http")
+async def tag_caller(request: Request, call_next):
+    caller = request.headers.get("X-User-Id") or (request.client.host if request.client else None)
+    token = current_caller.set(caller)
+    try:
+        return await call_next(request)
+    finally:
+        current_caller.reset(token)
+
 # Include all routers
 app.include_router(solo_router, prefix="/api/v1", tags=["solo-mode"])
 app.include_router(solo_page_router, prefix="/api/v1/solo-page", tags=["solo-page"])
@@ -54,8 +66,10 @@ async def root():
         "endpoints": {
             "docs": "/docs",
             "health": "/health",
+            "metrics": "/metrics",
             "solo_mode": {
                 "query": "/api/v1/solo/query",
+                "query_stream": "/api/v1/solo/query/stream",
                 "place_details": "/api/v1/solo/place-details",
                 "examples": "/api/v1/solo/examples",
                 "supported_intents": "/api/v1/solo/supported-intents"
@@ -65,6 +79,7 @@ async def root():
             },
             "group_mode": {
                 "coordinate": "/api/v1/group/coordinate",
+                "coordinate_stream": "/api/v1/group/coordinate/stream",
                 "health": "/api/v1/group/health",
                 "test": "/api/v1/group/test"
             },
@@ -93,6 +108,14 @@ async def health_check():
         }
     })
 
+# Metrics endpoint (cache counters and other runtime stats)
+@app.get("/metrics")
+async def metrics():
+    return JSONResponse({
+        "timestamp": datetime.now().isoformat(),
+        "metrics": collect_metrics()
+    })
+
 # Test endpoint
 @app.get("/test")
 async def test_endpoint():
@@ -0,0 +1,136 @@
+import asyncio
+import math
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.executor import AgentExecutor, Overloaded, RouteLimits, get_route_limits
+from app.core.rate_limit import current_caller
+
+
+def test_executor_backlog():
+    print("\n=== TEST 1: Executor runs blocking work off the loop and bounds its backlog ===")
+    executor = AgentExecutor(max_workers=2, max_queue=2, retry_after=3)
+    gate = threading.Event()
+
+    def blocking(n):
+        gate.wait(5)
+        return n, current_caller.get()
+
+    async def main():
+        current_caller.set("user-1")
+        jobs = [asyncio.ensure_future(executor.run(blocking, n)) for n in range(4)]
+
+        # The loop stays responsive while every worker is blocked
+        started = time.perf_counter()
+        await asyncio.sleep(0.05)
+        loop_lag = time.perf_counter() - started - 0.05
+
+        stats = executor.stats()
+        try:
+            executor.admit()
+            rejected = None
+        except Overloaded as e:
+            rejected = e
+        gate.set()
+        return await asyncio.gather(*jobs), stats, rejected, loop_lag
+
+    results, stats, rejected, loop_lag = asyncio.run(main())
+    print(stats, f"loop lag {loop_lag * 1000:.1f}ms")
+    assert stats["running"] == 2 and stats["queued"] == 2
+    assert rejected is not None and rejected.status_code == 503 and rejected.headers["Retry-After"] == "3"
+    assert results == [(n, "user-1") for n in range(4)]  # the caller context follows the work
+    assert loop_lag < 0.05
+    assert executor.stats()["completed"] == 4 and executor.stats()["rejected"] == 1
+    executor.shutdown()
+
+
+def test_cancelled_queued_jobs_free_the_backlog():
+    print("\n=== TEST 2: Jobs cancelled while queued don't hold the backlog ===")
+    executor = AgentExecutor(max_workers=1, max_queue=3, retry_after=1)
+    gate = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(executor.run(gate.wait, 5))
+        queued = [asyncio.ensure_future(executor.run(time.sleep, 0)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        full = executor.stats()["queued"]
+        for job in queued:  # e.g. a discarded speculative search or a client that went away
+            job.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+        gate.set()
+        await running
+        return full
+
+    assert asyncio.run(main()) == 3
+    print(executor.stats())
+    assert executor.stats()["queued"] == 0 and executor.stats()["running"] == 0
+    executor.admit()  # no 503 once the pool is idle
+    executor.shutdown()
+
+
+def test_route_limits():
+    print("\n=== TEST 3: A route at its limit turns requests away ===")
+    limits = RouteLimits({"group": 1, "solo": 2}, retry_after=5)
+    release = limits.acquire("group")
+    try:
+        limits.acquire("group")
+        assert False, "second group request should be rejected"
+    except Overloaded as e:
+        assert e.headers["Retry-After"] == "5"
+    with limits.slot("solo"), limits.slot("solo"):  # other routes are unaffected
+        pass
+    release()
+    release()  # idempotent
+    limits.acquire("group")()
+    print(limits.stats())
+    assert limits.stats()["group"] == {"limit": 1, "active": 0, "admitted": 2, "rejected": 1}
+
+
+def test_endpoint_returns_503():
+    print("\n=== TEST 4: Saturated group route answers 503 + Retry-After ===")
+    from run import app
+    client = TestClient(app)
+    route_limits = get_route_limits()
+    members = [
+        {"name": "Asha", "location": {"lat": 12.9352, "lng": 77.6245}},
+        {"name": "Ravi", "location": {"lat": 12.9784, "lng": 77.6408}},
+    ]
+
+    held = [route_limits.acquire("group") for _ in range(route_limits.limits["group"])]
+    try:
+        response = client.post("/api/v1/group/coordinate", json={"members": members, "meeting_purpose": "coffee"})
+        stream = client.post("/api/v1/group/coordinate/stream", json={"members": members, "meeting_purpose": "coffee"})
+        print(response.status_code, response.headers.get("retry-after"), response.json())
+        assert response.status_code == 503 and response.headers["retry-after"] == str(math.ceil(settings.OVERLOAD_RETRY_AFTER))
+        assert stream.status_code == 503
+        # Other endpoints keep answering
+        assert client.get("/health").status_code == 200
+    finally:
+        for release in held:
+            release()
+
+    # Every solo endpoint turns requests away the same way
+    held = [route_limits.acquire("solo") for _ in range(route_limits.limits["solo"])]
+    try:
+        details = client.post("/api/v1/solo/place-details", json={"fsq_place_id": "4b0588f9f964a520e8c722e3"})
+        print(details.status_code, details.headers.get("retry-after"))
+        assert details.status_code == 503 and details.headers["retry-after"] == str(math.ceil(settings.OVERLOAD_RETRY_AFTER))
+    finally:
+        for release in held:
+            release()
+
+    metrics = client.get("/metrics").json()["metrics"]
+    print(metrics["route_limits"]["group"])
+    assert metrics["route_limits"]["group"]["active"] == 0
+    assert metrics["route_limits"]["group"]["rejected"] >= 2
+
+
+if __name__ == "__main__":
+    test_executor_backlog()
+    test_cancelled_queued_jobs_free_the_backlog()
+    test_route_limits()
+    test_endpoint_returns_503()
+    print("\n✅ All admission control tests passed")
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import numpy as np
+
+from app.agents.tools.candidate_generator import agenerate_candidates, generate_anchors
+from app.agents.tools.foursquare_client import FoursquareClient
+from app.core.geo import haversine_matrix
+
+
+class AnchorFoursquareClient(FoursquareClient):
+    """Answers searches from memory; one anchor's search never finishes in time"""
+
+    def __init__(self, slow_ll=None):
+        super().__init__(api_key="test")
+        self.slow_ll = slow_ll
+        self.searched = []
+
+    async def _request(self, path, params):
+        self.searched.append(params["ll"])
+        if params["ll"] == self.slow_ll:
+            await asyncio.sleep(5)
+        await asyncio.sleep(0.05)
+        lat = float(params["ll"].split(",")[0])
+        # Neighbouring anchors see an overlapping venue ("shared")
+        return {"results": [{"fsq_place_id": "shared"}, {"fsq_place_id": f"near_{lat:.4f}"}]}
+
+
+def test_anchor_generation():
+    print("\n=== TEST 1: Anchors ===")
+    members = [(12.9352, 77.6245), (13.1005, 77.5963), (12.9698, 77.7500)]
+    fair = (12.9784, 77.6408)
+
+    anchors = generate_anchors(fair, members, hex_km=1.5, max_anchors=7)
+    print(anchors)
+    assert anchors[0] == fair
+    assert len(anchors) == 7
+    assert ((13.1005 + 12.9698) / 2, (77.5963 + 77.75) / 2) in anchors  # a pairwise midpoint
+    spacing = haversine_matrix(anchors, anchors) + 1e9 * np.eye(len(anchors))
+    assert spacing.min() >= 0.75
+
+    assert len(generate_anchors(fair, members, hex_km=1.5, max_anchors=3)) == 3  # credit cap
+    # Members on the same spot add no midpoint; the hex ring fills in
+    same_spot = generate_anchors(fair, [fair, fair], hex_km=1.5, max_anchors=7)
+    assert same_spot.count(fair) == 1 and len(same_spot) == 7
+
+
+def test_concurrent_search_dedup_and_budget():
+    print("\n=== TEST 2: Concurrent pooled search ===")
+    anchors = [(12.97, 77.59), (12.98, 77.60), (12.99, 77.61), (13.00, 77.62)]
+    client = AnchorFoursquareClient(slow_ll="13.0,77.62")
+
+    async def main():
+        return await agenerate_candidates({"query": "cafe"}, anchors, budget=0.5, client=client)
+
+    start = time.monotonic()
+    pool = asyncio.run(main())
+    elapsed = time.monotonic() - start
+
+    ids = [v["fsq_place_id"] for v in pool["venues"]]
+    print(f"{ids} in {elapsed:.2f}s")
+    assert ids.count("shared") == 1
+    assert len(ids) == 4  # shared + 3 anchors that answered in time
+    assert pool["timed_out"] == 1 and pool["anchors_searched"] == 4
+    assert elapsed < 1.0  # sequential would be 4 × 50ms plus the stuck search
+
+
+if __name__ == "__main__":
+    test_anchor_generation()
+    test_concurrent_search_dedup_and_budget()
+    print("\n✅ All candidate generator tests passed")
@@ -0,0 +1,51 @@
+import math
+import time
+
+import numpy as np
+
+from app.core.geo import haversine_km, haversine_matrix
+
+
+def scalar_haversine(lat1, lng1, lat2, lng2):
+    """The per-pair formula the group agent used before"""
+    lat1_rad, lat2_rad = math.radians(lat1), math.radians(lat2)
+    a = (math.sin(math.radians(lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 6371 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def test_matrix_matches_scalar_haversine():
+    print("\n=== TEST 1: Matrix vs scalar haversine ===")
+    members = [(12.9352, 77.6245), (12.9784, 77.6408), (13.1005, 77.5963)]
+    venues = [(12.9716, 77.5946), (12.9116, 77.6389)]
+
+    matrix = haversine_matrix(members, venues)
+    assert matrix.shape == (3, 2)
+    for i, m in enumerate(members):
+        for j, v in enumerate(venues):
+            assert abs(matrix[i, j] - scalar_haversine(*m, *v)) < 1e-9
+    assert abs(haversine_km(*members[0], *members[0])) < 1e-12
+    print(np.round(matrix, 2))
+
+
+def test_fairness_stats_and_speed():
+    print("\n=== TEST 2: 50 members × 200 venues ===")
+    rng = np.random.default_rng(3)
+    members = rng.normal([12.97, 77.59], 0.05, size=(50, 2))
+    venues = rng.normal([12.97, 77.59], 0.05, size=(200, 2))
+
+    start = time.perf_counter()
+    matrix = haversine_matrix(members, venues)
+    mean, worst, variance = matrix.mean(axis=0), matrix.max(axis=0), matrix.var(axis=0)
+    elapsed = time.perf_counter() - start
+
+    print(f"{matrix.size} distances in {elapsed * 1e3:.2f}ms")
+    assert matrix.shape == (50, 200)
+    assert (worst >= mean).all() and (variance >= 0).all()
+    assert elapsed < 0.05
+
+
+if __name__ == "__main__":
+    test_matrix_matches_scalar_haversine()
+    test_fairness_stats_and_speed()
+    print("\n✅ All distance matrix tests passed")
@@ -0,0 +1,82 @@
+import time
+
+import numpy as np
+
+from app.core.geo import geometric_median, project_km
+from app.agents.tools.location_resolver import compute_fair_coordinates, member_weight
+
+
+def total_distance_km(point, coords, weights=None):
+    pts = np.vstack([coords, point])
+    xy = project_km(pts[:, 0], pts[:, 1], float(pts[:, 0].mean()))
+    w = np.ones(len(coords)) if weights is None else np.asarray(weights)
+    return float((w * np.hypot(*(xy[:-1] - xy[-1]).T)).sum())
+
+
+def test_median_beats_per_axis_median():
+    print("\n=== TEST 1: Geometric vs per-axis median ===")
+    # Three friends clustered in the south-east, one far north-west
+    coords = [(12.9352, 77.6245), (12.9116, 77.6389), (12.9166, 77.6101), (13.1005, 77.5963)]
+    lats, lngs = zip(*coords)
+    axis_median = (float(np.median(lats)), float(np.median(lngs)))
+    fair = compute_fair_coordinates(coords)
+
+    ours, theirs = total_distance_km(fair, coords), total_distance_km(axis_median, coords)
+    print(f"geometric median {fair}: {ours:.2f} km total; per-axis median: {theirs:.2f} km")
+    assert ours < theirs
+
+
+def test_weiszfeld_known_solutions():
+    print("\n=== TEST 2: Known solutions ===")
+    # Collinear points: the median is the middle point
+    lat, lng = geometric_median([(12.90, 77.60), (12.95, 77.60), (13.10, 77.60)])
+    assert abs(lat - 12.95) < 1e-5 and abs(lng - 77.60) < 1e-5
+
+    # A dominant weight pins the median to that member (coincident-point case)
+    lat, lng = geometric_median([(12.90, 77.60), (12.95, 77.65), (13.00, 77.60)], weights=[10, 1, 1])
+    assert abs(lat - 12.90) < 1e-6 and abs(lng - 77.60) < 1e-6
+
+    assert geometric_median([(12.97, 77.59)]) == (12.97, 77.59)
+
+
+def test_member_weights_pull_fair_point():
+    print("\n=== TEST 3: Travel-mode weights ===")
+    walker = {"location": "12.9352,77.6245", "preferences": {"transport": "walking"}}
+    driver = {"location": "12.9784,77.6408", "constraints": {"transport": "driving"}}
+    other = {"location": "12.9716,77.5946"}
+    assert [member_weight(m) for m in (walker, driver, other)] == [3.0, 1.0, 1.0]
+    assert member_weight({"constraints": {"weight": "2.5"}}) == 2.5
+
+    coords = [(12.9352, 77.6245), (12.9784, 77.6408), (12.9716, 77.5946)]
+    unweighted = compute_fair_coordinates(coords)
+    weighted = compute_fair_coordinates(coords, [3.0, 1.0, 1.0])
+    print(f"unweighted {unweighted} → weighted {weighted}")
+    assert total_distance_km(weighted, coords[:1]) < total_distance_km(unweighted, coords[:1])
+
+
+def test_solver_speed():
+    print("\n=== TEST 4: Solver speed ===")
+    rng = np.random.default_rng(7)
+    small = [tuple(c) for c in rng.normal([12.97, 77.59], 0.05, size=(8, 2))]
+    large = [tuple(c) for c in rng.normal([12.97, 77.59], 0.05, size=(1000, 2))]
+
+    start = time.perf_counter()
+    for _ in range(200):
+        geometric_median(small)
+    per_call = (time.perf_counter() - start) / 200
+
+    start = time.perf_counter()
+    geometric_median(large)
+    large_call = time.perf_counter() - start
+
+    print(f"8 members: {per_call * 1e3:.3f}ms/call, 1000 members: {large_call * 1e3:.2f}ms")
+    assert per_call < 0.002
+    assert large_call < 0.1
+
+
+if __name__ == "__main__":
+    test_median_beats_per_axis_median()
+    test_weiszfeld_known_solutions()
+    test_member_weights_pull_fair_point()
+    test_solver_speed()
+    print("\n✅ All fair point tests passed")
@@ -0,0 +1,174 @@
+import asyncio
+import threading
+import time
+
+from app.core.cache import TTLCache
+from app.core.geo import geohash_encode, geohash_decode
+from app.core.singleflight import SingleFlight
+from app.agents.tools.foursquare_client import FoursquareClient
+from app.agents.tools.location_resolver import resolve_location
+
+
+class CountingFoursquareClient(FoursquareClient):
+    """FoursquareClient that answers from memory and counts upstream calls"""
+
+    def __init__(self):
+        super().__init__(api_key="test")
+        self.calls = []
+
+    async def _request(self, path, params):
+        self.calls.append((path, dict(params)))
+        if path.startswith("/places/search"):
+            return {"results": [{"fsq_place_id": f"place_{len(self.calls)}", "name": params.get("query")}]}
+        # Details: echo every requested field except "tips", which this venue has none of
+        return {f: f"{f}_value" for f in params["fields"].split(",") if f != "tips"}
+
+
+def test_ttl_cache_lru_and_expiry():
+    print("\n=== TEST 1: TTL + LRU cache ===")
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1          # a is now most recently used
+    cache.set("c", 3)                   # evicts b
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    time.sleep(0.06)
+    assert cache.get("a") is None       # expired
+
+    stats = cache.stats()
+    print(stats)
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+    assert stats["hits"] == 2
+
+
+def test_geohash_roundtrip():
+    print("\n=== TEST 2: Geohash ===")
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    lat, lng = geohash_decode(geohash_encode(12.9716, 77.5946, 7))
+    print(f"Bangalore cell centre → {lat}, {lng}")
+    assert abs(lat - 12.9716) < 0.001 and abs(lng - 77.5946) < 0.001
+
+
+def test_search_cache_reuses_nearby_requests():
+    print("\n=== TEST 3: Foursquare search cache ===")
+    client = CountingFoursquareClient()
+    params = {"query": "Cafe", "ll": "12.97160,77.59460", "radius": 2000, "limit": 2}
+    nearby = dict(params, ll="12.97161,77.59461", query="  cafe ")
+    far = dict(params, ll="12.93520,77.62450")
+
+    first = client.search(params)
+    second = client.search(nearby)
+    client.search(far)
+
+    print(client.search_cache.stats())
+    assert first is second
+    assert len(client.calls) == 2
+    assert client.search_cache.hits == 1
+
+
+def test_place_details_fetches_only_missing_fields():
+    print("\n=== TEST 4: Place details store ===")
+    client = CountingFoursquareClient()
+
+    first = client.place_details("abc", ["name", "location"])
+    second = client.place_details("abc", ["name", "hours", "tips"])
+    third = client.place_details("abc", ["location", "hours", "tips"])
+
+    requested = [params["fields"] for _, params in client.calls]
+    print(f"Upstream field requests: {requested}")
+    print(client.details_store.stats())
+    assert requested == ["name,location", "hours,tips"]
+    assert first == {"name": "name_value", "location": "location_value"}
+    assert second == {"name": "name_value", "hours": "hours_value"}
+    assert third == {"location": "location_value", "hours": "hours_value"}
+
+
+def test_place_details_field_ttl_expiry():
+    print("\n=== TEST 5: Place details per-field TTL ===")
+    client = CountingFoursquareClient()
+    client.details_store.field_ttls["hours"] = 0
+
+    client.place_details("abc", ["location", "hours"])
+    client.place_details("abc", ["location", "hours"])
+
+    requested = [params["fields"] for _, params in client.calls]
+    print(f"Upstream field requests: {requested}")
+    assert requested == ["location,hours", "hours"]
+
+
+class SlowDetailsClient(CountingFoursquareClient):
+    """Every call takes 50ms; place_slow never answers in time"""
+
+    async def _request(self, path, params):
+        await asyncio.sleep(5 if path.endswith("place_slow") else 0.05)
+        if path.startswith("/places/search"):
+            self.calls.append((path, dict(params)))
+            return {"results": [{"fsq_place_id": f"place_{i}"} for i in range(10)] + [{"fsq_place_id": "place_slow"}]}
+        return await super()._request(path, params)
+
+
+def test_search_with_details_fans_out_concurrently():
+    print("\n=== TEST 6: Concurrent details fan-out ===")
+    client = SlowDetailsClient()
+
+    start = time.monotonic()
+    result = client.search_with_details({"query": "cafe", "ll": "12.97,77.59"}, ["hours"], deadline=0.5)
+    elapsed = time.monotonic() - start
+
+    enriched = [p for p in result["results"] if "hours" in p]
+    print(f"{len(enriched)} of {len(result['results'])} places enriched in {elapsed:.2f}s")
+    assert len(enriched) == 10
+    assert result["partial_details"] is True
+    assert elapsed < 1.0  # sequential would be 10 × 50ms plus the slow venue
+
+
+def test_identical_inflight_requests_are_coalesced():
+    print("\n=== TEST 7: Single-flight coalescing ===")
+    client = SlowDetailsClient()
+    params = {"query": "cafe", "ll": "12.97,77.59"}
+
+    async def main():
+        searches = [client.asearch(params) for _ in range(5)]
+        details = [client.aplace_details("place_1", ["hours"]) for _ in range(5)]
+        return await asyncio.gather(*searches, *details)
+
+    results = asyncio.run(main())
+    print(f"Upstream calls: {len(client.calls)}", client.inflight.stats())
+    assert all(r is results[0] for r in results[:5])
+    assert sorted(path for path, _ in client.calls) == ["/places/place_1", "/places/search"]
+    assert client.inflight.deduplicated == 8
+
+    flight = SingleFlight()
+    started = threading.Event()
+    calls = []
+
+    def slow_lookup():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return (12.97, 77.59)
+
+    leader = threading.Thread(target=lambda: flight.do_sync("koramangala", slow_lookup))
+    leader.start()
+    started.wait()
+    assert flight.do_sync("koramangala", slow_lookup) == (12.97, 77.59)
+    leader.join()
+    assert len(calls) == 1 and flight.deduplicated == 1
+
+    # No location text: the Bangalore default, as before coalescing
+    assert resolve_location(None) == (12.9716, 77.5946)
+    assert resolve_location("  ") == (12.9716, 77.5946)
+
+
+if __name__ == "__main__":
+    test_ttl_cache_lru_and_expiry()
+    test_geohash_roundtrip()
+    test_search_cache_reuses_nearby_requests()
+    test_place_details_fetches_only_missing_fields()
+    test_place_details_field_ttl_expiry()
+    test_search_with_details_fans_out_concurrently()
+    test_identical_inflight_requests_are_coalesced()
+    print("\n✅ All cache tests passed")
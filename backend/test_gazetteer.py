@@ -0,0 +1,84 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app.agents.tools.gazetteer import Gazetteer, get_gazetteer
+from app.core.config import settings
+
+
+def test_lookup_exact_alias_and_embedded():
+    print("\n=== TEST 1: Gazetteer lookup ===")
+    gazetteer = Gazetteer.from_file(settings.GAZETTEER_PATH)
+
+    assert gazetteer.lookup("Jayanagar, Bangalore")["name"] == "Jayanagar"
+    assert gazetteer.lookup("  HSR ")["name"] == "HSR Layout"
+    assert gazetteer.lookup("halasuru, bengaluru")["name"] == "Ulsoor"
+    assert gazetteer.lookup("near HSR Layout, Bengaluru")["name"] == "HSR Layout"
+    assert gazetteer.lookup("Koramangala main road")["name"] == "Koramangala"
+    assert gazetteer.lookup("MG Road")["name"] == "MG Road"
+    assert gazetteer.lookup("Bengaluru")["name"] == "Bangalore"
+    assert gazetteer.lookup("Atlantis") is None
+
+    # Leftover words mean another city or a specific place: geocode it instead
+    for query in ["Indiranagar, Chennai", "Jayanagar, Mysore", "Forum Mall, Koramangala", "quiet cafe near hsr layout"]:
+        assert gazetteer.lookup(query) is None, query
+    assert gazetteer.find_in_text("quiet cafe near hsr layout")["name"] == "HSR Layout"
+    assert gazetteer.find_in_text("a quiet cafe in Bangalore") is None
+    print(gazetteer.stats())
+
+
+def test_lookup_fuzzy_misspellings():
+    print("\n=== TEST 2: Fuzzy lookup ===")
+    gazetteer = Gazetteer.from_file(settings.GAZETTEER_PATH)
+    assert gazetteer.lookup("Koramangalaa")["name"] == "Koramangala"
+    assert gazetteer.lookup("Indranagar")["name"] == "Indiranagar"
+    assert gazetteer.lookup("Marathhalli")["name"] == "Marathahalli"
+    assert gazetteer.fuzzy_hits == 3
+
+
+def test_suggest_prefix_then_fuzzy():
+    print("\n=== TEST 3: Autocomplete ===")
+    gazetteer = Gazetteer.from_file(settings.GAZETTEER_PATH)
+
+    names = [p["name"] for p in gazetteer.suggest("kor")]
+    print(f"kor → {names}")
+    assert names[0] == "Koramangala"
+
+    names = [p["name"] for p in gazetteer.suggest("layout")]
+    assert {"HSR Layout", "BTM Layout", "HBR Layout"} <= set(names)
+
+    assert gazetteer.suggest("jayangar")[0]["name"] == "Jayanagar"
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        gazetteer.lookup("Jayanagar, Bangalore")
+    per_lookup = (time.perf_counter() - start) / 1000
+    print(f"Exact lookup: {per_lookup * 1e6:.1f}µs")
+    assert per_lookup < 0.001
+
+
+def test_bbox_containment():
+    print("\n=== TEST 4: Bounding boxes ===")
+    places = [p["name"] for p in get_gazetteer().containing(12.9352, 77.6245)]
+    assert places[0] == "Koramangala" and places[-1] == "Bangalore"
+
+
+def test_location_search_endpoint():
+    print("\n=== TEST 5: /api/location/search ===")
+    from run import app
+
+    client = TestClient(app)
+    body = client.get("/api/location/search", params={"query": "indira", "limit": 3}).json()
+    print(body)
+    assert body["suggestions"][0]["formatted"] == "Indiranagar, Bangalore"
+    assert body["suggestions"][0]["geometry"] == {"lat": 12.9784, "lng": 77.6408}
+    assert client.get("/api/location/search", params={"query": "i"}).json() == {"suggestions": []}
+
+
+if __name__ == "__main__":
+    test_lookup_exact_alias_and_embedded()
+    test_lookup_fuzzy_misspellings()
+    test_suggest_prefix_then_fuzzy()
+    test_bbox_containment()
+    test_location_search_endpoint()
+    print("\n✅ All gazetteer tests passed")
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import time
+
+from app.agents.tools.geocode_cache import GeocodeCache, normalize_location_query
+from app.core.config import BACKEND_DIR, data_path
+
+
+def test_normalized_forward_and_negative_entries():
+    print("\n=== TEST 1: Forward cache with normalization ===")
+    cache = GeocodeCache(":memory:", negative_ttl=0.05)
+
+    cache.set("Jayanagar, Bangalore", 12.9250, 77.5938, source="foursquare")
+    assert normalize_location_query("  JAYANAGAR  bengaluru ") == "jayanagar bangalore"
+    assert cache.get("jayanagar bengaluru") == (12.9250, 77.5938)
+    assert cache.get("Atlantis") is None
+
+    cache.set_negative("Atlantis")
+    assert cache.get("atlantis") == (None, None)
+    time.sleep(0.06)
+    assert cache.get("atlantis") is None  # negative entries expire sooner
+
+    stats = cache.stats()
+    print(stats)
+    assert stats["hits"] == 1 and stats["negative_hits"] == 1 and stats["misses"] == 2
+
+
+def test_reverse_cache_and_persistence():
+    print("\n=== TEST 2: Reverse cache survives restarts ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "geocode.sqlite3")
+        GeocodeCache(path).set_reverse(12.97160, 77.59460, {"formatted_address": "MG Road, Bangalore"})
+
+        reopened = GeocodeCache(path)
+        context = reopened.get_reverse(12.97161, 77.59461)  # same geohash cell
+        print(context)
+        assert context == {"formatted_address": "MG Road, Bangalore"}
+        assert reopened.get_reverse(12.9352, 77.6245) is None
+
+
+def test_warm_up_and_lru_eviction():
+    print("\n=== TEST 3: Warm-up import and size bound ===")
+    cache = GeocodeCache(":memory:", max_entries=3)
+    loaded = cache.warm_up({
+        "Koramangala": [12.9352, 77.6245],
+        "Indiranagar": "12.9784,77.6408",
+        "Whitefield": {"lat": 12.9698, "lng": 77.7500},
+        "Broken": "not coordinates"
+    })
+    assert loaded == 3
+    assert cache.get("koramangala") == (12.9352, 77.6245)  # refresh LRU position
+
+    time.sleep(0.01)
+    cache.set("HSR Layout", 12.9116, 77.6389)
+    print(cache.stats())
+    assert cache.stats()["forward_entries"] == 3
+    assert cache.get("Indiranagar") is None  # least recently used went first
+    assert cache.get("Koramangala") is not None
+
+    # Warm-up never overwrites what was resolved live
+    cache.warm_up({"HSR Layout": [0, 0]})
+    assert cache.get("hsr layout") == (12.9116, 77.6389)
+
+
+def test_data_paths_ignore_working_directory():
+    print("\n=== TEST 4: Relative data paths resolve under the backend directory ===")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            path = data_path("GEOCODE_CACHE_PATH_UNSET", "data/geocode_cache.sqlite3")
+        finally:
+            os.chdir(cwd)
+    print(path)
+    assert path == os.path.join(BACKEND_DIR, "data", "geocode_cache.sqlite3")
+    assert os.path.isfile(os.path.join(BACKEND_DIR, "run.py"))
+    assert data_path("UNSET", "/srv/cache.sqlite3") == "/srv/cache.sqlite3"
+    assert data_path("UNSET", ":memory:") == ":memory:" and data_path("UNSET", "") == ""
+
+
+if __name__ == "__main__":
+    test_normalized_forward_and_negative_entries()
+    test_reverse_cache_and_persistence()
+    test_warm_up_and_lru_eviction()
+    test_data_paths_ignore_working_directory()
+    print("\n✅ All geocode cache tests passed")
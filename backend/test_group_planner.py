@@ -0,0 +1,62 @@
+from app.agents.group_planner import CREW_PATH, DIRECT_PATH, GroupExecutionPlanner
+
+
+def structured_members():
+    return [
+        {"name": "Asha", "location": {"lat": 12.9352, "lng": 77.6245},
+         "preferences": {"atmosphere": "quiet", "features": ["wifi", "parking"]},
+         "constraints": {"budget": "moderate"}},
+        {"name": "Ravi", "location": "Indiranagar, Bangalore", "preferences": {}, "constraints": {}},
+    ]
+
+
+def test_structured_request_takes_direct_path():
+    print("\n=== TEST 1: Structured request ===")
+    planner = GroupExecutionPlanner(slo_ms=100)
+    plan = planner.plan(structured_members(), "coffee meetup")
+    print(plan.to_dict())
+    assert plan.path == DIRECT_PATH
+
+    members = structured_members()
+    members[1]["location"] = "Some Unknown Place"
+    plan = planner.plan(members, "dinner")
+    assert plan.path == DIRECT_PATH  # geocoding is code, not an LLM call
+    assert "Ravi: location needs geocoding" in plan.reasons
+
+
+def test_free_text_goes_to_crew():
+    print("\n=== TEST 2: Free text ===")
+    planner = GroupExecutionPlanner(slo_ms=100)
+
+    plan = planner.plan(structured_members(), "catch up with old college friends before Priya moves abroad")
+    assert plan.path == CREW_PATH and plan.reasons[0] == "meeting purpose is free text"
+
+    members = structured_members()
+    members[0]["constraints"]["notes"] = "step-free"
+    plan = planner.plan(members, "dinner")
+    print(plan.to_dict())
+    assert plan.path == CREW_PATH and "Asha: free-text constraints.notes" in plan.reasons
+
+
+def test_record_tracks_share_and_slo():
+    print("\n=== TEST 3: Path accounting ===")
+    planner = GroupExecutionPlanner(slo_ms=100)
+    direct = planner.plan(structured_members(), "dinner")
+
+    assert planner.record(direct, 40)["slo_met"] is True
+    assert planner.record(direct, 250)["slo_met"] is False
+    report = planner.record(direct.fall_back("direct path failed: boom"), 900, fell_back=True)
+    assert report["path"] == CREW_PATH and report["slo_met"] is None
+
+    stats = planner.stats()
+    print(stats)
+    assert stats["direct"] == 2 and stats["crew"] == 1
+    assert stats["slo_violations"] == 1 and stats["direct_fallbacks_to_crew"] == 1
+    assert stats["llm_free_share"] == 0.667
+
+
+if __name__ == "__main__":
+    test_structured_request_takes_direct_path()
+    test_free_text_goes_to_crew()
+    test_record_tracks_share_and_slo()
+    print("\n✅ All group planner tests passed")
@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+import app.agents.tools.foursquare_client as foursquare_client
+from app.agents.group_agent import GroupCoordinationAgent
+from app.agents.tools.candidate_generator import aiter_candidate_batches
+from app.agents.tools.foursquare_client import FoursquareClient
+from app.core.config import settings
+from app.core.sse import cancel_stream, stream_events
+from test_solo_stream import parse_stream
+
+
+class StreamFoursquareClient(FoursquareClient):
+    """Answers each anchor quickly unless it lies north of `stuck_after`; records cancelled searches"""
+
+    def __init__(self, stuck_after=None):
+        super().__init__(api_key="test")
+        self.stuck_after = stuck_after
+        self.cancelled = []
+
+    async def _request(self, path, params):
+        lat, lng = map(float, params["ll"].split(","))
+        try:
+            if self.stuck_after is not None and lat > self.stuck_after:
+                await asyncio.sleep(10)
+            await asyncio.sleep(0.02)
+        except asyncio.CancelledError:
+            self.cancelled.append(params["ll"])
+            raise
+        return {"results": [
+            {"fsq_place_id": "shared", "name": "Shared Cafe",
+             "geocodes": {"main": {"latitude": 12.95, "longitude": 77.61}}, "rating": 8.0},
+            {"fsq_place_id": f"near_{lat:.4f}_{lng:.4f}", "name": f"Cafe {lat:.3f}",
+             "geocodes": {"main": {"latitude": lat, "longitude": lng}}, "rating": 7.0},
+        ]}
+
+
+MEMBERS = [
+    {"name": "Asha", "location": {"lat": 12.9352, "lng": 77.6245}, "preferences": {}, "constraints": {}},
+    {"name": "Ravi", "location": {"lat": 12.9784, "lng": 77.6408}, "preferences": {}, "constraints": {}},
+]
+
+
+def test_batches_stream_and_cancel():
+    print("\n=== TEST 1: Candidate batches arrive per anchor ===")
+    anchors = [(12.97, 77.59), (12.98, 77.60), (13.05, 77.61)]
+    client = StreamFoursquareClient(stuck_after=13.0)
+
+    async def collect():
+        return [batch async for batch in aiter_candidate_batches({"query": "cafe"}, anchors, budget=0.3, client=client)]
+
+    batches = asyncio.run(collect())
+    print([(b["anchor"], [v["fsq_place_id"] for v in b["venues"]], b["timed_out"]) for b in batches])
+    ids = [v["fsq_place_id"] for b in batches for v in b["venues"]]
+    assert ids.count("shared") == 1 and len(ids) == 3
+    assert batches[-1] == {"anchor": 2, "venues": [], "error": None, "timed_out": True}
+
+    print("\n=== Closing the generator cancels searches in flight ===")
+    client = StreamFoursquareClient(stuck_after=13.0)
+
+    async def first_only():
+        batches = aiter_candidate_batches({"query": "cafe"}, anchors, budget=5, client=client)
+        first = await batches.__anext__()
+        await batches.aclose()
+        await asyncio.sleep(0.05)  # let the cancellation reach the client loop
+        return first
+
+    first = asyncio.run(first_only())
+    print(first["anchor"], client.cancelled)
+    assert client.cancelled == ["13.05,77.61"]
+
+
+def test_group_stream_events():
+    print("\n=== TEST 2: Group stream emits the fair point first, then venue batches ===")
+    original_client, original_budget = foursquare_client._foursquare_client, settings.FSQ_GROUP_SEARCH_BUDGET
+    foursquare_client._foursquare_client = StreamFoursquareClient()
+    settings.FSQ_GROUP_SEARCH_BUDGET = 2.0
+    try:
+        from run import app
+        client = TestClient(app)
+        with client.stream("POST", "/api/v1/group/coordinate/stream",
+                           json={"members": MEMBERS, "meeting_purpose": "coffee"}) as response:
+            body = "".join(response.iter_text())
+        assert client.delete("/api/v1/group/coordinate/stream/unknown").status_code == 404
+    finally:
+        foursquare_client._foursquare_client, settings.FSQ_GROUP_SEARCH_BUDGET = original_client, original_budget
+
+    events = parse_stream(body)
+    names = [name for name, _ in events]
+    print(names)
+    assert names[:2] == ["stream", "fair_point"]
+    assert names.count("venues") >= 2  # one per anchor that brought new venues
+    assert names[-4:] == ["ranking", "safety", "personalization", "result"]
+
+    streamed = {v["fsq_place_id"] for name, data in events if name == "venues" for v in data["venues"]}
+    result = events[-1][1]["results"]
+    assert streamed == {v["fsq_place_id"] for v in result["venues"]} or len(result["venues"]) == 10
+    assert result["execution"]["path"] == "direct"
+    assert [p["member_name"] for p in result["personalization"]] == ["Asha", "Ravi"]
+
+
+def test_cancel_aborts_upstream():
+    print("\n=== TEST 3: Cancelling a coordination aborts its searches ===")
+    original_client = foursquare_client._foursquare_client
+    client = StreamFoursquareClient(stuck_after=12.96)
+    foursquare_client._foursquare_client = client
+    agent = GroupCoordinationAgent.__new__(GroupCoordinationAgent)
+    agent.setup_tools()
+
+    async def main():
+        seen = []
+
+        async def producer(emit):
+            await agent.coordinate_group_meetup(MEMBERS, meeting_purpose="coffee", emit=emit)
+
+        stream = stream_events(producer, stream_id="group-1")
+        started = time.monotonic()
+        async for frame in stream:
+            if "event: " in frame:
+                seen.append(frame.split("event: ")[1].split("\n")[0])
+            if seen == ["fair_point", "venues"]:
+                assert cancel_stream("group-1")
+        await asyncio.sleep(0.05)
+        return seen, time.monotonic() - started
+
+    try:
+        seen, elapsed = asyncio.run(main())
+    finally:
+        foursquare_client._foursquare_client = original_client
+
+    print(seen, client.cancelled, f"{elapsed:.2f}s")
+    assert seen[-1] == "cancelled" and "ranking" not in seen
+    assert client.cancelled  # searches stuck upstream were aborted, not left running
+    assert elapsed < 2.0
+    assert not cancel_stream("group-1")
+
+
+if __name__ == "__main__":
+    test_batches_stream_and_cancel()
+    test_group_stream_events()
+    test_cancel_aborts_upstream()
+    print("\n✅ All group streaming tests passed")
@@ -0,0 +1,88 @@
+import json
+
+from app.agents.tools.intent_parser import AhoCorasick, get_intent_parser, intent_fields
+from app.agents.tools.preference_learning import PreferenceLearningSystem
+from app.core.config import settings
+
+
+def test_automaton_matches():
+    print("\n=== TEST 1: Aho-Corasick whole-word matching ===")
+    automaton = AhoCorasick([("bar", "bar"), ("rooftop bar", "rooftop"), ("top", "top"), ("he", "he"), ("she", "she")])
+    found = sorted((start, end, payload) for start, end, payload in automaton.finditer("rooftop bar or barbeque she"))
+    print(found)
+    assert (0, 11, "rooftop") in found and (8, 11, "bar") in found
+    assert not any(payload == "top" for _, _, payload in found)         # inside "rooftop"
+    assert sum(payload == "bar" for _, _, payload in found) == 1        # not inside "barbeque"
+    assert (24, 27, "she") in found and not any(p == "he" for _, _, p in found)
+
+
+def test_confidence():
+    print("\n=== TEST 2: Confidence decides who handles the query ===")
+    parser = get_intent_parser()
+
+    clear = parser.parse("Quiet cafe with wifi in Indiranagar")
+    print(clear["confidence"], clear["intent"]["search_query"], clear["fields"])
+    assert clear["confidence"] == 1.0
+    assert clear["intent"]["search_query"] == "cafe"
+    assert clear["intent"]["location"]["mentioned_location"] == "Indiranagar"
+    assert clear["intent"]["preferences"]["atmosphere"] == "quiet"
+
+    # "Park" belongs to the place name, not a park search; "not" inside "not crowded" is no negation
+    park = parser.parse("not crowded place to read in Cubbon Park")
+    assert park["intent"]["search_query"] == "library" and park["confidence"] == 1.0
+
+    # A word in front of a diet or cuisine can reverse it; the rules mustn't answer "vegetarian"
+    for query in ["non vegetarian restaurant near MG Road", "non-veg thali", "nonveg biryani", "halal biryani in Frazer Town"]:
+        parsed = parser.parse(query)
+        print(parsed["confidence"], query, parsed["reasons"])
+        assert parsed["confidence"] < settings.INTENT_PARSER_CONFIDENCE
+
+    for query in ["a cafe but not too noisy", "dinner under 500 rupees", "somewhere fun", "cafe or bar in Jayanagar"]:
+        parsed = parser.parse(query)
+        print(parsed["confidence"], query, parsed["reasons"])
+        assert parsed["confidence"] < settings.INTENT_PARSER_CONFIDENCE
+
+
+def test_fixture_corpus():
+    print("\n=== TEST 3: Confident parses are right on the fixture corpus ===")
+    parser = get_intent_parser()
+    with open("intent_fixtures.json", "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    confident = wrong = 0
+    for fixture in corpus:
+        parsed = parser.parse(fixture["query"])
+        if parsed["confidence"] < settings.INTENT_PARSER_CONFIDENCE:
+            continue
+        confident += 1
+        got = intent_fields(parsed["intent"])
+        for field, value in fixture["expected"].items():
+            if not (got[field] and value.lower() in got[field].lower()):
+                wrong += 1
+                print(f"✗ {fixture['query']}: {field} expected {value!r}, got {got[field]!r}")
+    print(f"confident on {confident}/{len(corpus)}")
+    assert wrong == 0
+    assert confident >= len(corpus) // 2
+
+
+def test_preference_extraction_skips_llm():
+    print("\n=== TEST 4: Preference learning uses the parser ===")
+    system = PreferenceLearningSystem.__new__(PreferenceLearningSystem)
+    prefs = system.extract_preferences_from_query("cheap quiet cafe with wifi in the morning")
+    print(prefs)
+    assert prefs == {
+        "venue_types": ["cafe"],
+        "atmosphere": ["quiet"],
+        "budget": ["budget"],
+        "time_preferences": ["morning"],
+        "amenities": ["wifi"]
+    }
+    assert system._fallback_preference_extraction("lively pub")["atmosphere"] == ["lively"]
+
+
+if __name__ == "__main__":
+    test_automaton_matches()
+    test_confidence()
+    test_fixture_corpus()
+    test_preference_extraction_skips_llm()
+    print("\n✅ All intent parser tests passed")
@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+import app.core.openai_client as openai_client
+from app.core.config import settings
+from app.core.openai_client import OpenAIChatClient, area_key, hour_bucket
+
+
+class FakeChatClient(OpenAIChatClient):
+    """Completions that take `delay` seconds; tracks how many ran at once"""
+
+    def __init__(self, delay=0.05):
+        super().__init__(api_key="test")
+        self.delay = delay
+        self.prompts = []
+        self.running = 0
+        self.peak = 0
+
+    async def _create(self, prompt, max_tokens):
+        self.prompts.append(prompt)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        return f"answer {len(self.prompts)}"
+
+
+def test_cache_keys():
+    print("\n=== TEST 1: Coordinates snap to neighbourhood cells ===")
+    assert area_key({"lat": 12.97194, "lng": 77.59369}) == area_key("12.9712,77.5941") == "12.97,77.59"
+    assert area_key([12.97194, 77.59369], precision=3) == "12.972,77.594"
+    assert area_key({"latitude": 12.9, "longitude": 77.6}) == "12.9,77.6"
+    assert area_key({}) is None and area_key("Indiranagar") is None and area_key(None) is None
+    assert hour_bucket(datetime(2025, 3, 1, 21, 45)) == "2025-03-01T21"
+
+    # The real client is built on the shared connection pool without touching the network
+    client = OpenAIChatClient(api_key="test")._openai()
+    print(type(client).__name__)
+    assert type(client).__name__ == "AsyncOpenAI"
+
+
+def test_dedup_cap_and_timeout():
+    print("\n=== TEST 2: Shared answers, concurrency cap and timeouts ===")
+    client = FakeChatClient()
+
+    async def burst():
+        same = [client.acomplete("assess MG Road", 300, cache_key=("area", "12.97,77.59", "21")) for _ in range(5)]
+        others = [client.acomplete(f"alert {n}", 250) for n in range(2 * settings.OPENAI_MAX_CONCURRENCY)]
+        return await asyncio.gather(*same, *others)
+
+    results = asyncio.run(burst())
+    print(client.stats())
+    assert len(set(results[:5])) == 1                    # one completion for the five identical requests
+    assert len(client.prompts) == 1 + 2 * settings.OPENAI_MAX_CONCURRENCY
+    assert client.peak <= settings.OPENAI_MAX_CONCURRENCY
+    assert asyncio.run(client.acomplete("assess MG Road", 300, cache_key=("area", "12.97,77.59", "21"))) == results[0]
+
+    original = settings.OPENAI_TIMEOUT
+    settings.OPENAI_TIMEOUT = 0.05
+    try:
+        slow = FakeChatClient(delay=1)
+        asyncio.run(slow.acomplete("slow", 100))
+        assert False, "expected a timeout"
+    except TimeoutError as e:
+        print(e)
+        assert slow.stats()["timeouts"] == 1
+    finally:
+        settings.OPENAI_TIMEOUT = original
+
+
+def test_area_safety_endpoint():
+    print("\n=== TEST 3: /area-safety reuses the answer for the same neighbourhood and hour ===")
+    original = openai_client._openai_client
+    fake = FakeChatClient()
+    openai_client._openai_client = fake
+    try:
+        from run import app
+        client = TestClient(app)
+        first = client.post("/api/safety/area-safety", json={"coordinates": {"lat": 12.9719, "lng": 77.5937}, "time_of_day": "night"})
+        nearby = client.post("/api/safety/area-safety", json={"coordinates": {"lat": 12.9731, "lng": 77.5902}, "time_of_day": "night"})
+        other = client.post("/api/safety/area-safety", json={"coordinates": {"lat": 12.9352, "lng": 77.6245}, "time_of_day": "night"})
+        alert = client.post("/api/safety/safety-alerts", json={"user_location": {"lat": 12.97, "lng": 77.59}})
+    finally:
+        openai_client._openai_client = original
+
+    print(first.json(), nearby.json(), other.json())
+    assert first.status_code == nearby.status_code == other.status_code == alert.status_code == 200
+    assert first.json()["area_safety"] == nearby.json()["area_safety"]
+    assert other.json()["area_safety"] != first.json()["area_safety"]
+    assert len(fake.prompts) == 3  # two area assessments + the uncached alert
+
+
+if __name__ == "__main__":
+    test_cache_keys()
+    test_dedup_cap_and_timeout()
+    test_area_safety_endpoint()
+    print("\n✅ All OpenAI client tests passed")
@@ -0,0 +1,219 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from app.agents.tools.preference_learning import PreferenceLearningSystem
+from app.agents.tools.preference_store import (FirestorePreferenceStore, PreferenceStore, SQLitePreferenceStore,
+                                               apply_changes, import_json_profiles, profile_changes)
+
+
+def test_profile_changes():
+    print("\n=== TEST 1: Only changed fields are written ===")
+    before = {"count": 1, "preferences": {"cuisine": {"italian": 0.2}, "budget": {}}, "history": [{"a": 1}], "tags": ["x", "y"]}
+    after = {"count": 2, "preferences": {"cuisine": {"italian": 0.36, "thai": 0.2}, "budget": {}}, "history": [{"a": 1}, {"b": 2}], "tags": ["y"]}
+    sets, appends = profile_changes(before, after)
+    print(sets, appends)
+    assert sets == {("count",): 2, ("preferences", "cuisine", "italian"): 0.36, ("preferences", "cuisine", "thai"): 0.2, ("tags",): ["y"]}
+    assert appends == {("history",): [{"b": 2}]}
+
+
+def test_sqlite_store():
+    print("\n=== TEST 2: SQLite store partial updates, batch reads and archiving ===")
+    store = SQLitePreferenceStore(":memory:")
+    store.put("u1", {"user_id": "u1", "interaction_count": 0, "preferences": {"venue_types": {}}, "history": []})
+    store.put("u2", {"user_id": "u2", "interaction_count": 3, "preferences": {"venue_types": {}}, "history": []})
+
+    assert store.update("u1", {"interaction_count": 1, ("preferences", "venue_types", "coffee shop"): 0.2},
+                        {"history": [{"venue": "Cafe A"}, {"venue": "Cafe B"}]})
+    assert not store.update("missing", {"interaction_count": 1})
+    profiles = store.get_many(["u1", "u2", "missing"])
+    print(profiles["u1"])
+    assert set(profiles) == {"u1", "u2"}
+    assert profiles["u1"]["preferences"]["venue_types"] == {"coffee shop": 0.2}
+    assert profiles["u1"]["history"] == [{"venue": "Cafe A"}, {"venue": "Cafe B"}]
+
+    time.sleep(0.01)
+    cutoff = time.time()
+    store.update("u2", {"interaction_count": 4})
+    assert store.stale_user_ids(cutoff) == ["u1"]
+    assert store.archive("u1") and store.get("u1") is None and not store.archive("u1")
+    assert store.delete("u1") and not store.delete("u1")
+    print(store.stats())
+    assert store.stats()["users"] == 1 and store.stats()["archived_users"] == 0
+
+
+def test_concurrent_interactions_keep_every_update():
+    print("\n=== TEST 3: Concurrent interactions for one user don't lose updates ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLitePreferenceStore(os.path.join(tmp, "preferences.sqlite3"))
+        system = PreferenceLearningSystem(storage_path=os.path.join(tmp, "preferences"), store=store)
+
+        def interact(n):
+            system.update_preferences_from_interaction("user-1", {"query": "quiet cafe with wifi", "selected_venue": f"v{n}", "rating": 5})
+
+        threads = [threading.Thread(target=interact, args=(n,)) for n in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stored = store.get("user-1")
+        print(stored["interaction_count"], len(stored["successful_recommendations"]), store.stats())
+        assert stored["interaction_count"] == 16
+        assert sorted(r["venue"] for r in stored["successful_recommendations"]) == sorted(f"v{n}" for n in range(16))
+        assert stored["preferences"]["venue_types"]["cafe"] > 0.9
+        assert store.stats()["writes"] == 1 and store.stats()["partial_writes"] == 15
+        assert len(store.lock) == 0
+
+        profiles = system.load_many_user_preferences(["user-1", "user-2"])
+        assert profiles["user-1"]["interaction_count"] == 16 and profiles["user-2"]["interaction_count"] == 0
+
+        assert system.delete_user_data("user-1") and store.get("user-1") is None
+
+
+def test_json_profiles_imported():
+    print("\n=== TEST 4: Old JSON profiles are imported once ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = os.path.join(tmp, "preferences")
+        os.makedirs(legacy)
+        with open(os.path.join(legacy, "user_alice.json"), "w", encoding="utf-8") as f:
+            json.dump({"user_id": "alice", "interaction_count": 7}, f)
+
+        store = SQLitePreferenceStore(":memory:")
+        assert import_json_profiles(store, legacy) == 1
+        assert import_json_profiles(store, legacy) == 0
+        assert store.get("alice")["interaction_count"] == 7
+        assert os.listdir(legacy) == ["migrated"]
+
+
+def test_venue_inference_runs_outside_the_user_lock():
+    print("\n=== TEST 5: Learning from a venue doesn't hold the user's lock during the LLM call ===")
+    store = SQLitePreferenceStore(":memory:")
+    system = PreferenceLearningSystem(storage_path="/nonexistent", store=store)
+    held = []
+
+    def infer(venue_details, rating):
+        held.append(len(store.lock))  # nobody holds or waits for the user's lock
+        return {"venue_types": ["library"], "atmosphere": ["quiet"]}
+
+    system._infer_venue_preferences = infer
+    venue = {"name": "State Central Library", "categories": [{"name": "Library"}], "price": 1}
+    profile = system.update_preferences_from_interaction("u1", {"selected_venue": "v1", "venue_details": venue, "rating": 5})
+    print(held, profile["preferences"]["venue_types"])
+    assert held == [0]
+    assert profile["preferences"]["venue_types"] == {"library": 0.2} and profile["preferences"]["atmosphere"] == {"quiet": 0.2}
+
+    # Inference failed: basic rules still learn from the venue
+    system._infer_venue_preferences = lambda venue_details, rating: None
+    profile = system.update_preferences_from_interaction("u1", {"selected_venue": "v1", "venue_details": venue, "rating": 5})
+    assert profile["preferences"]["budget"] == {"budget": 0.2}
+    assert store.get("u1")["interaction_count"] == 2
+
+
+class InMemoryFirestore:
+    """The parts of a Firestore client the store uses, over a dict (writes in a transaction land on commit)"""
+
+    def __init__(self):
+        self.documents = {}
+
+    def collection(self, name):
+        return InMemoryCollection(self, name)
+
+    def transaction(self):
+        return InMemoryTransaction(self)
+
+    def get_all(self, documents):
+        return [document.get() for document in documents]
+
+
+class InMemoryCollection:
+    def __init__(self, db, name):
+        self.db, self.name = db, name
+
+    def document(self, document_id):
+        return InMemoryDocument(self.db, (self.name, document_id))
+
+
+class InMemoryDocument:
+    def __init__(self, db, key):
+        self.db, self.key = db, key
+        self.id = key[1]
+
+    def get(self, transaction=None):
+        data = self.db.documents.get(self.key)
+        return type("Snapshot", (), {"id": self.id, "exists": data is not None,
+                                     "to_dict": lambda _: json.loads(json.dumps(data))})()
+
+    def set(self, data):
+        self.db.documents[self.key] = json.loads(json.dumps(data))
+
+    def update(self, fields):
+        if self.key not in self.db.documents:
+            raise NotFound("no document")
+        apply_changes(self.db.documents[self.key], {FieldPath.from_api_repr(f).parts: v for f, v in fields.items()})
+
+
+class InMemoryTransaction:
+    _read_only = False
+    _max_attempts = 1
+    _id = b"t"
+
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def _clean_up(self):
+        self.writes = []
+
+    def _begin(self, retry_id=None):
+        pass
+
+    def _rollback(self):
+        self.writes = []
+
+    def _commit(self):
+        for document, fields in self.writes:
+            document.update(fields)
+
+    def update(self, document, fields):
+        self.writes.append((document, fields))
+
+
+def test_backends_share_one_contract():
+    print("\n=== TEST 6: Backends are complete and keep repeated list items alike ===")
+    try:
+        type("HalfStore", (PreferenceStore,), {"put": lambda self, user_id, profile: None})()
+        assert False, "expected an incomplete backend to fail on construction"
+    except TypeError as e:
+        print(e)
+
+    db = InMemoryFirestore()
+    stores = [SQLitePreferenceStore(":memory:"), FirestorePreferenceStore("prefs", client=db)]
+    for store in stores:
+        store.put("u1", {"interaction_count": 0, "preferences": {"venue_types": {}}, "history": [{"venue": "Cafe A"}]})
+        # The same venue twice in one interaction, then again later: every visit is kept
+        assert store.update("u1", {("preferences", "venue_types", "coffee shop"): 0.2},
+                            {"history": [{"venue": "Cafe A"}, {"venue": "Cafe A"}]})
+        assert store.update("u1", {"interaction_count": 1})
+        assert not store.update("missing", {"interaction_count": 1}, {"history": [{"venue": "Cafe A"}]})
+    sqlite_profile, firestore_profile = (store.get("u1") for store in stores)
+    print(firestore_profile)
+    assert firestore_profile["history"] == [{"venue": "Cafe A"}] * 3
+    assert firestore_profile["preferences"]["venue_types"] == {"coffee shop": 0.2}
+    assert firestore_profile["interaction_count"] == 1
+    assert sqlite_profile == firestore_profile
+
+
+if __name__ == "__main__":
+    test_profile_changes()
+    test_sqlite_store()
+    test_concurrent_interactions_keep_every_update()
+    test_json_profiles_imported()
+    test_venue_inference_runs_outside_the_user_lock()
+    test_backends_share_one_contract()
+    print("\n✅ All preference store tests passed")
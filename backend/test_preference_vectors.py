@@ -0,0 +1,111 @@
+import random
+import time
+
+import numpy as np
+
+from app.agents.tools.preference_learning import PreferenceLearningSystem
+from app.agents.tools.preference_store import SQLitePreferenceStore
+from app.agents.tools.preference_vectors import PreferenceVocabulary, normalize_term
+
+
+def test_vocabulary_layout():
+    print("\n=== TEST 1: Profiles and venues share one fixed layout ===")
+    vocab = PreferenceVocabulary({"venue_types": ["cafe", "bar"], "budget": ["budget", "affordable", "expensive"]})
+    first = vocab.compile({"venue_types": {"cafe": 0.6}, "budget": {"affordable": 0.5}})
+    assert first.dtype == np.float32 and first.tolist() == [np.float32(0.6), 0, 0, 0.5, 0]
+
+    # Learned terms are appended; earlier slots never move
+    second = vocab.compile({"venue_types": {"coffee shop": 0.4, "cafe": 0.2}})
+    assert len(second) == 6 and vocab.slot(5) == ("venue_types", "coffee shop")
+    assert list(vocab.category_indices("venue_types")) == [0, 1, 5]
+    assert normalize_term("Café / Small_Group") == "cafe small group"
+
+    venues = [
+        {"name": "Third Wave", "categories": [{"name": "Coffee Shop"}], "price": 2},
+        {"name": "Toit", "categories": ["Brewery", "Pub"], "price": 4},
+        {"name": "Cubbon Park", "categories": [{"name": "Park"}]},
+    ]
+    features = vocab.venue_features(venues)
+    print(features)
+    assert features.shape == (3, 6)
+    assert features[0].tolist() == [1, 0, 0, 1, 0, 1]  # cafe (coffee), affordable (price 2), coffee shop
+    assert features[1].tolist() == [0, 1, 0, 0, 1, 0]  # bar (pub), expensive (price 4)
+    assert not features[2].any()
+
+    # Learned terms are capped; the layout stops growing instead of taking every free-form term
+    capped = PreferenceVocabulary({"venue_types": ["cafe"]}, max_learned=2)
+    vector = capped.compile({"venue_types": {"cafe": 0.5, "board game cafe": 0.4, "rooftop": 0.3, "karaoke": 0.3},
+                             "moods": {"nostalgic": 0.9}})
+    print(capped.stats())
+    assert len(vector) == len(capped) == 3 and capped.stats()["unslotted_terms"] == 2
+    assert len(capped.compile({"venue_types": {"jazz club": 0.8}})) == 3
+
+
+def test_learned_price_tier_matches_venues():
+    print("\n=== TEST 2: A price tier learned from a venue scores on venues of that tier ===")
+    system = PreferenceLearningSystem(storage_path="/nonexistent", store=SQLitePreferenceStore(":memory:"))
+    profile = system.load_user_preferences("u1")
+    system._fallback_venue_learning(profile, {"categories": [{"name": "Park"}], "price": 2}, 5)
+    assert profile["preferences"]["budget"] == {"affordable": 0.2}
+
+    scores = system.score_venues(["u1"], [{"name": "Somewhere", "price": 2}, {"name": "Elsewhere", "price": 3}])
+    print(scores.ravel())
+    assert scores[0, 0] > 0 and scores[1, 0] == 0
+
+
+def test_personalized_recommendations_unchanged():
+    print("\n=== TEST 3: Recommendations pick the top preferences per category ===")
+    system = PreferenceLearningSystem(storage_path="/nonexistent", store=SQLitePreferenceStore(":memory:"))
+    profile = system.load_user_preferences("u1")
+    profile["preferences"]["venue_types"] = {"cafe": 0.72, "library": 0.31, "bar": 0.3, "coffee shop": 0.55, "mall": 0.41}
+    profile["preferences"]["budget"] = {"affordable": 0.45, "luxury": 0.2}
+    profile["preferences"]["atmosphere"] = {"quiet": 0.25}
+
+    result = system.get_personalized_recommendations("u1", {})
+    print(result["personalized_filters"], result["suggested_categories"], result["budget_preference"])
+    assert result["personalized_filters"] == {"venue_types": [("cafe", 0.72), ("coffee shop", 0.55)],
+                                              "budget": [("affordable", 0.45)]}
+    assert result["suggested_categories"] == ["cafe", "coffee shop", "mall", "affordable"]
+    assert result["budget_preference"] == "affordable"
+    assert isinstance(profile["preferences"]["venue_types"], dict)  # stored and exported as dicts
+
+
+def test_group_scoring_is_one_matrix_multiply():
+    print("\n=== TEST 4: 10 members x 200 venues in one matrix multiply ===")
+    system = PreferenceLearningSystem(storage_path="/nonexistent", store=SQLitePreferenceStore(":memory:"))
+    rng = random.Random(7)
+    members = [f"member-{n}" for n in range(10)]
+    for user_id in members:
+        profile = system.load_user_preferences(user_id)
+        for category, terms in system.preference_categories.items():
+            profile["preferences"][category] = {term: round(rng.random(), 3) for term in rng.sample(terms, 2)}
+    kinds = ["Cafe", "Restaurant", "Bar", "Library", "Mall", "Park"]
+    venues = [{"name": f"Venue {n}", "categories": [{"name": rng.choice(kinds)}], "tags": rng.sample(["wifi", "quiet", "outdoor", "music", "vegan"], 2),
+               "price": rng.randint(1, 4)} for n in range(200)]
+
+    started = time.perf_counter()
+    scores = system.score_venues(members, venues)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(scores.shape, scores.dtype, f"{elapsed_ms:.2f} ms")
+    assert scores.shape == (200, 10) and scores.dtype == np.float32
+
+    # Same as scoring each member against each venue with the dict profiles
+    for v in (0, 57, 199):
+        venue_terms = {system.vocabulary.slot(i) for i in np.flatnonzero(system.vocabulary.venue_features([venues[v]]))}
+        for m in (0, 9):
+            prefs = system.load_user_preferences(members[m])["preferences"]
+            expected = sum(score for category, items in prefs.items() for term, score in items.items() if (category, term) in venue_terms)
+            assert abs(scores[v, m] - expected) < 1e-5
+
+    ranked = system.rank_venues_for_group(members, venues, limit=5)
+    assert len(ranked) == 5 and ranked[0]["preference_score"] == round(float(scores.mean(axis=1).max()), 3)
+    assert [r["preference_score"] for r in ranked] == sorted((r["preference_score"] for r in ranked), reverse=True)
+    assert set(ranked[0]["member_scores"]) == set(members)
+
+
+if __name__ == "__main__":
+    test_vocabulary_layout()
+    test_learned_price_tier_matches_venues()
+    test_personalized_recommendations_unchanged()
+    test_group_scoring_is_one_matrix_multiply()
+    print("\n✅ All preference vector tests passed")
@@ -0,0 +1,151 @@
+import threading
+import time
+
+from app.agents.tools.preference_learning import PreferenceLearningSystem
+from app.agents.tools.preference_store import SQLitePreferenceStore
+from app.agents.tools.preference_writer import PreferenceWriteBehind
+
+
+class FlakyStore(SQLitePreferenceStore):
+    """Fails the first `failures` batch writes"""
+
+    def __init__(self, failures=1):
+        super().__init__(":memory:")
+        self.failures = failures
+
+    def write_batch(self, puts, updates):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        return super().write_batch(puts, updates)
+
+
+class SlowStore(SQLitePreferenceStore):
+    """Batch writes wait until `release` is set"""
+
+    def __init__(self):
+        super().__init__(":memory:")
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def write_batch(self, puts, updates):
+        self.writing.set()
+        self.release.wait(5)
+        return super().write_batch(puts, updates)
+
+
+def test_burst_coalesces_into_one_write():
+    print("\n=== TEST 1: A burst of updates from one user becomes one write ===")
+    store = SQLitePreferenceStore(":memory:")
+    store.put("u1", {"interaction_count": 0, "preferences": {"venue_types": {}}, "history": []})
+    writer = PreferenceWriteBehind(store, interval=60)
+
+    for n in range(1, 11):
+        writer.update("u1", {"interaction_count": n, ("preferences", "venue_types", "cafe"): n / 10}, {"history": [n]})
+    assert store.get("u1")["interaction_count"] == 0  # nothing written yet
+    assert writer.stats()["pending_profiles"] == 1
+
+    assert writer.flush() == 1
+    stored = store.get("u1")
+    print(stored, writer.stats())
+    assert stored == {"interaction_count": 10, "preferences": {"venue_types": {"cafe": 1.0}}, "history": list(range(1, 11))}
+    assert store.stats()["partial_writes"] == 1 and store.stats()["batches"] == 1
+    assert writer.stats()["coalesced_updates"] == 9 and writer.stats()["max_flush_lag_ms"] > 0
+    writer.close()
+
+
+def test_size_threshold_and_shutdown():
+    print("\n=== TEST 2: Flush on size threshold and on close ===")
+    store = SQLitePreferenceStore(":memory:")
+    writer = PreferenceWriteBehind(store, interval=60, max_pending=3)
+    for user in ("a", "b", "c"):
+        writer.put(user, {"user_id": user})
+    deadline = time.monotonic() + 2
+    while writer.stats()["pending_profiles"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert set(store.get_many(["a", "b", "c"])) == {"a", "b", "c"}
+
+    writer.put("d", {"user_id": "d"})
+    writer.close()
+    assert store.get("d") == {"user_id": "d"}
+    writer.update("d", {"late": True})  # after close: written through
+    print(store.get("d"), writer.stats())
+    assert store.get("d")["late"] is True
+
+
+def test_failed_flush_is_retried():
+    print("\n=== TEST 3: A failed flush keeps its changes for the next one ===")
+    store = FlakyStore()
+    store.put("u1", {"count": 0, "history": []})
+    writer = PreferenceWriteBehind(store, interval=60)
+    writer.update("u1", {"count": 1}, {"history": ["a"]})
+    assert writer.flush() == 0 and writer.stats()["failures"] == 1
+    writer.update("u1", {"count": 2}, {"history": ["b"]})
+    assert writer.flush() == 1
+    print(store.get("u1"))
+    assert store.get("u1") == {"count": 2, "history": ["a", "b"]}
+    writer.close()
+
+
+def test_learning_system_writes_behind():
+    print("\n=== TEST 4: Interactions don't wait for storage ===")
+    store = SQLitePreferenceStore(":memory:")
+    writer = PreferenceWriteBehind(store, interval=60)
+    system = PreferenceLearningSystem(storage_path="/nonexistent", writer=writer)
+
+    for _ in range(5):
+        profile = system.update_preferences_from_interaction("user-1", {"query": "quiet cafe with wifi"})
+    assert profile["interaction_count"] == 5
+    assert store.get("user-1") is None and store.stats()["writes"] == 0
+
+    # Another instance sharing the writer reads its own writes
+    other = PreferenceLearningSystem(storage_path="/nonexistent", writer=writer)
+    assert other.load_user_preferences("user-1")["interaction_count"] == 5
+    assert store.get("user-1")["interaction_count"] == 5 and store.stats()["writes"] == 1
+
+    system.update_preferences_from_interaction("user-2", {"query": "quiet cafe with wifi"})
+    assert system.delete_user_data("user-2")
+    writer.flush()
+    print(writer.stats())
+    assert store.get("user-2") is None  # queued write discarded with the user's data
+    writer.close()
+
+
+def test_delete_is_not_undone_by_a_flush():
+    print("\n=== TEST 5: A deleted user isn't written back by a flush in flight or a retry ===")
+    store = SlowStore()
+    writer = PreferenceWriteBehind(store, interval=60)
+    system = PreferenceLearningSystem(storage_path="/nonexistent", writer=writer)
+    system.update_preferences_from_interaction("u1", {"query": "quiet cafe with wifi"})
+
+    flushing = threading.Thread(target=writer.flush)
+    flushing.start()
+    assert store.writing.wait(5)  # the flush has taken u1's profile and is writing it
+    deleting = threading.Thread(target=system.delete_user_data, args=("u1",))
+    deleting.start()
+    time.sleep(0.05)
+    store.release.set()
+    flushing.join(5)
+    deleting.join(5)
+    print(store.stats())
+    assert store.get("u1") is None
+    writer.close()
+
+    store = FlakyStore()
+    writer = PreferenceWriteBehind(store, interval=60)
+    system = PreferenceLearningSystem(storage_path="/nonexistent", writer=writer)
+    system.update_preferences_from_interaction("u2", {"query": "quiet cafe with wifi"})
+    assert writer.flush() == 0  # failed; u2 waits for a retry
+    assert system.delete_user_data("u2")
+    writer.flush()
+    writer.close()
+    assert store.get("u2") is None and writer.stats()["pending_profiles"] == 0
+
+
+if __name__ == "__main__":
+    test_burst_coalesces_into_one_write()
+    test_size_threshold_and_shutdown()
+    test_failed_flush_is_retried()
+    test_learning_system_writes_behind()
+    test_delete_is_not_undone_by_a_flush()
+    print("\n✅ All preference write-behind tests passed")
@@ -0,0 +1,119 @@
+import time
+
+from app.agents.tools import profile_cache
+from app.agents.tools.preference_learning import PreferenceLearningSystem
+from app.agents.tools.preference_store import SQLitePreferenceStore, profile_changes
+from app.agents.tools.profile_cache import ProfileCache, changes_size, profile_size
+from app.core.config import settings
+
+
+class FlakyStore(SQLitePreferenceStore):
+    """Fails the next `failures` writes"""
+
+    def __init__(self):
+        super().__init__(":memory:")
+        self.failures = 0
+
+    def update(self, user_id, sets, appends=None):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("database is locked")
+        return super().update(user_id, sets, appends)
+
+
+def test_lru_and_memory_cap():
+    print("\n=== TEST 1: LRU eviction by count and by resident bytes ===")
+    cache = ProfileCache(maxsize=3, max_bytes=10_000)
+    for user in ("a", "b", "c"):
+        cache.set(user, {"user_id": user})
+    assert cache.get("a") == {"user_id": "a"}  # a is now most recently used
+    cache.set("d", {"user_id": "d"})
+    assert cache.get("b") is None and "a" in cache and "d" in cache
+
+    big = {"user_id": "big", "history": ["x" * 100] * 60}
+    cache.set("big", big)
+    stats = cache.stats()
+    print(stats)
+    assert stats["resident_bytes"] <= 10_000 and "big" in cache
+    assert stats["resident_bytes"] == sum(profile_size(p) for p in (cache.get(u) for u in ("a", "c", "d", "big")) if p)
+    assert stats["evictions"] >= 1 and 0 < stats["hit_ratio"] < 1
+
+
+def test_ttl_and_dirty_write_back():
+    print("\n=== TEST 2: Expired and evicted dirty profiles are written back ===")
+    written = []
+    cache = ProfileCache(maxsize=2, ttl=0.05, on_evict=lambda user, profile, dirty: dirty and written.append(user))
+    cache.set("clean", {"n": 1})
+    cache.set("dirty", {"n": 2}, dirty=True)
+    assert cache.is_dirty("dirty") and not cache.is_dirty("clean")
+    time.sleep(0.06)
+    assert cache.get("dirty") is None and written == ["dirty"]
+
+    cache.set("u1", {"n": 1}, dirty=True)
+    cache.set("u2", {"n": 2})
+    cache.set("u3", {"n": 3})
+    cache.set("u4", {"n": 4}, dirty=True)
+    assert cache.pop("u4") == {"n": 4}  # deleted users are dropped, not written back
+    print(written, cache.stats())
+    assert written == ["dirty", "u1"] and cache.stats()["write_backs"] == 2
+
+
+def test_learning_system_cache():
+    print("\n=== TEST 3: Hot users come from memory, cold users are evicted ===")
+    store = FlakyStore()
+    original = settings.PREFERENCE_CACHE_SIZE
+    settings.PREFERENCE_CACHE_SIZE = 2
+    try:
+        system = PreferenceLearningSystem(storage_path="/nonexistent", store=store)
+    finally:
+        settings.PREFERENCE_CACHE_SIZE = original
+
+    for _ in range(5):
+        system.update_preferences_from_interaction("hot", {"query": "quiet cafe with wifi"})
+    assert store.stats()["reads"] == 1  # loaded once, then served from the cache
+    assert system.session_cache.stats()["hits"] >= 4
+
+    # A failed save keeps the changes in memory, and they reach storage on eviction
+    store.failures = 1
+    system.update_preferences_from_interaction("hot", {"query": "quiet cafe with wifi"})
+    assert system.session_cache.is_dirty("hot") and store.get("hot")["interaction_count"] == 5
+    system.load_user_preferences("cold-1")
+    system.load_user_preferences("cold-2")
+    print(system.session_cache.stats())
+    assert "hot" not in system.session_cache and store.get("hot")["interaction_count"] == 6
+    assert system.load_user_preferences("hot")["interaction_count"] == 6
+    assert system.session_cache.stats()["size"] == 2
+
+
+def test_saves_resize_without_serializing():
+    print("\n=== TEST 4: Saving an update resizes the entry from the changed fields ===")
+    before = {"n": 1, "prefs": {"cafe": 0.2, "bar": 0.5}, "history": [{"venue": "v1"}], "when": "2026-01-01"}
+    after = {"n": 12, "prefs": {"cafe": 0.36, "bar": 0.5, "library": 0.2}, "history": [{"venue": "v1"}, {"venue": "v22"}],
+             "when": "2026-01-01", "new": True}
+    assert profile_size(before) + changes_size(before, *profile_changes(before, after)) == profile_size(after)
+    empty = {"prefs": {}, "history": []}
+    filled = {"prefs": {"cafe": 0.2, "bar": 0.2}, "history": ["a", "b"]}
+    assert profile_size(empty) + changes_size(empty, *profile_changes(empty, filled)) == profile_size(filled)
+
+    system = PreferenceLearningSystem(storage_path="/nonexistent", store=SQLitePreferenceStore(":memory:"))
+    system.update_preferences_from_interaction("u1", {"query": "quiet cafe with wifi"})
+    measured = []
+    original = profile_cache.profile_size
+    profile_cache.profile_size = lambda profile: measured.append(1) or original(profile)
+    try:
+        for n in range(5):
+            system.update_preferences_from_interaction("u1", {"query": "rooftop bar", "selected_venue": f"v{n}", "rating": 5})
+    finally:
+        profile_cache.profile_size = original
+    stats = system.session_cache.stats()
+    print(measured, stats["resident_bytes"], profile_size(system.load_user_preferences("u1")))
+    assert measured == []
+    assert stats["resident_bytes"] == profile_size(system.load_user_preferences("u1"))
+
+
+if __name__ == "__main__":
+    test_lru_and_memory_cap()
+    test_ttl_and_dirty_write_back()
+    test_learning_system_cache()
+    test_saves_resize_without_serializing()
+    print("\n✅ All profile cache tests passed")
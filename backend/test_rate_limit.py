@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+import httpx
+
+from app.core.http_client import shared_http_client
+from app.core.rate_limit import TokenBucket, CircuitBreaker, RateLimiter, backoff_delay, current_caller
+from app.agents.tools.foursquare_client import FoursquareClient
+
+
+def run_with_mock_transport(handler, fn):
+    """Run fn() with the shared HTTP client answering from `handler`"""
+    shared_http_client.loop  # make sure the client loop is running
+    original = shared_http_client._client
+    shared_http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        return fn()
+    finally:
+        shared_http_client._client = original
+
+
+def test_token_bucket_queues_instead_of_failing():
+    print("\n=== TEST 1: Token bucket ===")
+
+    async def main():
+        bucket = TokenBucket(rate=20, capacity=2)
+        start = time.monotonic()
+        results = await asyncio.gather(*[bucket.acquire() for _ in range(6)])
+        return results, time.monotonic() - start
+
+    results, elapsed = asyncio.run(main())
+    print(f"6 acquisitions at 20/s with burst 2 took {elapsed:.2f}s")
+    assert all(results)
+    assert 0.15 < elapsed < 0.5
+
+
+def test_per_caller_share():
+    print("\n=== TEST 2: Per-caller fair share ===")
+
+    async def main():
+        limiter = RateLimiter(rate=100, burst=100, per_caller_rate=1, per_caller_burst=2, queue_timeout=0.1)
+        current_caller.set("noisy_user")
+        noisy = [await limiter.acquire() for _ in range(4)]
+        current_caller.set("quiet_user")
+        quiet = await limiter.acquire()
+        return noisy, quiet
+
+    noisy, quiet = asyncio.run(main())
+    print(f"noisy user: {noisy}, quiet user: {quiet}")
+    assert noisy == [True, True, False, False]
+    assert quiet is True
+
+
+def test_backoff_honours_retry_after():
+    print("\n=== TEST 3: Backoff with jitter ===")
+    delays = [backoff_delay(0, retry_after=2) for _ in range(50)]
+    assert all(2 <= d <= 2.5 for d in delays)
+    assert len(set(delays)) > 1
+    assert all(0 <= backoff_delay(3) <= 4 for _ in range(50))
+
+
+def test_429_retry_then_success():
+    print("\n=== TEST 4: 429 retry through the shared limiter ===")
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.1"}, json={"message": "Rate limit exceeded"})
+        return httpx.Response(200, json={"results": []})
+
+    client = FoursquareClient(api_key="test")
+    result = run_with_mock_transport(handler, lambda: client.request("/places/search", {"query": "cafe"}))
+    print(result, client.rate_limiter.stats())
+    assert result == {"results": []}
+    assert len(calls) == 2
+    assert client.rate_limiter.retries == 1
+
+
+def test_credits_exhausted_opens_circuit():
+    print("\n=== TEST 5: Credits circuit breaker ===")
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(429, json={"message": "No API credits remaining"})
+
+    client = FoursquareClient(api_key="test")
+    first = run_with_mock_transport(handler, lambda: client.request("/places/search", {"query": "cafe"}))
+    second = run_with_mock_transport(handler, lambda: client.request("/places/search", {"query": "bar"}))
+    print(first, second)
+    assert len(calls) == 1
+    assert second.get("circuit_open") is True
+    assert "credits" in second["message"].lower()
+
+    breaker = CircuitBreaker(cooldown=0)
+    breaker.open("credits")
+    assert breaker.allow() and breaker.state == "half_open"
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_half_open_probe_always_settles():
+    print("\n=== TEST 6: A probe without an outcome doesn't leave the breaker half open ===")
+    # Probe exhausts its plain-429 retries: no verdict, the next call probes again
+    client = FoursquareClient(api_key="test")
+    client.credits_breaker = CircuitBreaker(cooldown=0)
+    client.credits_breaker.open("No API credits remaining")
+    client.rate_limiter.bucket.pause = lambda seconds: None
+    limited = lambda request: httpx.Response(429, json={"message": "Rate limit exceeded"})
+    result = run_with_mock_transport(limited, lambda: client.request("/places/search", {"query": "cafe"}))
+    assert result["status_code"] == 429 and not result.get("circuit_open")
+    assert client.credits_breaker.state == "open"
+
+    # A 200 that isn't JSON is an ordinary error and counts against the probe
+    garbled = lambda request: httpx.Response(200, content=b"<html>oops</html>")
+    result = run_with_mock_transport(garbled, lambda: client.request("/places/search", {"query": "bar"}))
+    print(result)
+    assert result["error"] == "Invalid response from Foursquare" and client.credits_breaker.state == "open"
+
+    ok = lambda request: httpx.Response(200, json={"results": []})
+    assert run_with_mock_transport(ok, lambda: client.request("/places/search", {"query": "pub"})) == {"results": []}
+    assert client.credits_breaker.state == "closed"
+
+    # A probe that never reports back is replaced after another cooldown
+    breaker = CircuitBreaker(cooldown=0.05)
+    breaker.open("credits")
+    time.sleep(0.06)
+    assert breaker.allow() and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == "half_open"
+
+
+if __name__ == "__main__":
+    test_token_bucket_queues_instead_of_failing()
+    test_per_caller_share()
+    test_backoff_honours_retry_after()
+    test_429_retry_then_success()
+    test_credits_exhausted_opens_circuit()
+    test_half_open_probe_always_settles()
+    print("\n✅ All rate limit tests passed")
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import threading
+import time
+
+from app.agents.tools.preference_learning import PreferenceLearningSystem
+from app.agents.tools.preference_store import SQLitePreferenceStore
+from app.agents.tools.preference_writer import PreferenceWriteBehind
+from app.agents.tools.retention_sweep import RetentionSweep
+
+DAY = 86400
+
+
+def age(store, user_id, days):
+    store._conn.execute("UPDATE user_preferences SET updated_at = ? WHERE user_id = ?", (time.time() - days * DAY, user_id))
+
+
+def make_store(stale=25, fresh=5):
+    """A store with `stale` users idle for 100+ days and `fresh` active ones"""
+    store = SQLitePreferenceStore(":memory:")
+    for n in range(stale):
+        store.put(f"old-{n:02d}", {"user_id": f"old-{n:02d}"})
+        age(store, f"old-{n:02d}", 100 + n % 3)
+    for n in range(fresh):
+        store.put(f"new-{n}", {"user_id": f"new-{n}"})
+    return store
+
+
+def test_activity_index_paging():
+    print("\n=== TEST 1: The activity index pages through expired users only ===")
+    store = make_store()
+    cutoff = time.time() - 90 * DAY
+    seen, after = [], None
+    while True:
+        page = store.stale_users(cutoff, 10, after)
+        if not page:
+            break
+        seen.extend(user_id for _, user_id in page)
+        after = page[-1]
+    print(len(seen), seen[:3])
+    assert sorted(seen) == sorted(f"old-{n:02d}" for n in range(25)) and len(set(seen)) == 25
+
+    plan = " ".join(str(row) for row in store._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT updated_at, user_id FROM user_preferences WHERE updated_at < ? "
+        "AND (updated_at, user_id) > (?, ?) ORDER BY updated_at, user_id LIMIT 10", (cutoff, 0, "")))
+    print(plan)
+    assert "idx_user_preferences_activity" in plan
+
+    assert not store.archive("new-0", updated_before=cutoff)  # active users are never archived
+    assert store.archive("old-00", updated_before=cutoff)
+
+
+def test_sweep_is_incremental_resumable_and_paced():
+    print("\n=== TEST 2: The sweep resumes from its checkpoint and is rate limited ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, "sweep.json")
+        store = make_store()
+        archive = lambda user_id, cutoff: store.archive(user_id, updated_before=cutoff)
+
+        sweep = RetentionSweep(store, archive, checkpoint_path=checkpoint, batch_size=4, max_per_second=200)
+        started = time.monotonic()
+        result = sweep.run(90 * DAY, max_users=10)
+        elapsed = time.monotonic() - started
+        print(result, round(elapsed, 3))
+        assert result == {"examined": 10, "archived": 10, "pass_complete": False}
+        assert elapsed >= 9 / 200  # paced at 200 archives per second
+
+        # A new process picks up where the last one stopped
+        resumed = RetentionSweep(store, archive, checkpoint_path=checkpoint, batch_size=4, max_per_second=0)
+        assert resumed.cursor == sweep.cursor
+        result = resumed.run(90 * DAY)
+        print(result, resumed.stats())
+        assert result == {"examined": 15, "archived": 15, "pass_complete": True}
+        assert resumed.stats()["passes"] == 1 and store.stats()["users"] == 5 and store.stats()["archived_users"] == 25
+
+
+def test_cleanup_skips_recent_activity():
+    print("\n=== TEST 3: cleanup_old_data leaves users with unflushed activity alone ===")
+    store = make_store(stale=3, fresh=0)
+    writer = PreferenceWriteBehind(store, interval=60)
+    system = PreferenceLearningSystem(storage_path="/nonexistent", writer=writer)
+    system.retention.max_per_second = 0
+    store.put("old-01", system.create_default_profile("old-01"))
+    age(store, "old-01", 120)
+
+    system.load_user_preferences("old-01")
+    system.update_preferences_from_interaction("old-01", {"query": "quiet cafe"})  # queued, not yet flushed
+    result = system.cleanup_old_data(days_to_keep=90)
+    print(result, system.retention.stats())
+    assert result["archived"] == 2 and system.retention.stats()["skipped"] == 1
+    assert system.session_cache.get("old-00") is None
+    writer.close()
+    assert store.get("old-01")["interaction_count"] == 1
+    assert store.stale_user_ids(time.time() - 90 * DAY) == []
+
+
+def test_interaction_racing_the_sweep_is_kept():
+    print("\n=== TEST 4: An interaction arriving mid-archive isn't lost ===")
+    store = make_store(stale=1, fresh=0)
+    writer = PreferenceWriteBehind(store, interval=60)
+    system = PreferenceLearningSystem(storage_path="/nonexistent", writer=writer)
+    system.retention.max_per_second = 0
+    store.put("old-00", system.create_default_profile("old-00"))
+    age(store, "old-00", 120)
+
+    # The user interacts right after the sweep decided they have no queued changes
+    interaction = threading.Thread(target=system.update_preferences_from_interaction, args=("old-00", {"query": "quiet cafe"}))
+    has_pending = writer.has_pending
+
+    def check_then_race(user_id):
+        pending = has_pending(user_id)
+        interaction.start()
+        interaction.join(0.2)  # blocked on the user's lock until the archive is done
+        return pending
+
+    writer.has_pending = check_then_race
+    system.cleanup_old_data(days_to_keep=90)
+    writer.has_pending = has_pending
+    interaction.join(5)
+    writer.close()
+
+    print(store.get("old-00"), writer.stats())
+    assert store.get("old-00")["interaction_count"] == 1  # written as a fresh profile, not dropped
+
+
+if __name__ == "__main__":
+    test_activity_index_paging()
+    test_sweep_is_incremental_resumable_and_paced()
+    test_cleanup_skips_recent_activity()
+    test_interaction_racing_the_sweep_is_kept()
+    print("\n✅ All retention sweep tests passed")
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from app.agents.task_graph import TaskGraph
+from app.api import routes
+from app.core.executor import get_route_limits
+from app.core.sse import format_event, sse_response, stream_events
+
+
+def parse_stream(text):
+    """[(event, data)] from an SSE body, skipping comment lines"""
+    events = []
+    for frame in text.split("\n\n"):
+        lines = [line for line in frame.splitlines() if line and not line.startswith(":")]
+        if not lines:
+            continue
+        event = next(line[7:] for line in lines if line.startswith("event: "))
+        data = "\n".join(line[6:] for line in lines if line.startswith("data: "))
+        events.append((event, json.loads(data)))
+    return events
+
+
+class StagedAgent:
+    """Solo agent stand-in whose stages take real time, run through the real TaskGraph"""
+
+    async def aprocess_query(self, user_query, user_location=None, on_result=None):
+        venues = [{"fsq_id": "a", "name": "Cafe A"}, {"fsq_id": "b", "name": "Cafe B"}]
+
+        def intent():
+            time.sleep(0.05)
+            return {"search_query": "cafe"}
+
+        def location():
+            return {"coordinates": "12.97,77.59", "source": "default"}
+
+        def speculative_search(location):
+            time.sleep(0.02)
+            return json.dumps(venues)
+
+        def search(intent, location, speculative_search):
+            return speculative_search
+
+        def recommendation(intent, location, search):
+            time.sleep(0.2)
+            return json.dumps({"top": "Cafe A"})
+
+        graph = (TaskGraph()
+                 .add("intent", intent)
+                 .add("location", location)
+                 .add("speculative_search", speculative_search, deps=["location"],
+                      confirm_after=["intent"], keep=lambda r: True)
+                 .add("search", search, deps=["intent", "location", "speculative_search"])
+                 .add("recommendation", recommendation, deps=["intent", "location", "search"]))
+        results = await graph.run(on_result=on_result)
+        return {"status": "success", "query": user_query, "recommendations": json.loads(results["recommendation"])}
+
+
+def test_event_format():
+    print("\n=== TEST 1: SSE framing ===")
+    frame = format_event("venue", {"name": "Café\nA"}, event_id=3)
+    print(repr(frame))
+    assert frame == 'id: 3\nevent: venue\ndata: {"name": "Café\\nA"}\n\n'
+
+
+def test_solo_stream_order():
+    print("\n=== TEST 2: Solo stream emits stages in order ===")
+    routes.solo_agent = StagedAgent()
+    from run import app
+
+    client = TestClient(app)
+    try:
+        with client.stream("POST", "/api/v1/solo/query/stream", json={"query": "quiet cafe"}) as response:
+            assert response.headers["content-type"].startswith("text/event-stream")
+            body = "".join(response.iter_text())
+    finally:
+        routes.solo_agent = None
+
+    events = parse_stream(body)
+    names = [name for name, _ in events]
+    print(names)
+    assert names[-1] == "recommendations"
+    assert names.count("venue") == 2  # speculative and confirmed search are the same venues
+    assert names.index("intent") < names.index("venue") and names.index("location") < names.index("venue")
+    assert events[-1][1]["recommendations"] == {"top": "Cafe A"}
+
+    assert client.post("/api/v1/solo/query/stream", json={"query": "  "}).status_code == 400
+
+
+def test_disconnect_cancels_producer():
+    print("\n=== TEST 3: Closing the stream cancels the producer ===")
+    state = {}
+
+    async def producer(emit):
+        await emit("first", {"n": 1})
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    async def consume():
+        stream = stream_events(producer)
+        assert (await stream.__anext__()).startswith(":")
+        assert "event: first" in await stream.__anext__()
+        await stream.aclose()  # what Starlette does when the client goes away
+
+    asyncio.run(consume())
+    assert state.get("cancelled") is True
+
+    async def failing(emit):
+        raise ValueError("upstream broke")
+
+    async def collect():
+        return [frame async for frame in stream_events(failing)]
+
+    frames = asyncio.run(collect())
+    assert parse_stream("".join(frames)) == [("error", {"error": "upstream broke"})]
+
+
+def test_slot_released_when_stream_never_starts():
+    print("\n=== TEST 4: A client gone before the stream starts doesn't keep its slot ===")
+    limits = get_route_limits()
+    before = limits.active["solo"]
+
+    async def producer(emit):
+        await emit("first", {"n": 1})
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def gone(message):
+        raise OSError("client went away")
+
+    async def sent(message):
+        pass
+
+    async def respond(send):
+        response = sse_response(producer, on_close=limits.acquire("solo"))
+        assert limits.active["solo"] == before + 1
+        try:
+            await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send)
+        except Exception:
+            pass
+
+    asyncio.run(respond(gone))  # headers never sent: the generator never ran
+    print(limits.stats())
+    assert limits.active["solo"] == before
+    asyncio.run(respond(sent))  # streamed to the end: released once, not twice
+    assert limits.active["solo"] == before
+
+
+if __name__ == "__main__":
+    test_event_format()
+    test_solo_stream_order()
+    test_disconnect_cancels_producer()
+    test_slot_released_when_stream_never_starts()
+    print("\n✅ All solo streaming tests passed")
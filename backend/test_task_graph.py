@@ -0,0 +1,184 @@
+import asyncio
+import json
+import time
+
+from app.agents.task_graph import TaskGraph
+from app.agents.solo_agent import SoloModeAgent, guess_search_query, parse_agent_json
+from app.core.config import settings
+
+
+def solo_like_graph(intent_query, calls):
+    """intent ‖ location → speculative search → search → recommendation, each stage sleeping"""
+
+    def intent():
+        time.sleep(0.2)
+        return {"search_query": intent_query}
+
+    def location():
+        time.sleep(0.05)
+        return "12.97,77.59"
+
+    async def speculative_search(location):
+        calls.append("speculative")
+        await asyncio.sleep(0.1)
+        return ["cafe results"]
+
+    def search(intent, location, speculative_search):
+        if speculative_search is not None:
+            return speculative_search
+        calls.append("search")
+        time.sleep(0.1)
+        return [f"{intent['search_query']} results"]
+
+    def recommendation(intent, search):
+        time.sleep(0.2)
+        return {"picks": search}
+
+    graph = TaskGraph()
+    graph.add("intent", intent)
+    graph.add("location", location)
+    graph.add("speculative_search", speculative_search, deps=["location"], confirm_after=["intent"],
+              keep=lambda r: "cafe" in r["intent"]["search_query"])
+    graph.add("search", search, deps=["intent", "location", "speculative_search"])
+    graph.add("recommendation", recommendation, deps=["intent", "search"])
+    return graph
+
+
+def test_speculation_kept_overlaps_stages():
+    print("\n=== TEST 1: Speculative search confirmed ===")
+    calls, streamed = [], []
+    graph = solo_like_graph("quiet cafe", calls)
+
+    start = time.monotonic()
+    results = asyncio.run(graph.run(on_result=lambda name, _: streamed.append(name)))
+    elapsed = time.monotonic() - start
+
+    print(f"{elapsed:.2f}s, streamed {streamed}, timings {graph.timings}")
+    assert results["recommendation"] == {"picks": ["cafe results"]}
+    assert calls == ["speculative"]
+    assert streamed.index("intent") < streamed.index("recommendation")
+    assert elapsed < 0.55  # sequential stages would take 0.2 + 0.05 + 0.1 + 0.2 (+0.1)
+
+
+def test_speculation_discarded_when_intent_disagrees():
+    print("\n=== TEST 2: Speculative search cancelled ===")
+    calls, streamed = [], []
+    graph = solo_like_graph("rooftop bar", calls)
+    results = asyncio.run(graph.run(on_result=lambda name, _: streamed.append(name)))
+
+    print(f"streamed {streamed}, discarded {graph.discarded}")
+    assert results["recommendation"] == {"picks": ["rooftop bar results"]}
+    assert graph.discarded == ["speculative_search"]
+    assert "speculative_search" not in streamed
+    assert calls == ["speculative", "search"]
+
+
+def test_failures_and_unsatisfiable_graphs():
+    print("\n=== TEST 3: Errors ===")
+
+    def boom():
+        raise ValueError("intent failed")
+
+    graph = TaskGraph().add("intent", boom).add("search", lambda intent: intent, deps=["intent"])
+    try:
+        asyncio.run(graph.run())
+        assert False, "expected the stage error to propagate"
+    except ValueError as e:
+        assert str(e) == "intent failed"
+
+    graph = TaskGraph().add("search", lambda missing: missing, deps=["missing"])
+    try:
+        asyncio.run(graph.run())
+        assert False, "expected an unsatisfiable graph to be reported"
+    except RuntimeError as e:
+        assert "search" in str(e)
+
+
+def test_raw_query_helpers():
+    print("\n=== TEST 4: Raw query helpers ===")
+    assert guess_search_query("Need a quiet café with wifi in Koramangala") == "cafe"
+    assert guess_search_query("family dinner tonight") == "restaurant"
+    assert guess_search_query("something fun") is None
+    assert parse_agent_json('```json\n{"search_query": "cafe"}\n```') == {"search_query": "cafe"}
+    assert parse_agent_json("no json here") == {}
+
+
+class RecordingFoursquareTool:
+    def __init__(self):
+        self.calls = []
+
+    def _run(self, action, query, ll, with_details=False):
+        self.calls.append((query, ll, with_details))
+        return json.dumps([{"fsq_id": "a", "name": f"{query} A"}])
+
+
+class RecordingResolver:
+    def __init__(self):
+        self.calls = []
+
+    def extract_coordinates(self, location_text, default_location):
+        self.calls.append(location_text)
+        return "13.00,77.60"
+
+
+def solo_agent_with_intent(intent):
+    """SoloModeAgent with recorded tools and a fixed LLM intent (no network, no crew)"""
+    agent = SoloModeAgent.__new__(SoloModeAgent)
+    agent.default_location = "12.9716,77.5946"
+    agent.foursquare_tool = RecordingFoursquareTool()
+    agent.location_resolver_tool = RecordingResolver()
+    agent.recommendation_agent = None
+    agent.extract_intent_llm = lambda user_query, user_location=None: intent
+    agent._run_single_task = lambda task_agent, task: '{"top": "A"}'
+    return agent
+
+
+def test_solo_speculative_search():
+    print("\n=== TEST 5: Solo speculative search is cheap and only kept when it matches the intent ===")
+    threshold = settings.INTENT_PARSER_CONFIDENCE
+    settings.INTENT_PARSER_CONFIDENCE = 2.0  # always take the (fixed) LLM intent
+    try:
+        def run(user_query, intent):
+            agent = solo_agent_with_intent(intent)
+            graph = agent.build_task_graph(user_query)
+            results = asyncio.run(graph.run())
+            print(user_query, intent, agent.foursquare_tool.calls, graph.discarded)
+            return agent, graph, results
+
+        agent, graph, results = run("quiet cafe in koramangala",
+                                    {"search_query": "Cafe", "location": {"mentioned_location": "Koramangala"}})
+        ll = results["location"]["coordinates"]
+        assert graph.discarded == []
+        # The guess is searched without details; details only once it is kept
+        assert agent.foursquare_tool.calls == [("cafe", ll, False), ("cafe", ll, True)]
+
+        # A search term merely containing the guess is a different search
+        agent, graph, results = run("quiet cafe in koramangala", {"search_query": "rooftop cafe"})
+        assert graph.discarded == ["speculative_search"]
+        assert ("cafe", ll, True) not in agent.foursquare_tool.calls  # may be cancelled before it even starts
+        assert agent.foursquare_tool.calls[-1] == ("rooftop cafe", ll, True)
+
+        # Same term, but the intent is about another place than the one found in the raw query
+        agent, graph, results = run("cafe near koramangala, not indiranagar",
+                                    {"search_query": "cafe", "location": {"mentioned_location": "Indiranagar"}})
+        assert graph.discarded == ["speculative_search"]
+        assert agent.location_resolver_tool.calls == ["Indiranagar"]
+        assert agent.foursquare_tool.calls[-1] == ("cafe", "13.00,77.60", True)
+
+        # The sync entry point works from a thread that is already running an event loop
+        async def from_running_loop():
+            return solo_agent_with_intent({"search_query": "cafe"}).process_query("quiet cafe")
+
+        response = asyncio.run(from_running_loop())
+        assert response["status"] == "success" and response["recommendations"] == {"top": "A"}
+    finally:
+        settings.INTENT_PARSER_CONFIDENCE = threshold
+
+
+if __name__ == "__main__":
+    test_speculation_kept_overlaps_stages()
+    test_speculation_discarded_when_intent_disagrees()
+    test_failures_and_unsatisfiable_graphs()
+    test_raw_query_helpers()
+    test_solo_speculative_search()
+    print("\n✅ All task graph tests passed")
@@ -0,0 +1,73 @@
+import time
+
+import numpy as np
+
+from app.agents.tools.venue_ranking import TopK, cost_matrix, pareto_front, price_target, rank_venues
+
+
+def test_pareto_front():
+    print("\n=== TEST 1: Pareto front ===")
+    costs = np.array([
+        [1.0, 1.0],   # best on both
+        [2.0, 0.5],   # trade-off: worse distance, better variance
+        [2.0, 2.0],   # dominated by row 0
+        [1.0, 1.0],   # duplicate of row 0, not dominated
+    ])
+    assert pareto_front(costs).tolist() == [True, True, False, True]
+
+
+def test_topk_heap_is_deterministic():
+    print("\n=== TEST 2: Incremental top-k ===")
+    top = TopK(3)
+    for key, score in [("e", 0.5), ("b", 0.2), ("d", 0.2), ("a", 0.9), ("c", 0.2), ("f", 0.1)]:
+        top.push(score, key, key)
+    ranked = [item for _, item in top.items()]
+    print(ranked)
+    assert ranked == ["f", "b", "c"]  # ties broken by key
+
+
+def test_rank_prefers_minimax_fair_venue():
+    print("\n=== TEST 3: Minimax-fair ranking ===")
+    venues = [
+        {"fsq_place_id": "close_to_one", "rating": 8.0, "price": 2, "safety_score": 7.5},
+        {"fsq_place_id": "fair", "rating": 8.0, "price": 2, "safety_score": 7.5},
+        {"fsq_place_id": "pricey", "rating": 8.0, "price": 4, "safety_score": 7.5},
+    ]
+    # Member × venue km: venue 0 is next door for member A but far for member B
+    matrix = np.array([[0.5, 3.0, 3.0], [9.0, 3.5, 3.5]])
+    costs = cost_matrix(matrix.max(axis=0), matrix.var(axis=0), venues, price_target(["moderate", "Affordable"]))
+
+    result = rank_venues(venues, costs, k=2)
+    ranked = [v["fsq_place_id"] for v in result["ranked"]]
+    print(ranked, [v["fairness_score"] for v in result["ranked"]])
+    assert ranked == ["fair", "pricey"]
+    assert result["ranked"][0]["pareto_optimal"] is True
+    assert [v["fsq_place_id"] for v in result["pareto_front"]] == ["fair"]
+
+
+def test_ranking_speed():
+    print("\n=== TEST 4: 500 candidates ===")
+    rng = np.random.default_rng(11)
+    venues = [
+        {"fsq_place_id": f"v{i}", "rating": float(r), "price": int(p), "safety_score": float(s)}
+        for i, (r, p, s) in enumerate(zip(rng.uniform(5, 9.5, 500), rng.integers(1, 5, 500), rng.uniform(5, 9, 500)))
+    ]
+    matrix = rng.uniform(0.5, 15, size=(20, 500))
+
+    start = time.perf_counter()
+    costs = cost_matrix(matrix.max(axis=0), matrix.var(axis=0), venues, 2.0)
+    result = rank_venues(venues, costs, k=10)
+    elapsed = time.perf_counter() - start
+
+    print(f"Ranked 500 venues in {elapsed * 1e3:.2f}ms, front size {len(result['pareto_front'])}")
+    assert len(result["ranked"]) == 10
+    assert elapsed / 500 < 0.0001
+    assert rank_venues(venues, costs, k=10)["ranked"] == result["ranked"]
+
+
+if __name__ == "__main__":
+    test_pareto_front()
+    test_topk_heap_is_deterministic()
+    test_rank_prefers_minimax_fair_venue()
+    test_ranking_speed()
+    print("\n✅ All venue ranking tests passed")